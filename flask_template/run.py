@@ -1,6 +1,6 @@
 
 import os
-from flask import Flask, flash, request, redirect, url_for, render_template
+from flask import Flask, flash, request, redirect, url_for, render_template, jsonify
 from plab2.startup import home_dir
 from werkzeug.utils import secure_filename
 from flask import session
@@ -54,53 +54,158 @@ def check_number_file():
     return ppi_path, node_edge_path
 
 
+def load_ppi(ppi_path):
+    """Import the network of a PPI file, its node/edge lists are written to a temporary folder."""
+    import tempfile
+    from plab2.network import Analyzer
+    a = Analyzer({}, None, ppi_path, None, None)
+    with tempfile.TemporaryDirectory() as folder:
+        edge_path = os.path.join(folder, "edge_list.tsv")
+        a.write_edge_list(edge_path)
+        a.import_graph(edge_path)
+    # the oracle is kept in memory, unreachable pairs are answered without a search.
+    a.use_oracle()
+    return a
+
+
+def load_node_edge(path_1, path_2):
+    """Import the network of a node and an edge list, given in any order."""
+    from plab2.network import Analyzer
+    try:
+        NODE_path, EDGE_path = path_1, path_2
+        a = Analyzer({}, None, None, NODE_path, EDGE_path)
+    except:
+        EDGE_path, NODE_path = path_1, path_2
+        a = Analyzer({}, None, None, NODE_path, EDGE_path)
+    a.import_graph(EDGE_path)
+    # the oracle is persisted next to the edge list, unreachable pairs are answered without a search.
+    a.use_oracle(EDGE_path)
+    return a
+
+
+def session_upload():
+    """Kind and files of the uploaded network of the session."""
+    if session.get("type_of_file") == "ppi":
+        return "ppi", [session["ppi"]]
+    return "node/edge", [session["node_edge_1"], session["node_edge_2"]]
+
+
+def stored_network(kind, paths):
+    """
+    The network of the uploaded files from the graph store, only imported if the files were not imported before.
+    """
+    from plab2.store import get_graph_store
+    load = load_ppi if kind == "ppi" else load_node_edge
+    return get_graph_store().get(paths, lambda: load(*paths), kind)
+
+
+def summary_table(s, enrich=False):
+    """The summary statistics of a network as HTML table."""
+    # the average node connectivity is not shown, so it is not computed.
+    data = s.summary_statistics(enrich, connectivity='none')
+    data.drop('Average node connectivity', inplace=True, axis=1)
+    return data.to_html(header="true", table_id="table", index=False)
+
+
+def encode_png(draw):
+    """The PNG drawn by draw(file object) base64 encoded."""
+    import io
+    import base64
+    img = io.BytesIO()
+    draw(img)
+    return base64.b64encode(img.getvalue()).decode('utf8')
+
+
+def stats_job(job, kind, paths):
+    """Background job of the summary statistics of an uploaded network."""
+    from plab2.network import Statistics
+    job.report(0.1, "importing the network")
+    entry = stored_network(kind, paths)
+    job.report(0.5, "computing the statistics")
+    return entry.cached("summary", lambda: summary_table(Statistics(entry.network.nodes, entry.network.graph,
+                                                                    None, None, None)))
+
+
+def plot_job(job, kind, paths):
+    """Background job of the image of an uploaded network."""
+    job.report(0.1, "importing the network")
+    entry = stored_network(kind, paths)
+    job.report(0.3, "laying out the network")
+    entry.layout
+    job.report(0.7, "drawing the network")
+    a = entry.view()
+    return entry.cached("plot.png", lambda: encode_png(lambda img: a.draw(a.networkx_graph(), img,
+                                                                          output_format='png')))
+
+
+def enrich_job(job, kind, paths):
+    """Background job enriching an uploaded network with DNA and RNA nodes, with its statistics and image."""
+    import tempfile
+    from plab2.network import Statistics
+    job.report(0.05, "reading the network")
+    with tempfile.TemporaryDirectory() as folder:
+        node_enrich = os.path.join(folder, "node_list_enrich.tsv")
+        edge_enrich = os.path.join(folder, "edge_list_enrich.tsv")
+        if kind == "ppi":
+            s = Statistics({}, None, paths[0], None, None)
+            s.enrich_generate_node_dict()
+            s.enrich_write_node_list(node_enrich)
+            job.report(0.2, "enriching the edges")
+            s.enrich_edge_from_ppi(None, edge_enrich)
+        else:
+            try:
+                NODE_path, EDGE_path = paths
+                s = Statistics({}, None, None, NODE_path, EDGE_path)
+            except:
+                EDGE_path, NODE_path = paths
+                s = Statistics({}, None, None, NODE_path, EDGE_path)
+            s.enrich_node_label(s.relations(NODE_path))
+            s.enrich_write_node_list(node_enrich)
+            job.report(0.2, "enriching the edges")
+            s.open_original_edge(EDGE_path)
+            s.enrich_edge_from_old_edge(None, edge_enrich)
+        s.enrich_import_graph(edge_enrich)
+    job.report(0.4, "computing the statistics")
+    table = summary_table(s, enrich=True)
+    job.report(0.6, "drawing the network")
+    plot = encode_png(lambda img: s.enrich_network(img, False, output_format='png'))
+    return {"table": table, "plot_url": plot}
+
+
+def submit_job(name, function):
+    """Run function on the uploaded network of the session in the background, once per network."""
+    from plab2.jobs import get_job_queue
+    from plab2.store import get_graph_store
+    kind, paths = session_upload()
+    key = f"{name}-{get_graph_store().key(paths, kind)}"
+    return get_job_queue().submit(name, function, kind, paths, key=key)
+
+
 @app.route("/import_option", methods=['POST'])
 def import_option():
     """import uploaded files and show stats."""
-    from plab2.network import Statistics
     number_ppi, number_node_edge = len(check_number_file()[0]), len(check_number_file()[1])
+    info_string, data_table_html = "", ""
     if request.form["type"] == "ppi_file":
         if number_ppi != 1:
             info_string = "Please clear the contents of upload folder and upload only one PPI file."
-            data_table_html = ""
-
         else:
             ppi_path = os.path.join(app.config['UPLOAD_FOLDER'], check_number_file()[0][0])
             session["ppi"] = ppi_path
             session["type_of_file"] = "ppi"
             info_string = "File(s) imported successfully"
-
-            PPI_file = session.get("ppi")
-            NODE_path, EDGE_path = "node_list.tsv", "edge_list.tsv"
-            s = Statistics({}, None, PPI_file, None, None)
-            s.write_node_list(NODE_path)
-            s.write_edge_list(EDGE_path)
-            s.import_graph(EDGE_path)
-            data = s.summary_statistics(False)
-            data.drop('Average node connectivity', inplace=True, axis=1)
-
-            data_table_html = data.to_html(header="true", table_id="table", index=False)
-            os.remove(NODE_path)
-            os.remove(EDGE_path)
     elif request.form["type"] == "node_edge_file":
         if number_node_edge != 2:
             info_string = "Please clear the contents of upload folder and upload one node and one edge file."
-            data_table_html = ""
         else:
             session["node_edge_1"] = os.path.join(app.config['UPLOAD_FOLDER'], check_number_file()[1][0])
             session["node_edge_2"] = os.path.join(app.config['UPLOAD_FOLDER'], check_number_file()[1][1])
             session["type_of_file"] = "node/edge"
             info_string = "File(s) imported successfully"
-            try:
-                NODE_path, EDGE_path = session["node_edge_1"], session["node_edge_2"]
-                s = Statistics({}, None, None, NODE_path, EDGE_path)
-            except:
-                EDGE_path, NODE_path = session["node_edge_1"], session["node_edge_2"]
-                s = Statistics({}, None, None, NODE_path, EDGE_path)
-            s.import_graph(EDGE_path)
-            data = s.summary_statistics(False)
-            data.drop('Average node connectivity', inplace=True, axis=1)
-            data_table_html = data.to_html(header="true", table_id="table", index=False)
+    job_id = None
+    if info_string == "File(s) imported successfully":
+        # the statistics are computed in the background, the page shows them when they are done.
+        job_id = submit_job("stats", stats_job).id
     return render_template('template.html', my_string="",
                            title="Danqi's Network Analyzer",
                            hgnc_result="-",
@@ -109,7 +214,8 @@ def import_option():
                            hgnc_link="",
                            uniprot_link="",
                            reader_info= info_string,
-                           data_table = data_table_html)
+                           data_table = data_table_html,
+                           job_id = job_id)
         # redirect("/")
 
 @app.route("/upload")
@@ -153,17 +259,30 @@ def upload_file():
 @app.route('/identifier', methods=['POST'])
 def get_identifier():
     """Function for get identifier of specific symbol."""
-    from plab2.startup import HGNC_data_path, UniProt_data_path, CONN_STRING
+    from plab2.startup import HGNC_index_path, CONN_STRING
     from plab2.Utils import Profiler
+    from plab2.hgnc_index import cached_resolver
     hgnc_symbol = request.form['textbox']
     p = Profiler(hgnc_symbol)
-    file_path = os.path.join(HGNC_data_path, f'{hgnc_symbol}.json')
-    if not os.path.isfile(file_path):
+    resolver = cached_resolver(HGNC_index_path)
+    identifiers = resolver.resolve(hgnc_symbol) if resolver is not None else None
+    if identifiers is not None:
+        # offline lookup in the index made by `plab2 ingest-hgnc`.
+        hgnc_id = identifiers["HGNC ID"]
+        ensembl_id = identifiers["Ensembl Gene ID"]
+        uniprot_id = identifiers["UniProt ID"][0]
+        HGNC_root = f"http://rest.genenames.org/fetch/symbol/{hgnc_symbol}"
+        uniprot_root = f"https://www.uniprot.org/uniprot/{uniprot_id}"
+        return render_template('template.html', my_string=f"{hgnc_symbol}", title="Danqi's Network Analyzer",
+                               hgnc_result=hgnc_id, ensembl_result=ensembl_id,
+                               uniprot_result=uniprot_id, hgnc_link=HGNC_root, uniprot_link=uniprot_root)
+    elif not p.cache.contains("hgnc", hgnc_symbol):
         try:
             p.request()
-            hgnc_id = p.extract()["HGNC ID"]
-            ensembl_id = p.extract()["Ensembl Gene ID"]
-            uniprot_id = p.extract()["UniProt ID"][0]
+            identifiers = p.extract()
+            hgnc_id = identifiers["HGNC ID"]
+            ensembl_id = identifiers["Ensembl Gene ID"]
+            uniprot_id = identifiers["UniProt ID"][0]
             HGNC_root = f"http://rest.genenames.org/fetch/symbol/{hgnc_symbol}"
             uniprot_root = f"https://www.uniprot.org/uniprot/{uniprot_id}"
 
@@ -177,9 +296,10 @@ def get_identifier():
                                    uniprot_link=f"No link found {hgnc_symbol}")
 
     else:
-        hgnc_id = p.extract()["HGNC ID"]
-        ensembl_id = p.extract()["Ensembl Gene ID"]
-        uniprot_id = p.extract()["UniProt ID"][0]
+        identifiers = p.extract()
+        hgnc_id = identifiers["HGNC ID"]
+        ensembl_id = identifiers["Ensembl Gene ID"]
+        uniprot_id = identifiers["UniProt ID"][0]
         HGNC_root = f"http://rest.genenames.org/fetch/symbol/{hgnc_symbol}"
         uniprot_root = f"https://www.uniprot.org/uniprot/{uniprot_id}"
         return render_template('template.html', my_string=f"{hgnc_symbol}", title="Danqi's Network Analyzer",
@@ -209,85 +329,88 @@ def get_identifier():
 @app.route('/short_path', methods=['POST'])
 def short_path():
     """Function used to get shortest path between two HGNC symbols."""
-    from plab2.network import Analyzer
-
-    if session.get("type_of_file") == "ppi":
-        PPI_file = session.get("ppi")
-        node_path, edge_path = "node_list.tsv", "edge_list.tsv"
-        a = Analyzer({}, None, PPI_file, None, None)
-        a.write_node_list(node_path)
-        a.write_edge_list(edge_path)
-        a.import_graph(edge_path)
-        os.remove(node_path)
-        os.remove(edge_path)
-        source, target = request.form["source, target"].split(",")[0], request.form["source, target"].split(",")[1]
-        try:
-            first_path = a.shortest_path(source, target, print_option=False)[0]
-            result_sentence = f"Shortest path for {source} and {target} is:"
-            return render_template('template.html', my_string="", title="Danqi's Network Analyzer", hgnc_result="-",
-                                   ensembl_result="-", uniprot_result="-", hgnc_link="", uniprot_link="",
-                                   result=result_sentence, reminder="", find_path=first_path)
-        except:
-            result_sentence = f"No paths found between {source} and {target}."
-            return render_template('template.html', my_string="", title="Danqi's Network Analyzer", hgnc_result="-",
-                                   ensembl_result="-", uniprot_result="-", hgnc_link="", uniprot_link="",
-                                   result=result_sentence, reminder="", find_path="")
+    import networkx as nx
 
-    elif session.get("type_of_file") == "node/edge":
-        source, target = request.form["source, target"].split(",")[0], request.form["source, target"].split(",")[1]
-        try:
-            node_path, edge_path = session.get("node_edge_1"), session.get("node_edge_2")
-            a = Analyzer({}, None, None, node_path, edge_path)
-        except:
-            edge_path, node_path = session.get("node_edge_1"), session.get("node_edge_2")
-            a = Analyzer({}, None, None, node_path, edge_path)
-        a.import_graph(edge_path)
-        sp = a.shortest_path(source, target, print_option=False)
-        if sp:
-            result_sentence = f"Shortest path for {source} and {target} is:"
-            return render_template('template.html', my_string="", title="Danqi's Network Analyzer", hgnc_result="-", ensembl_result="-", uniprot_result="-", hgnc_link="", uniprot_link="", result=result_sentence, reminder="", find_path=sp[0])
-        else:
-            result_sentence = f"No paths found between {source} and {target}."
-            return render_template('template.html', my_string="", title="Danqi's Network Analyzer", hgnc_result="-", ensembl_result="-", uniprot_result="-", hgnc_link="", uniprot_link="", result=result_sentence, reminder="", find_path="")
+    entry = stored_network(*session_upload())
+    source, target = request.form["source, target"].split(",")[0], request.form["source, target"].split(",")[1]
+    try:
+        sp = entry.view().shortest_path(source, target, print_option=False, max_paths=1)
+    except (nx.NetworkXNoPath, nx.NodeNotFound):
+        sp = []
+    # the path is highlighted on the interactive page of the network.
+    session["path"] = sp[0] if sp else None
+    if sp:
+        result_sentence = f"Shortest path for {source} and {target} is:"
+        return render_template('template.html', my_string="", title="Danqi's Network Analyzer", hgnc_result="-", ensembl_result="-", uniprot_result="-", hgnc_link="", uniprot_link="", result=result_sentence, reminder="", find_path=sp[0])
+    else:
+        result_sentence = f"No paths found between {source} and {target}."
+        return render_template('template.html', my_string="", title="Danqi's Network Analyzer", hgnc_result="-", ensembl_result="-", uniprot_result="-", hgnc_link="", uniprot_link="", result=result_sentence, reminder="", find_path="")
 
 
 @app.route('/plot.png', methods=['GET', 'POST'])
 def plot_png():
     """Function used to plot network graph."""
-    from plab2.network import Network
-    import matplotlib.pyplot as plt
-    import networkx as nx
-    import io
-    import base64
-    if session.get("type_of_file") == "ppi":
-        PPI_file = session.get("ppi")
-        node_path, edge_path = "node_list.tsv", "edge_list.tsv"
-        n = Network({}, None, PPI_file, None, None)
-        n.write_node_list(node_path)
-        n.write_edge_list(edge_path)
-        n.import_graph(edge_path)
-    elif session.get("type_of_file") == "node/edge":
-        try:
-            NODE_path, EDGE_path = session["node_edge_1"], session["node_edge_2"]
-            n = Network({}, None, None, NODE_path, EDGE_path)
-        except:
-            EDGE_path, NODE_path = session["node_edge_1"], session["node_edge_2"]
-            n = Network({}, None, None, NODE_path, EDGE_path)
-        n.import_graph(EDGE_path)
-
-    node_colors, edge_colors = 'red', 'black'
-    plt.figure(figsize=(18, 18))
-    n.graph.pos = nx.spring_layout(n.graph, k=0.06)
-    nx.draw_networkx(n.graph, pos=n.graph.pos, with_labels=True,
-                         node_color=node_colors,
-                         edge_color=edge_colors, alpha=0.3)
-    img = io.BytesIO()
-    plt.savefig(img, format='png')
-    plt.close()
-    img.seek(0)
-    plot_url = base64.b64encode(img.getvalue()).decode('utf8')
-    return render_template('plot.html', plot_url=plot_url)
+    job = submit_job("plot", plot_job)
+    return render_template('job.html', title="Danqi's Network Analyzer", job_id=job.id)
+
 
+@app.route('/enrich', methods=['POST'])
+def enrich():
+    """Enrich the uploaded network with DNA and RNA nodes in the background."""
+    job = submit_job("enrich", enrich_job)
+    return render_template('job.html', title="Danqi's Network Analyzer", job_id=job.id)
+
+
+@app.route('/network.html', methods=['GET', 'POST'])
+def network_html():
+    """Interactive page of the network, with the last shortest path of the session highlighted."""
+    import io
+    entry = stored_network(*session_upload())
+    # laid out once for the stored network, the views share its positions.
+    entry.layout
+    a = entry.view()
+    path = session.get("path")
+    page = io.StringIO()
+    a.short_path = [path] if path and all(a.graph.has_node(node) for node in path) else []
+    a.generate_graph_network(page, output_format='html')
+    return page.getvalue()
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status and progress of a background job."""
+    from plab2.jobs import get_job_queue
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}."}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a background job, a running job stops at its next step."""
+    from plab2.jobs import get_job_queue
+    cancelled = get_job_queue().cancel(job_id)
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}."}), 404
+    return jsonify({**job.to_dict(), "cancelled": cancelled})
+
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Result of a finished background job, its status while it is not done."""
+    from plab2.jobs import get_job_queue, DONE
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}."}), 404
+    if job.status != DONE:
+        return jsonify(job.to_dict()), 202 if job.active else 409
+    if job.name == "stats":
+        return job.result
+    if job.name == "plot":
+        return render_template('plot.html', plot_url=job.result)
+    return render_template('enrich.html', title="Danqi's Network Analyzer", **job.result)
 
 
 if __name__ == '__main__':
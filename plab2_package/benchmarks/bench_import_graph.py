@@ -0,0 +1,52 @@
+"""Benchmark of the identifier relabeling used by Network.import_graph.
+
+Compares the former DataFrame.replace(mapping) with the vectorized index lookup of plab2.network.relabel
+on random edge lists from 10k to 10M edges, and times building the nx.Graph for the smaller sizes.
+
+Usage: python benchmarks/bench_import_graph.py [--sizes 10000 100000 ...] [--max-replace N] [--max-graph N]
+"""
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from plab2.network import relabel, graph_from_edge_list
+
+
+def random_edge_list(number_of_edges: int, seed: int = 0) -> tuple:
+    """Random edge list with about one node per two edges, and the identifier -> symbol mapping."""
+    rng = np.random.default_rng(seed)
+    number_of_nodes = max(number_of_edges // 2, 2)
+    data = pd.DataFrame({'node_1': rng.integers(1, number_of_nodes + 1, number_of_edges),
+                         'node_2': rng.integers(1, number_of_nodes + 1, number_of_edges),
+                         'metadata': rng.choice(['physical_association', 'association'], number_of_edges)})
+    mapping = {identifier: f"GENE{identifier}" for identifier in range(1, number_of_nodes + 1)}
+    return data, mapping
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument('--max-replace', type=int, default=100_000,
+                        help="largest edge list timed with DataFrame.replace, which is quadratic in practice.")
+    parser.add_argument('--max-graph', type=int, default=1_000_000,
+                        help="largest edge list for which the nx.Graph is built.")
+    args = parser.parse_args()
+
+    print(f"{'edges':>12} {'replace [s]':>12} {'relabel [s]':>12} {'graph [s]':>10}")
+    for size in args.sizes:
+        data, mapping = random_edge_list(size)
+        replace_time = timed(data.replace, mapping) if size <= args.max_replace else float('nan')
+        relabel_time = timed(lambda: (relabel(data['node_1'], mapping), relabel(data['node_2'], mapping)))
+        graph_time = timed(graph_from_edge_list, data, mapping) if size <= args.max_graph else float('nan')
+        print(f"{size:>12} {replace_time:>12.3f} {relabel_time:>12.3f} {graph_time:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
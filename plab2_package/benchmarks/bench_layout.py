@@ -0,0 +1,58 @@
+"""Benchmark of the multilevel layout against nx.spring_layout.
+
+Lays out scale-free networks (Barabasi-Albert, like PPI networks) of increasing size and reports the seconds and
+the correlation of graph distance and drawn distance over sampled node pairs (higher is a more faithful drawing).
+spring_layout is skipped above --spring_max nodes, where it takes minutes.
+
+Usage: python benchmarks/bench_layout.py [--sizes 1000 5000 100000] [--spring_max N] [--pairs N]
+"""
+
+import argparse
+import time
+import networkx as nx
+import numpy as np
+from plab2.multilevel import multilevel_layout
+
+
+def distance_correlation(graph: nx.Graph, positions: dict, number_of_pairs: int, seed: int = 0) -> float:
+    """Correlation of the graph distance and the drawn distance of random node pairs."""
+    rng = np.random.default_rng(seed)
+    nodes = list(graph.nodes())
+    sources = rng.integers(0, len(nodes), number_of_pairs // 100 + 1)
+    graph_distances, drawn = [], []
+    for source in sources:
+        lengths = nx.single_source_shortest_path_length(graph, nodes[source])
+        for target in rng.integers(0, len(nodes), 100):
+            if nodes[target] in lengths and target != source:
+                graph_distances.append(lengths[nodes[target]])
+                drawn.append(np.linalg.norm(positions[nodes[source]] - positions[nodes[target]]))
+    return float(np.corrcoef(graph_distances, drawn)[0, 1])
+
+
+def timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 5_000, 100_000])
+    parser.add_argument('--spring_max', type=int, default=5_000, help="largest network laid out by spring_layout.")
+    parser.add_argument('--pairs', type=int, default=5_000, help="sampled node pairs of the distance correlation.")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'edges':>8} {'layout':>11} {'seconds':>9} {'distance corr.':>15}")
+    for size in args.sizes:
+        graph = nx.barabasi_albert_graph(size, 2, seed=0)
+        layouts = [('multilevel', lambda: multilevel_layout(graph, seed=0))]
+        if size <= args.spring_max:
+            layouts.append(('spring', lambda: nx.spring_layout(graph, k=0.06, seed=0)))
+        for name, layout in layouts:
+            positions, seconds = timed(layout)
+            correlation = distance_correlation(graph, positions, args.pairs)
+            print(f"{size:>8} {graph.number_of_edges():>8} {name:>11} {seconds:>9.2f} {correlation:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark of the per-symbol lookup latency of the hgnc/uniprot tables.
+
+Fills a temporary SQLite database with 1k to 100k genes (one protein each) and times models.query_data for single
+symbols and models.query_many for batches, with the indexes of the schema and, for comparison, without them.
+
+Usage: python benchmarks/bench_lookup.py [--sizes 1000 10000 100000] [--lookups N] [--batch N]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from plab2 import models
+
+
+def filled_database(path: str, number_of_genes: int, indexed: bool):
+    """Engine of a new SQLite database with number_of_genes hgnc rows and one uniprot row per gene."""
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    if not indexed:
+        with engine.begin() as connection:
+            for table in models.Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    connection.execute(text(f"DROP INDEX {index.name}"))
+    session = Session(bind=engine)
+    models.add_data_hgnc([(i, f"HGNC:{i}", f"ENSG{i:011d}", f"GENE{i}") for i in range(1, number_of_genes + 1)],
+                         session)
+    models.add_data_uniprot([(i, f"P{i:05d}", "9606", f"PROT{i}_HUMAN", f"Protein {i}", i)
+                             for i in range(1, number_of_genes + 1)], session)
+    return engine, session
+
+
+def lookup_latency(session: Session, symbols: list, batch: int) -> tuple:
+    """Mean latency in ms per symbol of query_data and of query_many in batches."""
+    start = time.perf_counter()
+    for symbol in symbols:
+        models.query_data(symbol, session)
+    single = (time.perf_counter() - start) / len(symbols) * 1000
+    start = time.perf_counter()
+    for begin in range(0, len(symbols), batch):
+        models.query_many(symbols[begin:begin + batch], session)
+    batched = (time.perf_counter() - start) / len(symbols) * 1000
+    return single, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--lookups', type=int, default=500, help="number of looked up symbols.")
+    parser.add_argument('--batch', type=int, default=500, help="symbols per query_many call.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'genes':>8} {'indexes':>8} {'query_data [ms]':>16} {'query_many [ms]':>16}")
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            symbols = [f"GENE{i}" for i in rng.integers(1, size + 1, args.lookups)]
+            for indexed in (True, False):
+                path = os.path.join(folder, f"lookup_{size}_{indexed}.db")
+                engine, session = filled_database(path, size, indexed)
+                single, batched = lookup_latency(session, symbols, args.batch)
+                print(f"{size:>8} {'yes' if indexed else 'no':>8} {single:>16.3f} {batched:>16.4f}")
+                session.close()
+                engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark of repeated distance queries with and without the landmark distance oracle.
+
+Builds a random network with a large and many small components, and times random node pair queries: the oracle
+bounds, Analyzer.distance with the oracle (searching only if the bounds are not tight) and the plain networkx search.
+
+Usage: python benchmarks/bench_oracle.py [--nodes N] [--edges N] [--queries N] [--landmarks N]
+"""
+
+import argparse
+import time
+import networkx as nx
+import numpy as np
+from plab2.network import Analyzer
+from plab2.oracle import DistanceOracle
+
+
+def random_network(number_of_nodes: int, number_of_edges: int, seed: int = 0) -> nx.Graph:
+    """A random graph on 90% of the nodes and node pairs on the rest."""
+    rng = np.random.default_rng(seed)
+    core = int(number_of_nodes * 0.9)
+    graph = nx.Graph()
+    graph.add_edges_from((f"N{u}", f"N{v}") for u, v in rng.integers(0, core, (number_of_edges, 2)) if u != v)
+    graph.add_edges_from((f"N{u}", f"N{u + 1}") for u in range(core, number_of_nodes - 1, 2))
+    return graph
+
+
+def percentiles(latencies: list) -> str:
+    p50, p90, p99 = np.percentile(np.array(latencies) * 1e6, [50, 90, 99])
+    return f"{p50:>10.1f} {p90:>10.1f} {p99:>10.1f}"
+
+
+def timed(function, pairs: list) -> list:
+    latencies = []
+    for source, target in pairs:
+        started = time.perf_counter()
+        try:
+            function(source, target)
+        except nx.NetworkXNoPath:
+            pass
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--nodes', type=int, default=100_000)
+    parser.add_argument('--edges', type=int, default=300_000)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--landmarks', type=int, default=16)
+    args = parser.parse_args()
+
+    graph = random_network(args.nodes, args.edges)
+    started = time.perf_counter()
+    oracle = DistanceOracle.build(graph, args.landmarks)
+    print(f"oracle of {graph.number_of_nodes()} nodes built in {time.perf_counter() - started:.2f} s")
+    nodes = list(graph.nodes())
+    rng = np.random.default_rng(1)
+    pairs = [(nodes[i], nodes[j]) for i, j in rng.integers(0, len(nodes), (args.queries, 2))]
+
+    analyzer = Analyzer({}, graph, None, None, None)
+    analyzer.oracle = oracle
+    print(f"{'query':>22} {'p50 [us]':>10} {'p90 [us]':>10} {'p99 [us]':>10}")
+    print(f"{'oracle bounds':>22} {percentiles(timed(oracle.query, pairs))}")
+    exact = sum(oracle.query(source, target).exact for source, target in pairs)
+    print(f"{'distance with oracle':>22} {percentiles(timed(analyzer.distance, pairs))}")
+    print(f"{'networkx search':>22} {percentiles(timed(lambda u, v: nx.shortest_path_length(graph, u, v), pairs))}")
+    print(f"{exact} of {len(pairs)} distances are answered by the bounds alone")
+
+
+if __name__ == '__main__':
+    main()
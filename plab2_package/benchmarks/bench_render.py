@@ -0,0 +1,56 @@
+"""Benchmark of the collection renderer against nx.draw_networkx.
+
+Draws scale-free networks (Barabasi-Albert, like PPI networks) of increasing size to PNG at random positions (the
+layout is not measured) and reports the seconds. The renderer draws lines up to render.RASTER_EDGES edges and a
+density image above. nx.draw_networkx is skipped above --networkx_max edges.
+
+Usage: python benchmarks/bench_render.py [--edges 10000 100000 1000000] [--networkx_max N]
+"""
+
+import os
+import argparse
+import tempfile
+import time
+import networkx as nx
+import numpy as np
+from plab2.render import RASTER_EDGES, render_network
+
+
+def draw_networkx(graph: nx.Graph, positions: dict, output: str) -> None:
+    """The drawing of the network methods before the renderer."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(18, 18))
+    nx.draw_networkx(graph, pos=positions, with_labels=True, node_color='red', edge_color='black', alpha=0.3)
+    plt.savefig(output)
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--edges', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--networkx_max', type=int, default=100_000,
+                        help="largest network drawn by nx.draw_networkx.")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'edges':>8} {'renderer':>15} {'seconds':>9}")
+    with tempfile.TemporaryDirectory() as folder:
+        output = os.path.join(folder, 'graph.png')
+        for edges in args.edges:
+            graph = nx.barabasi_albert_graph(edges // 4, 4, seed=0)
+            rng = np.random.default_rng(0)
+            positions = dict(zip(graph.nodes(), rng.random((graph.number_of_nodes(), 2))))
+            renderers = [('raster' if graph.number_of_edges() > RASTER_EDGES else 'collections',
+                          lambda: render_network(graph, positions, output))]
+            if graph.number_of_edges() <= args.networkx_max:
+                renderers.append(('draw_networkx', lambda: draw_networkx(graph, positions, output)))
+            for name, render in renderers:
+                started = time.perf_counter()
+                render()
+                seconds = time.perf_counter() - started
+                print(f"{graph.number_of_nodes():>8} {graph.number_of_edges():>8} {name:>15} {seconds:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
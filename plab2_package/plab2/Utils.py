@@ -1,45 +1,97 @@
 """Methods related to downloading and storing information HGNC and UniProt."""
 
+import copy
+import json
 import requests
 import logging
-from .startup import HGNC_data_path, UniProt_data_path
+from typing import Optional
+from .cache import Cache, get_cache
 
 logger = logging.getLogger('Utils')
 
+HGNC_ROOT = "http://rest.genenames.org/fetch/symbol/"
+UNIPROT_ROOT = "https://www.uniprot.org/uniprot/"
+
+
+def parse_hgnc(text: str) -> dict:
+    """HGNC ID, Ensembl Gene ID and UniProt IDs of a cached HGNC .json text."""
+    data = json.loads(text)
+
+    info_dict = {}
+
+    docs = data["response"]["docs"][0]
+    try:
+        info_dict["HGNC ID"] = docs["hgnc_id"]
+    except:
+        info_dict["HGNC ID"] = [None]
+    try:
+        info_dict["Ensembl Gene ID"] = docs["ensembl_gene_id"]
+    except:
+        info_dict["Ensembl Gene ID"] = [None]
+    try:
+        info_dict["UniProt ID"] = docs["uniprot_ids"]
+    except:
+        info_dict["UniProt ID"] = [None]
+    return info_dict
+
+
+def parse_uniprot(text: str) -> dict:
+    """Protein info of the header line of a cached UniProt .fasta text."""
+    info_string = text.split("\n", 1)[0].lstrip(">sp|")
+    first_acc_num = info_string.split("|")[0]
+    other_info = info_string.split("|")[1]
+    rest_info = other_info.split(" ")
+    name_of_protein = rest_info[0]
+    for elem in rest_info:
+        if elem.startswith("OX="):
+            NCBI_ID = elem[3:]
+        elif elem.startswith("GN="):
+            primary_gene_symbol = elem[3:]
+        elif elem.startswith("OS="):
+            OS_index = rest_info.index(elem)
+            full_name_protein = " ".join(rest_info[1:OS_index])
+    protein_info = {"first accession number": first_acc_num,
+                    "primary gene symbol": primary_gene_symbol,
+                    "NCBI taxonomy ID": NCBI_ID,
+                    "Name of protein": name_of_protein,
+                    "full name of protein": full_name_protein}
+    return protein_info
+
+
 class Profiler():
-    def __init__(self, protein_id: str, get_uniprot: bool = False):
+    def __init__(self, protein_id: str, get_uniprot: bool = False, cache: Optional[Cache] = None):
         self.protein_id = protein_id
         self.get_uniprot = get_uniprot
+        self.cache = cache if cache is not None else get_cache()
 
-    def request(self) -> None:
+    def request(self, session: Optional[requests.Session] = None, root: str = HGNC_ROOT) -> requests.Response:
         """
-        Use HGNC symbol as input, and will write corresponding .xml files using API method to data folder.
+        Use HGNC symbol as input, and will store the corresponding .json text in the cache.
         ------
         Parameter: protein_id : str
                   HGNC symbol
+                  session: Optional[requests.Session]
+                  shared session with pooled connections, a new connection is made if not given.
+                  root: str
+                  URL of the HGNC fetch service.
         ------
-        Return: None
-               .xml file
+        Return: requests.Response
+               the response, the .json text is cached if it was successful.
         """
         headers = {"Accept": "application/json", }
-        HGNC_root = "http://rest.genenames.org/fetch/symbol/"
         HGNC_id = f"{self.protein_id}"
-        query = HGNC_root + HGNC_id
-        r = requests.get(query, headers=headers)
+        query = root + HGNC_id
+        r = (session or requests).get(query, headers=headers)
         if r.ok:
             logger.info(f"Successful request for {self.protein_id}.")
 
-
-            path_root = HGNC_data_path
-            file_name = f"/{self.protein_id}.json"
-            path = path_root + file_name
             content = r.json()["response"]
             if content["numFound"] > 0:
-                with open(path, "w") as file:
-                    file.write(r.text)
-                logger.info(f"{self.protein_id}.json file is stored in data folder.")
+                self.cache.set("hgnc", self.protein_id, r.text)
+                logger.info(f"{self.protein_id}.json is stored in the cache.")
         else:
             logger.warning(f"no results for {self.protein_id} were found")
+        return r
 
     # # the status code is unacceptable.
     # else:
@@ -56,79 +108,41 @@ class Profiler():
                    return a dictionary contains info of HGNC id, ensembl id and uniprot id.
                    Also prints out the link to this HGNC symbol.
             """
-        import json
-        input_file = HGNC_data_path + f"/{self.protein_id}.json"
-
-        file = open(input_file)
-        f = file.read()
-        data = json.loads(f)
-
-        info_dict = {}
-
-        docs = data["response"]["docs"][0]
-        try:
-            info_dict["HGNC ID"] = docs["hgnc_id"]
-        except:
-            info_dict["HGNC ID"] = [None]
-        try:
-            info_dict["Ensembl Gene ID"] = docs["ensembl_gene_id"]
-        except:
-            info_dict["Ensembl Gene ID"] = [None]
-        try:
-            info_dict["UniProt ID"] = docs["uniprot_ids"]
-        except:
-            info_dict["UniProt ID"] = [None]
+        info_dict = self.cache.parsed("hgnc", self.protein_id, parse_hgnc)
+        if info_dict is None:
+            raise KeyError(f"{self.protein_id} is not cached, request it first.")
 
         logger.info(f"Identifier info of {self.protein_id} is generated.")
 
-        return info_dict
+        # a deep copy, the parsed record and its "UniProt ID" list are shared with the later lookups.
+        return copy.deepcopy(info_dict)
 
-    def request_uniprot(self, accession_number: str) -> None:
+    def request_uniprot(self, accession_number: str, session: Optional[requests.Session] = None,
+                        root: str = UNIPROT_ROOT) -> requests.Response:
         """ request info from UniProt.
-        Input: accession number.
+        Input: accession number, optionally a shared session and the URL of the UniProt service.
+        Return: the response, the .fasta text is cached if it was successful.
         """
-        uniprot_root = "https://www.uniprot.org/uniprot/"
-        full_url = uniprot_root + accession_number + ".fasta"
-        r = requests.get(full_url)
+        full_url = root + accession_number + ".fasta"
+        r = (session or requests).get(full_url)
         if r.ok:
             logger.info(f"Successful Uniprot request for {accession_number}.")
-            path_root = UniProt_data_path
-            file_name = f"/{accession_number}.fasta"
-            path = path_root + file_name
-            with open(path, "w") as file:
-                file.write(r.text)
-            logger.info(f"{self.protein_id}.fasta file is stored in data folder.")
+            self.cache.set("uniprot", accession_number, r.text)
+            logger.info(f"{accession_number}.fasta is stored in the cache.")
         else:
-            logger.warning("something went wrong", r.status_code)
+            logger.warning(f"something went wrong for {accession_number}: {r.status_code}")
+        return r
 
     def extract_uniprot(self, accession_number: str) -> dict:
         """
         extract uniprot info from fasta file in cache.
         Input: accession number.
         """
-        fasta_file = UniProt_data_path + f"/{accession_number}.fasta"
-        f = open(fasta_file)
-        content = f.readlines()
-        info_string = content[0].lstrip(">sp|")
-        first_acc_num = info_string.split("|")[0]
-        other_info = info_string.split("|")[1]
-        rest_info = other_info.split(" ")
-        name_of_protein = rest_info[0]
-        for elem in rest_info:
-            if elem.startswith("OX="):
-                NCBI_ID = elem[3:]
-            elif elem.startswith("GN="):
-                primary_gene_symbol = elem[3:]
-            elif elem.startswith("OS="):
-                OS_index = rest_info.index(elem)
-                full_name_protein = " ".join(rest_info[1:OS_index])
-        protein_info = {"first accession number": first_acc_num,
-                        "primary gene symbol": primary_gene_symbol,
-                        "NCBI taxonomy ID": NCBI_ID,
-                        "Name of protein": name_of_protein,
-                        "full name of protein": full_name_protein}
+        protein_info = self.cache.parsed("uniprot", accession_number, parse_uniprot)
+        if protein_info is None:
+            raise KeyError(f"{accession_number} is not cached, request it first.")
         logger.info(f"UniProt info of {accession_number} is generated.")
-        return protein_info
+        return copy.deepcopy(protein_info)
 
 #
 #
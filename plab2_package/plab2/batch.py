@@ -0,0 +1,207 @@
+"""Batches of shortest path queries against one imported graph, answered on a process pool and streamed to a file."""
+
+import os
+import csv
+import json
+import logging
+import networkx as nx
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from .csr import CSRGraph
+from .paths import shortest_paths
+
+logger = logging.getLogger('batch')
+
+# pairs sent to a worker at once.
+BATCH_CHUNK_SIZE = 500
+# chunks per worker which are in flight, the pairs file is read window by window.
+WINDOW_CHUNKS = 4
+OUTPUT_FORMATS = ('tsv', 'jsonl')
+
+
+class PathResult(NamedTuple):
+    """Answer of one pair: the distance and the shortest paths, or why there is none."""
+    source: str
+    target: str
+    distance: Optional[int]
+    paths: List[List[str]]
+    error: Optional[str]
+    image: Optional[str]
+
+
+def read_pairs(pairs_path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Stream the source/target pairs of a tab (or comma) separated file, skipping empty lines, '#' comments and a
+    'source target' header.
+    Parameters
+    ----------
+    pairs_path: str
+               file with a source and a target per line.
+    Returns
+    -------
+    Iterator[Tuple[str, str]]
+    """
+    with open(pairs_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            fields = line.split('\t') if '\t' in line else line.split(',')
+            if len(fields) < 2:
+                raise ValueError(f"Line '{line}' of {pairs_path} is not a source/target pair.")
+            source, target = fields[0].strip(), fields[1].strip()
+            if (source.lower(), target.lower()) == ('source', 'target'):
+                continue
+            yield source, target
+
+
+def render_paths(graph, paths: List[List[str]], output: str) -> None:
+    """Draw the subgraph of the nodes of the paths, with the path edges highlighted."""
+    from .render import render_network
+    nodes = {node for path in paths for node in path}
+    subgraph = graph.subgraph(nodes)
+    if isinstance(subgraph, CSRGraph):
+        subgraph = subgraph.to_networkx()
+    path_edges = {frozenset(edge) for path in paths for edge in zip(path, path[1:])}
+    render_network(subgraph, nx.spring_layout(subgraph, seed=0), output, node_color='blue', alpha=1.0,
+                   edge_color=['purple' if frozenset(edge) in path_edges else 'black' for edge in subgraph.edges()])
+
+
+# graph, distance oracle, path limit and render folder of a worker process.
+_worker = None
+
+
+def _init_worker(graph, oracle, max_paths: Optional[int], render_dir: Optional[str]) -> None:
+    global _worker
+    _worker = (graph, oracle, max_paths, render_dir)
+
+
+def _answer(task: Tuple[int, str, str]) -> PathResult:
+    number, source, target = task
+    graph, oracle, max_paths, render_dir = _worker
+    try:
+        if oracle is not None and not oracle.connected(source, target):
+            raise nx.NetworkXNoPath(f"Target {target} cannot be reached from source {source}.")
+        paths = [list(path) for path in shortest_paths(graph, source, target, max_paths)]
+        image = None
+        if render_dir is not None:
+            image = os.path.join(render_dir, f"{number}.png")
+            render_paths(graph, paths, image)
+    except nx.NodeNotFound:
+        return PathResult(source, target, None, [], 'node not found', None)
+    except nx.NetworkXNoPath:
+        return PathResult(source, target, None, [], 'no path', None)
+    except Exception as error:
+        # a failing pair is reported in its row, the batch goes on.
+        logger.exception(f"Pair {number} ({source}, {target}) failed.")
+        return PathResult(source, target, None, [], f"{type(error).__name__}: {error}", None)
+    return PathResult(source, target, len(paths[0]) - 1, paths, None, image)
+
+
+def windows(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while True:
+        window = list(islice(iterator, size))
+        if not window:
+            return
+        yield window
+
+
+def answer_pairs(graph,
+                 pairs: Iterable[Tuple[str, str]],
+                 workers: int = 1,
+                 max_paths: Optional[int] = 1,
+                 oracle=None,
+                 render_dir: Optional[str] = None,
+                 chunk_size: int = BATCH_CHUNK_SIZE) -> Iterator[PathResult]:
+    """
+    Answer the pairs in their order. The graph (and oracle) is sent once to each worker process, and the pairs are
+    read in windows of a few chunks per worker, so the results stream out while the pairs file is read.
+    Parameters
+    ----------
+    graph: nx.Graph or CSRGraph
+          the network.
+    pairs: Iterable[Tuple[str, str]]
+          source and target labels, see read_pairs.
+    workers: int
+          number of processes.
+    max_paths: Optional[int]
+          shortest paths per pair (at least 1), all of them if None.
+    oracle: Optional[DistanceOracle]
+          if given, unreachable pairs are answered without a search.
+    render_dir: Optional[str]
+          if given, the paths of every pair are drawn to <render_dir>/<pair number>.png.
+    chunk_size: int
+          pairs sent to a worker at once.
+    Returns
+    -------
+    Iterator[PathResult]
+    """
+    if max_paths is not None and max_paths < 1:
+        raise ValueError(f"max_paths must be at least 1 or None, not {max_paths}.")
+    if render_dir is not None:
+        os.makedirs(render_dir, exist_ok=True)
+    tasks = ((number, source, target) for number, (source, target) in enumerate(pairs, 1))
+    initargs = (graph, oracle, max_paths, render_dir)
+    if workers <= 1:
+        _init_worker(*initargs)
+        yield from map(_answer, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        for window in windows(tasks, chunk_size * workers * WINDOW_CHUNKS):
+            yield from executor.map(_answer, window, chunksize=chunk_size)
+
+
+def write_tsv(results: Iterable[PathResult], handle: IO) -> int:
+    """One row per path (or per pair without a path): source, target, distance, path, error and image."""
+    writer = csv.writer(handle, delimiter='\t', lineterminator='\n')
+    writer.writerow(['source', 'target', 'distance', 'path', 'error', 'image'])
+    count = 0
+    for result in results:
+        for path in result.paths or [[]]:
+            writer.writerow([result.source, result.target, '' if result.distance is None else result.distance,
+                             ' -> '.join(path), result.error or '', result.image or ''])
+        count += 1
+    return count
+
+
+def write_jsonl(results: Iterable[PathResult], handle: IO) -> int:
+    """One JSON object per pair."""
+    count = 0
+    for result in results:
+        handle.write(json.dumps(result._asdict()) + '\n')
+        count += 1
+    return count
+
+
+def detect_format(output_path: str, output_format: Optional[str] = None) -> str:
+    """The given format, or the one of the file extension: .jsonl or .json for JSON lines, TSV otherwise."""
+    if output_format is None:
+        output_format = 'jsonl' if output_path.endswith(('.jsonl', '.json')) else 'tsv'
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Output format is wrong, must use {' or '.join(OUTPUT_FORMATS)}.")
+    return output_format
+
+
+def write_results(results: Iterable[PathResult], output_path: str, output_format: Optional[str] = None) -> int:
+    """
+    Stream the results to a TSV or JSONL file.
+    Parameters
+    ----------
+    results: Iterable[PathResult]
+            the answers, see answer_pairs.
+    output_path: str
+            the output file.
+    output_format: Optional[str]
+            'tsv' or 'jsonl', from the file extension if not given.
+    Returns
+    -------
+    int
+    The number of answered pairs.
+    """
+    writer = write_jsonl if detect_format(output_path, output_format) == 'jsonl' else write_tsv
+    with open(output_path, 'w', newline='') as handle:
+        count = writer(results, handle)
+    logger.info(f"{count} path queries are written to {output_path}.")
+    return count
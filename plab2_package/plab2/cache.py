@@ -0,0 +1,486 @@
+"""Pluggable key-value cache of the downloaded HGNC .json and UniProt .fasta texts."""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+from .startup import HGNC_data_path, UniProt_data_path, cache_path
+
+logger = logging.getLogger('cache')
+
+# namespace of the cache: (folder, suffix) of the file based layout.
+NAMESPACES = {"hgnc": (HGNC_data_path, ".json"), "uniprot": (UniProt_data_path, ".fasta")}
+# maximal number of keys in one SQL statement.
+CACHE_CHUNK_SIZE = 500
+# maximal number of parsed records kept in memory per cache.
+PARSED_CACHE_SIZE = 4096
+
+
+def chunked(keys: List[str], chunk_size: int = CACHE_CHUNK_SIZE) -> Iterator[List[str]]:
+    for start in range(0, len(keys), chunk_size):
+        yield keys[start:start + chunk_size]
+
+
+class RecordMemo():
+    """
+    Thread-safe, size-bounded LRU of parsed records, keyed by (namespace, key, parse function).
+    Every record is kept with the version of the cache entry it was parsed from. The records of an entry are indexed
+    by namespace and key, so discarding them does not scan the other records.
+    """
+    def __init__(self, maxsize: int = PARSED_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.records = OrderedDict()
+        # namespace -> key -> the memo keys of its records, one per parse function.
+        self.index: Dict[str, Dict[str, Set[Hashable]]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[Hashable, object]]:
+        """The version and the record of the key, or None."""
+        with self.lock:
+            found = self.records.get(key)
+            if found is not None:
+                self.records.move_to_end(key)
+            return found
+
+    def put(self, key: Hashable, version: Hashable, record: object) -> None:
+        with self.lock:
+            if key not in self.records:
+                self.index.setdefault(key[0], {}).setdefault(key[1], set()).add(key)
+            self.records[key] = (version, record)
+            self.records.move_to_end(key)
+            while len(self.records) > self.maxsize:
+                self._unindex(self.records.popitem(last=False)[0])
+
+    def _unindex(self, key: Hashable) -> None:
+        keys = self.index[key[0]]
+        keys[key[1]].discard(key)
+        if not keys[key[1]]:
+            del keys[key[1]]
+
+    def discard(self, namespace: str, keys: Iterable[str]) -> None:
+        """Remove the records of the keys, parsed by any function."""
+        with self.lock:
+            indexed = self.index.get(namespace, {})
+            for key in keys:
+                for found in indexed.pop(key, ()):
+                    del self.records[found]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.records.clear()
+            self.index.clear()
+
+
+class Cache(ABC):
+    """
+    Interface of the cache backends, values are the texts of the downloaded files.
+    get_many and set_many are the batched primitives, the single key methods are built on them. A backend implements
+    the abstract methods, otherwise it cannot be instantiated.
+    parsed_many keeps the parsed records in memory, so repeated lookups neither read nor parse the text again.
+    """
+    memo_size = PARSED_CACHE_SIZE
+
+    @abstractmethod
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, str]:
+        """The cached values of the keys, keys which are not cached (or expired) are left out."""
+
+    @abstractmethod
+    def set_many(self, namespace: str, items: Dict[str, str]) -> None:
+        """Store the values of the keys."""
+
+    @abstractmethod
+    def keys(self, namespace: str) -> List[str]:
+        """All cached keys of the namespace."""
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        """Remove the entry of the key, if it is cached."""
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        return self.get_many(namespace, [key]).get(key)
+
+    def set(self, namespace: str, key: str, value: str) -> None:
+        self.set_many(namespace, {key: value})
+
+    def contains(self, namespace: str, key: str) -> bool:
+        return key in self.get_many(namespace, [key])
+
+    def missing(self, namespace: str, keys: Iterable[str]) -> List[str]:
+        """The keys which are not cached, in order and without duplicates."""
+        keys = list(dict.fromkeys(keys))
+        cached = self.get_many(namespace, keys)
+        return [key for key in keys if key not in cached]
+
+    def version(self, namespace: str, key: str) -> Hashable:
+        """Changes whenever the entry may have changed, parsed records of an older version are parsed again."""
+        return None
+
+    def get_versioned(self, namespace: str, keys: Iterable[str]) -> Dict[str, Tuple[Hashable, str]]:
+        """The version and the cached value of the keys, see get_many."""
+        return {key: (self.version(namespace, key), value) for key, value in self.get_many(namespace, keys).items()}
+
+    def unchanged(self, namespace: str, versions: Dict[str, Hashable]) -> Set[str]:
+        """The keys whose entry still has the given version, their parsed records are still valid."""
+        return {key for key, version in versions.items() if self.version(namespace, key) == version}
+
+    @property
+    def memo(self) -> RecordMemo:
+        if "_memo" not in self.__dict__:
+            self._memo = RecordMemo(self.memo_size)
+        return self._memo
+
+    def parsed_many(self, namespace: str, keys: Iterable[str], parse: Callable[[str], object]) -> Dict[str, object]:
+        """
+        The parsed records of the cached keys, only the texts which were not parsed before are read.
+        Parameters
+        ----------
+        namespace: str
+                  'hgnc' or 'uniprot'
+        keys: Iterable[str]
+                  symbols or accession numbers
+        parse: Callable[[str], object]
+                  function parsing a cached text into its record.
+        Returns
+        -------
+        Dict[str, object]
+        The records of the keys, keys which are not cached are left out.
+        """
+        keys = list(dict.fromkeys(keys))
+        memoized = {}
+        for key in keys:
+            found = self.memo.get((namespace, key, parse))
+            if found is not None:
+                memoized[key] = found
+        valid = self.unchanged(namespace, {key: version for key, (version, record) in memoized.items()})
+        records = {key: memoized[key][1] for key in keys if key in valid}
+        for key, (version, text) in self.get_versioned(namespace, [key for key in keys if key not in valid]).items():
+            records[key] = parse(text)
+            self.memo.put((namespace, key, parse), version, records[key])
+        return records
+
+    def parsed(self, namespace: str, key: str, parse: Callable[[str], object]) -> Optional[object]:
+        return self.parsed_many(namespace, [key], parse).get(key)
+
+
+class DirectoryCache(Cache):
+    """The original layout: one file per entity, e.g. ~/.wangd0/data/HGNC/<symbol>.json."""
+    def __init__(self, namespaces: Dict[str, tuple] = NAMESPACES):
+        self.namespaces = namespaces
+
+    def path(self, namespace: str, key: str) -> str:
+        folder, suffix = self.namespaces[namespace]
+        return os.path.join(folder, f"{key}{suffix}")
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, str]:
+        values = {}
+        for key in keys:
+            path = self.path(namespace, key)
+            if os.path.isfile(path):
+                with open(path) as infile:
+                    values[key] = infile.read()
+        return values
+
+    def set_many(self, namespace: str, items: Dict[str, str]) -> None:
+        for key, value in items.items():
+            with open(self.path(namespace, key), "w") as outfile:
+                outfile.write(value)
+        # a file written twice within the resolution of its modification time keeps its version.
+        self.memo.discard(namespace, items)
+
+    def version(self, namespace: str, key: str) -> Hashable:
+        try:
+            return os.stat(self.path(namespace, key)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def keys(self, namespace: str) -> List[str]:
+        folder, suffix = self.namespaces[namespace]
+        if not os.path.isdir(folder):
+            return []
+        return sorted(name[:-len(suffix)] for name in os.listdir(folder) if name.endswith(suffix))
+
+    def delete(self, namespace: str, key: str) -> None:
+        path = self.path(namespace, key)
+        if os.path.isfile(path):
+            os.remove(path)
+
+
+class SQLiteCache(Cache):
+    """
+    All entries in one SQLite file.
+    Entries older than `ttl` seconds are expired, and if the values grow beyond `max_size` bytes the least recently
+    used entries are evicted. The connection is shared by the threads of the fetcher.
+    The version of an entry is the time it was written. Parsed records are dropped when this cache changes their
+    entries and expire with them, records of all entries are dropped after another connection wrote to the file.
+    """
+    def __init__(self,
+                 path: str = cache_path,
+                 ttl: Optional[float] = None,
+                 max_size: Optional[int] = None,
+                 clock: Callable[[], float] = time.time):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS entries (namespace TEXT, key TEXT, value TEXT, size INTEGER, "
+                          "created REAL, accessed REAL, PRIMARY KEY (namespace, key))")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.conn.commit()
+        self.size = self._total_size()
+        # changes with every commit of another connection, not with the commits of this one.
+        self.data_version = self._data_version()
+
+    def _data_version(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _total_size(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def version(self, namespace: str, key: str) -> Hashable:
+        with self.lock:
+            row = self.conn.execute("SELECT created FROM entries WHERE namespace = ? AND key = ?",
+                                    (namespace, key)).fetchone()
+        return None if row is None or self._expired(row[0], self.clock()) else row[0]
+
+    def unchanged(self, namespace: str, versions: Dict[str, Hashable]) -> Set[str]:
+        # one query per batch, and only to notice the writes of other connections.
+        with self.lock:
+            data_version = self._data_version()
+            if data_version != self.data_version:
+                self.data_version = data_version
+                self.memo.clear()
+                return set()
+        now = self.clock()
+        return {key for key, created in versions.items() if not self._expired(created, now)}
+
+    def get_versioned(self, namespace: str, keys: Iterable[str]) -> Dict[str, Tuple[Hashable, str]]:
+        values, expired = {}, []
+        now = self.clock()
+        with self.lock:
+            for chunk in chunked(list(dict.fromkeys(keys))):
+                rows = self.conn.execute(f"SELECT key, value, created FROM entries WHERE namespace = ? AND key IN "
+                                         f"({','.join('?' * len(chunk))})", [namespace, *chunk])
+                for key, value, created in rows:
+                    if self._expired(created, now):
+                        expired.append((namespace, key))
+                    else:
+                        values[key] = (created, value)
+            self.conn.executemany("UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                                  [(now, namespace, key) for key in values])
+            if expired:
+                self.conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", expired)
+                self.size = self._total_size()
+            self.conn.commit()
+        return values
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, str]:
+        return {key: value for key, (created, value) in self.get_versioned(namespace, keys).items()}
+
+    def set_many(self, namespace: str, items: Dict[str, str]) -> None:
+        now = self.clock()
+        with self.lock:
+            for chunk in chunked(list(items)):
+                replaced = self.conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ? AND "
+                                             f"key IN ({','.join('?' * len(chunk))})", [namespace, *chunk])
+                self.size -= replaced.fetchone()[0]
+                rows = [(namespace, key, items[key], len(items[key].encode()), now, now) for key in chunk]
+                self.conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self.size += sum(row[3] for row in rows)
+            if self.max_size is not None and self.size > self.max_size:
+                self._evict()
+            self.conn.commit()
+        # an entry written twice at the same time keeps its version.
+        self.memo.discard(namespace, items)
+
+    def _evict(self) -> None:
+        # other processes may have written to the file, so the running total is recounted first.
+        self.size = self._total_size()
+        evicted = []
+        rows = self.conn.execute("SELECT namespace, key, size FROM entries ORDER BY accessed")
+        for namespace, key, size in rows:
+            if self.size <= self.max_size:
+                break
+            evicted.append((namespace, key))
+            self.size -= size
+        self.conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", evicted)
+        for namespace in {namespace for namespace, key in evicted}:
+            self.memo.discard(namespace, [key for evicted_namespace, key in evicted if evicted_namespace == namespace])
+        logger.info(f"{len(evicted)} least recently used cache entries are evicted.")
+
+    def expire(self) -> int:
+        """Remove all expired entries, returns how many were removed."""
+        if self.ttl is None:
+            return 0
+        with self.lock:
+            removed = self.conn.execute("DELETE FROM entries WHERE created < ?", (self.clock() - self.ttl,)).rowcount
+            self.size = self._total_size()
+            self.conn.commit()
+        return removed
+
+    def keys(self, namespace: str) -> List[str]:
+        with self.lock:
+            return [key for key, in self.conn.execute("SELECT key FROM entries WHERE namespace = ? ORDER BY key",
+                                                      (namespace,))]
+
+    def count(self) -> int:
+        """The number of entries of all namespaces."""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+            self.size = self._total_size()
+            self.conn.commit()
+        self.memo.discard(namespace, [key])
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class BufferedCache(Cache):
+    """
+    Collects the values written to it and stores them in the target cache with one set_many per `chunk_size`
+    values, e.g. the texts downloaded by the threads of the fetcher. flush, or leaving the with block, stores the
+    rest. Reads see the collected values.
+    """
+    def __init__(self, target: Cache, chunk_size: int = CACHE_CHUNK_SIZE):
+        self.target = target
+        self.chunk_size = chunk_size
+        self.pending: Dict[str, Dict[str, str]] = {}
+        self.lock = threading.Lock()
+
+    def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(keys)
+        with self.lock:
+            pending = self.pending.get(namespace, {})
+            values = {key: pending[key] for key in keys if key in pending}
+        values.update(self.target.get_many(namespace, [key for key in keys if key not in values]))
+        return values
+
+    def set_many(self, namespace: str, items: Dict[str, str]) -> None:
+        with self.lock:
+            pending = self.pending.setdefault(namespace, {})
+            pending.update(items)
+            if len(pending) >= self.chunk_size:
+                self.target.set_many(namespace, self.pending.pop(namespace))
+
+    def flush(self) -> None:
+        with self.lock:
+            for namespace, items in self.pending.items():
+                self.target.set_many(namespace, items)
+            self.pending.clear()
+
+    def keys(self, namespace: str) -> List[str]:
+        self.flush()
+        return self.target.keys(namespace)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self.lock:
+            self.pending.get(namespace, {}).pop(key, None)
+        self.target.delete(namespace, key)
+
+    def __enter__(self) -> 'BufferedCache':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.flush()
+
+
+def migrate_cache(source: Cache, target: Cache, remove: bool = False, chunk_size: int = CACHE_CHUNK_SIZE) -> int:
+    """
+    Copy all entries of one cache into another, e.g. the directory layout into the SQLite file.
+    Parameters
+    ----------
+    source: Cache
+           cache to copy from.
+    target: Cache
+           cache to copy to.
+    remove: bool
+           if True, the entries are deleted from the source after they are copied.
+    chunk_size: int
+           number of entries copied in one batch.
+    Returns
+    -------
+    int
+    The number of copied entries.
+    """
+    copied = 0
+    for namespace in NAMESPACES:
+        for chunk in chunked(source.keys(namespace), chunk_size):
+            values = source.get_many(namespace, chunk)
+            target.set_many(namespace, values)
+            if remove:
+                for key in values:
+                    source.delete(namespace, key)
+            copied += len(values)
+    logger.info(f"{copied} cache entries are migrated.")
+    return copied
+
+
+def migrate_legacy(target: SQLiteCache, source: Optional[Cache] = None) -> int:
+    """
+    Copy the files of the directory layout of earlier versions into a cache file which has no entries yet, so an
+    upgrade keeps the downloaded files. The files are kept in place.
+    Parameters
+    ----------
+    target: SQLiteCache
+           the cache file.
+    source: Optional[Cache]
+           the directory layout, ~/.wangd0/data/HGNC and UniProt if not given.
+    Returns
+    -------
+    int
+    The number of copied entries.
+    """
+    if target.count():
+        return 0
+    return migrate_cache(source or DirectoryCache(), target)
+
+
+_cache = None
+
+
+def cache_from_settings() -> Cache:
+    """
+    The cache configured by the environment:
+    PLAB2_CACHE ('sqlite' (default) or 'directory'), PLAB2_CACHE_PATH, PLAB2_CACHE_TTL (seconds) and
+    PLAB2_CACHE_MAX_SIZE (bytes). A new cache file gets the files of the directory layout, see migrate_legacy.
+    """
+    backend = os.environ.get("PLAB2_CACHE", "sqlite")
+    if backend == "directory":
+        return DirectoryCache()
+    if backend == "sqlite":
+        ttl = os.environ.get("PLAB2_CACHE_TTL")
+        max_size = os.environ.get("PLAB2_CACHE_MAX_SIZE")
+        cache = SQLiteCache(os.environ.get("PLAB2_CACHE_PATH", cache_path),
+                            ttl=float(ttl) if ttl else None,
+                            max_size=int(max_size) if max_size else None)
+        migrate_legacy(cache)
+        return cache
+    raise ValueError(f"Unknown cache backend {backend}, use 'sqlite' or 'directory'.")
+
+
+def get_cache() -> Cache:
+    """The cache shared by the package, created from the settings on first use."""
+    global _cache
+    if _cache is None:
+        _cache = cache_from_settings()
+    return _cache
+
+
+def set_cache(cache: Optional[Cache]) -> None:
+    """Replace the shared cache, None resets it to the settings."""
+    global _cache
+    _cache = cache
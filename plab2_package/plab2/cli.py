@@ -1,8 +1,11 @@
 import click
 import os
+from typing import Optional
 from .network import Network, Analyzer, Statistics
 import logging
-from .startup import HGNC_data_path, UniProt_data_path, CONN_STRING
+from .startup import HGNC_index_path
+from .fetch import Fetcher, FETCH_WORKERS, FETCH_RATE
+from .hgnc_index import HGNCResolver
 
 
 logger = logging.getLogger('cli')
@@ -21,7 +24,19 @@ def main():
 @click.option('-e', '--edges', default=None, help="A TSV file containing defined edges of a network.")
 @click.option('-v', '--verbose', default=False, is_flag=True, help="When used, will print the paths to STDOUT.")
 @click.option('--add_edge', default=False, is_flag=True)
-def path(output_path:str, source:str, target:str, ppi: str, nodes:str, edges:str, verbose:bool, add_edge:bool):
+@click.option('--backend', default='networkx', type=click.Choice(['networkx', 'csr']),
+              help="Graph backend, 'csr' uses the compact array-backed graph.")
+@click.option('--oracle', default=False, is_flag=True,
+              help="When used, consult the landmark distance oracle persisted next to the edge list (built if missing).")
+@click.option('--landmarks', default=None, type=int, help="number of landmarks of a new distance oracle.")
+@click.option('--max_paths', '--max-paths', default=None, type=click.IntRange(min=1),
+              help="When used, stop after this many shortest paths instead of enumerating all of them.")
+@click.option('--layout', default = 'auto', type = click.Choice(['auto', 'spring', 'multilevel']),
+              help = "node layout, 'multilevel' scales to large networks, 'auto' uses it above 2000 nodes.")
+@click.option('--format', 'output_format', default = None, type = click.Choice(['png', 'pdf', 'svg', 'jpg', 'html']),
+              help = "Output format, 'html' is an interactive page, from the extension of the output if not given.")
+def path(output_path:str, source:str, target:str, ppi: str, nodes:str, edges:str, verbose:bool, add_edge:bool, backend:str,
+         oracle: bool, landmarks: Optional[int], max_paths: Optional[int], layout: str, output_format: Optional[str]):
     if ppi:
         logger.info("PPI file is accepted as input.")
         node_path, edge_path = "node_list.tsv", "edge_list.tsv"
@@ -32,43 +47,90 @@ def path(output_path:str, source:str, target:str, ppi: str, nodes:str, edges:str
     a = Analyzer({}, None, ppi, None, None)
     a.write_node_list(node_path)
     a.write_edge_list(edge_path)
-    a.import_graph(edge_path)
+    a.import_graph(edge_path, backend)
+    if oracle:
+        a.use_oracle(edge_path, landmarks)
     try:
-        a.shortest_path(source, target, print_option = verbose)
+        a.shortest_path(source, target, print_option = verbose, max_paths = max_paths)
     except:
         logger.warning(f'No path found between {source} and {target}!')
-    a.generate_graph_network(output_path, add_edge)
+    if oracle:
+        logger.info(f"Distance oracle query latency [us]: {a.oracle.latency()}")
+    a.generate_graph_network(output_path, add_edge, layout, output_format)
     logger.info(f"New graph image was generated and its location is {output_path}")
 
 
+@main.command('paths-batch')
+@click.argument('pairs')
+@click.argument('output_path')
+@click.option('-p', '--ppi', default=None, help="A CSV file containing PPIs.")
+@click.option('-n', '--nodes', default=None, help="A TSV file containing defined nodes of a network.")
+@click.option('-e', '--edges', default=None, help="A TSV file containing defined edges of a network.")
+@click.option('--backend', default='networkx', type=click.Choice(['networkx', 'csr']),
+              help="Graph backend, 'csr' uses the compact array-backed graph.")
+@click.option('--workers', default=1, show_default=True, help="processes answering the pairs.")
+@click.option('--max_paths', '--max-paths', default=1, show_default=True, type=click.IntRange(min=1),
+              help="shortest paths per pair.")
+@click.option('--format', 'output_format', default=None, type=click.Choice(['tsv', 'jsonl']),
+              help="Output format, from the extension of OUTPUT_PATH if not given.")
+@click.option('--oracle', default=False, is_flag=True,
+              help="When used, consult the landmark distance oracle persisted next to the edge list (built if missing).")
+@click.option('--render_dir', default=None, help="When used, draw the paths of every pair to RENDER_DIR/<pair number>.png.")
+def paths_batch(pairs: str, output_path: str, ppi: str, nodes: str, edges: str, backend: str, workers: int,
+                max_paths: int, output_format: Optional[str], oracle: bool, render_dir: Optional[str]):
+    """Answer the source/target pairs of the PAIRS file against one imported graph and stream them to OUTPUT_PATH."""
+    from .batch import answer_pairs, read_pairs, write_results
+    if ppi:
+        logger.info("PPI file is accepted as input.")
+        a = Analyzer({}, None, ppi, None, None)
+        edges = "edge_list.tsv"
+        a.write_node_list("node_list.tsv")
+        a.write_edge_list(edges)
+    else:
+        logger.info("node/edge lists are accepted as input.")
+        a = Analyzer({}, None, None, nodes, edges)
+    a.import_graph(edges, backend)
+    if oracle:
+        a.use_oracle(edges)
+    results = answer_pairs(a.graph, read_pairs(pairs), workers, max_paths, a.oracle, render_dir)
+    count = write_results(results, output_path, output_format)
+    click.echo(f"{count} pairs are answered, the paths are written to {output_path}.")
+
+
 @main.command()
 @click.argument('ppi')
 @click.argument('node_file')
 @click.argument('edge_file')
 @click.option('--enrich', default = False, is_flag = True, help = 'when used, will enrich the network')
 @click.option('--query_from_sql', default = False, is_flag = True, help = 'when used, will query from database.')
-def compile(ppi: str, node_file: str, edge_file: str, enrich: bool, query_from_sql: bool) -> None:
+@click.option('--low_memory', default = False, is_flag = True, help = 'when used, will stream the PPI file instead of loading it.')
+@click.option('--workers', default = FETCH_WORKERS, show_default = True, help = 'number of concurrent HGNC/UniProt requests.')
+@click.option('--rate', default = FETCH_RATE, show_default = True, help = 'maximal HGNC/UniProt requests per second.')
+@click.option('--hgnc_index', default = HGNC_index_path, help = 'offline HGNC index made by ingest-hgnc, used if it exists.')
+def compile(ppi: str, node_file: str, edge_file: str, enrich: bool, query_from_sql: bool, low_memory: bool,
+            workers: int, rate: float, hgnc_index: str) -> None:
     # No enrichment of network
     if not enrich:
-        n = Network({}, None, ppi, None, None)
+        n = Network({}, None, ppi, None, None, low_memory=low_memory)
         n.write_node_list(node_file)
         n.write_edge_list(edge_file)
         logger.info(f"New node/edge files were made and their locations are {node_file} and {edge_file}")
 
     # enrich network with gene and protein info.
     elif enrich:
-        a = Analyzer({}, None, ppi, None, None)
+        a = Analyzer({}, None, ppi, None, None, low_memory=low_memory)
         if query_from_sql:
             #import models
             a.enrich_generate_node_dict(query_from_sql)
             a.enrich_write_node_list(node_file)
-            a.enrich_write_edge_list(a.relations(node_file), edge_file, query_from_sql)
+            a.enrich_write_edge_list(None, edge_file, query_from_sql)
         else:
             a.write_node_list("nodes_reduced.tsv")
-            a.enrich_gather_identifier("nodes_reduced.tsv")
+            a.enrich_gather_identifier("nodes_reduced.tsv", Fetcher(max_workers=workers, rate=rate),
+                                       HGNCResolver.from_path(hgnc_index))
             a.enrich_generate_node_dict()
             a.enrich_write_node_list(node_file)
-            a.enrich_write_edge_list(a.relations(node_file), edge_file)
+            a.enrich_write_edge_list(None, edge_file)
             os.remove("nodes_reduced.tsv")
         logger.info(f"New node/edge files were made and their locations are {node_file} and {edge_file}")
 
@@ -86,35 +148,64 @@ def compile(ppi: str, node_file: str, edge_file: str, enrich: bool, query_from_s
               help = 'when used, will show identifier instead of HGNC symbol.')
 @click.option('--query_from_sql', default = False, is_flag = True,
               help = 'when used, will query from database.')
-def create(ppi: str, nodes: str, edges: str, output: str, verbose: bool, enrich: bool, show_identifier: bool, query_from_sql: bool):
+@click.option('--low_memory', default = False, is_flag = True,
+              help = 'when used, will stream the PPI file instead of loading it.')
+@click.option('--workers', default = FETCH_WORKERS, show_default = True,
+              help = 'number of concurrent HGNC/UniProt requests.')
+@click.option('--rate', default = FETCH_RATE, show_default = True,
+              help = 'maximal HGNC/UniProt requests per second.')
+@click.option('--hgnc_index', default = HGNC_index_path,
+              help = 'offline HGNC index made by ingest-hgnc, used if it exists.')
+@click.option('--layout', default = 'auto', type = click.Choice(['auto', 'spring', 'multilevel']),
+              help = "node layout, 'multilevel' scales to large networks, 'auto' uses it above 2000 nodes.")
+@click.option('--format', 'output_format', default = None, type = click.Choice(['png', 'pdf', 'svg', 'jpg', 'html']),
+              help = "Output format, 'html' is an interactive page, from the extension of the output if not given.")
+def create(ppi: str, nodes: str, edges: str, output: str, verbose: bool, enrich: bool, show_identifier: bool, query_from_sql: bool, low_memory: bool,
+           workers: int, rate: float, hgnc_index: str, layout: str, output_format: Optional[str]):
     if not enrich:
-        n = Network({}, None, ppi, None, None)
-        relations = n.read_ppis(ppi)
+        n = Network({}, None, ppi, None, None, low_memory=low_memory)
         n.write_node_list(nodes)
         n.write_edge_list(edges)
         logger.info("New node/edge files were made and their locations are '/Exercise_5/node_list.tsv' and '/Exercise_5/edge_list.tsv'.")
         n.import_graph(edges)
-        n.generate_graph_network(output, verbose)
+        n.generate_graph_network(output, verbose, layout, output_format)
         logger.info("Graph image was generated and its location is '/Exercise_5/graph.png'.")
     elif enrich:
-        a = Analyzer({}, None, ppi, None, None)
+        a = Analyzer({}, None, ppi, None, None, low_memory=low_memory)
         if query_from_sql:
 
             a.enrich_generate_node_dict(query_from_sql)
             a.enrich_write_node_list(nodes)
-            a.enrich_write_edge_list(a.relations(nodes), edges, query_from_sql)
+            a.enrich_write_edge_list(None, edges, query_from_sql)
         else:
-            relations = a.read_ppis(ppi)
             a.write_node_list("nodes_reduced.tsv")
-            a.enrich_gather_identifier("nodes_reduced.tsv")
+            a.enrich_gather_identifier("nodes_reduced.tsv", Fetcher(max_workers=workers, rate=rate),
+                                       HGNCResolver.from_path(hgnc_index))
             a.enrich_generate_node_dict()
             a.enrich_write_node_list(nodes)
-            a.enrich_write_edge_list(a.relations(nodes), edges)
+            a.enrich_write_edge_list(None, edges)
             os.remove("nodes_reduced.tsv")
         a.enrich_import_graph(edges, identifier=show_identifier)
-        a.enrich_network(output, verbose, identifier=show_identifier)
+        a.enrich_network(output, verbose, identifier=show_identifier, layout=layout, output_format=output_format)
         logger.info("network which is shown in graph.")
 
+def echo_connectivity(connectivity) -> None:
+    if not connectivity.exact:
+        click.echo(f"Average node connectivity is estimated from {connectivity.computed_edges} of "
+                   f"{connectivity.edges} edges: {connectivity.average:.6g} "
+                   f"(95% confidence interval {connectivity.lower:.6g} - {connectivity.upper:.6g}).")
+
+
+def echo_metrics(s: Statistics, metrics: Optional[str], metric_budget: Optional[float]) -> None:
+    if not metrics:
+        return
+    from tabulate import tabulate
+    from .topology import METRICS, metrics_table
+    names = METRICS if metrics == 'all' else [metric.strip() for metric in metrics.split(',')]
+    table = metrics_table(s.topology_metrics(names, metric_budget))
+    click.echo(tabulate(table, headers = 'keys', tablefmt = 'psql', showindex = False))
+
+
 @main.command()
 @click.option('-p', '--ppi', default = None)
 @click.option('-n','--node_file', default = None)
@@ -122,9 +213,22 @@ def create(ppi: str, nodes: str, edges: str, output: str, verbose: bool, enrich:
 @click.option('--export', default = None, help='when used, EXPORT the statistics to file.')
 @click.option('--print_table', default = False, is_flag = True, help='When used, print table in STDOUT.')
 @click.option('--enrich', default = False, is_flag = True, help='when used, enrich the DNA and RNA info in network.')
-
-
-def stats(ppi: str, node_file: str, edge_file: str, enrich: bool, print_table: bool, export: str):
+@click.option('--backend', default = 'networkx', type = click.Choice(['networkx', 'csr']),
+              help="Graph backend, 'csr' uses the compact array-backed graph.")
+@click.option('--connectivity', default = 'exact', type = click.Choice(['exact', 'sampled']),
+              help = "'sampled' estimates the average node connectivity from a sample of the edges.")
+@click.option('--workers', default = 1, show_default = True, help = 'processes computing the statistics of the connected components.')
+@click.option('--sample_size', default = None, type = int, help = 'maximal number of sampled edges.')
+@click.option('--time_budget', default = None, type = float, help = 'seconds for the sampled node connectivity.')
+@click.option('--metrics', default = None,
+              help = "comma separated topology metrics (degree, clustering, components, diameter, assortativity, "
+                     "kcore) or 'all'.")
+@click.option('--metric_budget', default = None, type = float,
+              help = 'seconds per topology metric, after which it is approximated.')
+def stats(ppi: str, node_file: str, edge_file: str, enrich: bool, print_table: bool, export: str, backend: str,
+          connectivity: str, workers: int, sample_size: Optional[int], time_budget: Optional[float],
+          metrics: Optional[str], metric_budget: Optional[float]):
+    options = dict(connectivity = connectivity, workers = workers, sample_size = sample_size, time_budget = time_budget)
     if ppi and not node_file and not edge_file:
         logger.info("PPI file is accepted as input.")
         s = Statistics({}, None, ppi, None, None)
@@ -132,20 +236,22 @@ def stats(ppi: str, node_file: str, edge_file: str, enrich: bool, print_table: b
             s.enrich_generate_node_dict()
             s.enrich_write_node_list('node_list_enrich.tsv')
             logger.info("New enriched node file was made and the location is 'node_list_enrich.tsv.")
-            s.enrich_edge_from_ppi(s.relations('node_list_enrich.tsv'), 'edge_list_enrich.tsv')
+            s.enrich_edge_from_ppi(None, 'edge_list_enrich.tsv')
             logger.info("New enriched edge file was made and the location is 'edge_list_enrich.tsv.")
-            s.enrich_import_graph('edge_list_enrich.tsv')
-            data = s.summary_statistics(enrich)
+            s.enrich_import_graph('edge_list_enrich.tsv', backend)
+            data = s.summary_statistics(enrich, **options)
         elif not enrich:
             s.write_node_list('node_list.tsv')
             logger.info("New node file was made and the location is 'node_list.tsv.")
             s.write_edge_list('edge_list.tsv')
             logger.info("New edge file was made and the location is 'edge_list.tsv.")
-            s.import_graph('edge_list.tsv')
-            data = s.summary_statistics(enrich)
+            s.import_graph('edge_list.tsv', backend)
+            data = s.summary_statistics(enrich, **options)
         if print_table:
             from tabulate import tabulate
             click.echo(tabulate(data, headers = 'keys', tablefmt = 'psql'))
+        echo_connectivity(s.connectivity)
+        echo_metrics(s, metrics, metric_budget)
         if export:
             s.export_stats(data, export)
 
@@ -158,33 +264,34 @@ def stats(ppi: str, node_file: str, edge_file: str, enrich: bool, print_table: b
             s.enrich_write_node_list('node_list_enrich.tsv')
             logger.info("New enriched node file was made and the location is '/Exercise_5/node_list_enrich.tsv.")
             s.open_original_edge(edge_file)
-            s.enrich_edge_from_old_edge(s.relations('node_list_enrich.tsv'),'edge_list_enrich.tsv')
+            s.enrich_edge_from_old_edge(None, 'edge_list_enrich.tsv')
             logger.info("New enriched edge file was made and the location is '/Exercise_5/edge_list_enrich.tsv.")
-            s.enrich_import_graph('edge_list_enrich.tsv')
-            data = s.summary_statistics(enrich)
+            s.enrich_import_graph('edge_list_enrich.tsv', backend)
+            data = s.summary_statistics(enrich, **options)
         elif not enrich:
-            s.import_graph(edge_file)
-            data = s.summary_statistics(enrich)
+            s.import_graph(edge_file, backend)
+            data = s.summary_statistics(enrich, **options)
         if print_table:
             from tabulate import tabulate
             click.echo(tabulate(data, headers='keys', tablefmt='psql'))
+        echo_connectivity(s.connectivity)
+        echo_metrics(s, metrics, metric_budget)
         if export:
             s.export_stats(data, export)
 
 @main.command()
 @click.argument("hgnc_symbol")
 @click.option('--query_from_sql', default = False, is_flag = True, help='When used, query data from SQL.')
-def info(hgnc_symbol: str, query_from_sql: bool = False):
+@click.option('--hgnc_index', default = HGNC_index_path, help='offline HGNC index made by ingest-hgnc, used if it exists.')
+def info(hgnc_symbol: str, query_from_sql: bool = False, hgnc_index: str = HGNC_index_path):
     HGNC_root = "http://rest.genenames.org/fetch/symbol/"
     UNIPROT_root = "https://www.uniprot.org/uniprot/"
+    resolver = HGNCResolver.from_path(hgnc_index)
     if query_from_sql:
-        from sqlalchemy.orm import declarative_base, Session
-        from sqlalchemy import MetaData, Table, Column, Integer, String, create_engine, ForeignKey
-        from .models import query_data
-        engine = create_engine(CONN_STRING, echo=True)
-        session = Session(bind=engine)
-        if query_data(hgnc_symbol):
-            list_info = list(query_data(hgnc_symbol).values())
+        from .models import query_many
+        found = query_many([hgnc_symbol])
+        if hgnc_symbol in found:
+            list_info = [found[hgnc_symbol]]
             click.echo(f"HGNC ID is {list_info[0][0]}")
             click.echo(f"Ensembl Gene ID is {list_info[0][1]}")
             click.echo(f"Gene Symbol is {hgnc_symbol}")
@@ -198,26 +305,68 @@ def info(hgnc_symbol: str, query_from_sql: bool = False):
             UNIPROT_id = f"{list_info[0][2]}"
             query_uniprot = UNIPROT_root+UNIPROT_id
             click.echo(f"The Uniprot link to this HGNC symbol: {query_uniprot}")
+    elif resolver is not None:
+        # offline: identifiers from the HGNC index, UniProt info only if it is cached.
+        from .Utils import Profiler
+        identifiers = resolver.resolve(hgnc_symbol)
+        if identifiers is None:
+            click.echo(f"{hgnc_symbol} is not in the HGNC index {hgnc_index}.")
+            return
+        click.echo(f"The identifiers of {hgnc_symbol} are:")
+        click.echo(identifiers)
+        click.echo(f"The HGNC link to this HGNC symbol: {HGNC_root+hgnc_symbol}")
+        for acc_num in identifiers["UniProt ID"]:
+            if acc_num is not None:
+                p = Profiler(hgnc_symbol)
+                if p.cache.contains("uniprot", acc_num):
+                    click.echo(p.extract_uniprot(acc_num))
+                click.echo(f"The UniProt link to this HGNC symbol: {UNIPROT_root+acc_num}")
     else:
         from .Utils import Profiler
         p = Profiler(hgnc_symbol)
-        file_path = os.path.join(HGNC_data_path, f'{hgnc_symbol}.json')
-        if not os.path.isfile(file_path):
+        if not p.cache.contains("hgnc", hgnc_symbol):
             p.request()
+        identifiers = p.extract()
         click.echo(f"The identifiers of {hgnc_symbol} are:")
-        click.echo(p.extract())
+        click.echo(identifiers)
         click.echo(f"The HGNC link to this HGNC symbol: {HGNC_root+hgnc_symbol}")
-        for acc_num in p.extract()["UniProt ID"]:
+        for acc_num in identifiers["UniProt ID"]:
             if acc_num is not None:
-                uniprot_path_root = UniProt_data_path
-                uniprot_file_name = f"/{acc_num}.fasta"
-                uniprot_path = uniprot_path_root + uniprot_file_name
-                if not os.path.isfile(uniprot_path):
+                if not p.cache.contains("uniprot", acc_num):
                     p.request_uniprot(acc_num)
                 click.echo(p.extract_uniprot(acc_num))
                 click.echo(f"The UniProt link to this HGNC symbol: {UNIPROT_root+acc_num}")
 
 
+@main.command('ingest-hgnc')
+@click.argument('dump')
+@click.option('--hgnc_index', default = HGNC_index_path, show_default = True, help = 'path of the index file.')
+def ingest_hgnc(dump: str, hgnc_index: str):
+    """Build the offline HGNC index from an HGNC complete-set dump (.json or .txt/.tsv)."""
+    from .hgnc_index import ingest_hgnc as ingest
+    number_of_genes = ingest(dump, hgnc_index)
+    click.echo(f"{number_of_genes} genes are indexed in {hgnc_index}.")
+
+
+@main.command('migrate-cache')
+@click.option('--remove', default = False, is_flag = True, help = 'when used, delete the files after they are copied.')
+def migrate_cache(remove: bool):
+    """Copy the HGNC/UniProt files of the data folder into the configured cache."""
+    from .cache import DirectoryCache, get_cache, migrate_cache as migrate
+    cache = get_cache()
+    if isinstance(cache, DirectoryCache):
+        raise click.UsageError("The configured cache is the data folder itself, set PLAB2_CACHE=sqlite.")
+    click.echo(f"{migrate(DirectoryCache(), cache, remove)} files are migrated into the cache.")
+
+
+@main.command('migrate-db')
+def migrate_db():
+    """Create the missing tables and indexes of the configured database (PLAB2_DATABASE_URL)."""
+    from .models import migrate_database
+    created = migrate_database()
+    click.echo(f"Created indexes: {', '.join(created)}." if created else "The database is up to date.")
+
+
 @main.command()
 @click.option('-p', '--ppi', default = None)
 @click.option('--enrich', default = False, is_flag = True, help="when used, will enrich HGNC, ensembl, and UniProt info.")
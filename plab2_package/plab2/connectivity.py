@@ -0,0 +1,213 @@
+"""Average node connectivity of a network: the local node connectivity summed over its edges, per node pair."""
+
+import time
+import logging
+import numpy as np
+import networkx as nx
+from concurrent.futures import ProcessPoolExecutor
+from networkx.algorithms.connectivity import build_auxiliary_node_connectivity, local_node_connectivity
+from networkx.algorithms.flow import build_residual_network
+from typing import List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger('connectivity')
+
+# number of edges sent to a worker at once.
+CONNECTIVITY_CHUNK_SIZE = 256
+
+
+class Connectivity(NamedTuple):
+    """Average node connectivity, with the bounds of its confidence interval if only a sample of edges was used."""
+    average: float
+    lower: float
+    upper: float
+    computed_edges: int
+    edges: int
+
+    @property
+    def exact(self) -> bool:
+        return self.computed_edges == self.edges
+
+
+def number_of_node_pairs(number_of_nodes: int) -> int:
+    """n(n-1)/2 unordered node pairs."""
+    return number_of_nodes * (number_of_nodes - 1) // 2
+
+
+class EdgeConnectivity():
+    """
+    Local node connectivity of the edges of one graph.
+    The auxiliary digraph and the residual network of the max flow are built once and reused for every edge,
+    and an edge with an end of degree 1 has connectivity 1 without any flow computation.
+    """
+    def __init__(self, graph: nx.Graph):
+        self.graph = graph
+        self.auxiliary = None
+        self.residual = None
+
+    def trivial(self, u, v) -> bool:
+        return u != v and min(self.graph.degree(u), self.graph.degree(v)) == 1
+
+    def __call__(self, u, v) -> int:
+        if self.trivial(u, v):
+            return 1
+        if self.auxiliary is None:
+            self.auxiliary = build_auxiliary_node_connectivity(self.graph)
+            self.residual = build_residual_network(self.auxiliary, 'capacity')
+        return local_node_connectivity(self.graph, u, v, auxiliary=self.auxiliary, residual=self.residual)
+
+    def total(self, edges: List[Tuple]) -> int:
+        return sum(self(u, v) for u, v in edges)
+
+
+def connected_components(graph: nx.Graph) -> List[List]:
+    """Node lists of the connected components, largest first."""
+    return sorted((list(component) for component in nx.connected_components(graph)), key=len, reverse=True)
+
+
+# graph, components and the counter of the last component of a worker process.
+_worker = None
+
+
+def _init_worker(graph: nx.Graph, components: List[List]) -> None:
+    global _worker
+    _worker = (graph, components, {})
+
+
+def _component_total(task: Tuple[int, List[Tuple]]) -> Tuple[int, int]:
+    index, edges = task
+    graph, components, counters = _worker
+    if index not in counters:
+        # chunks of a component come one after another, so only its auxiliary network is kept.
+        counters.clear()
+        counters[index] = EdgeConnectivity(graph.subgraph(components[index]).copy())
+    return index, counters[index].total(edges)
+
+
+def chunks(edges: List[Tuple], chunk_size: int = CONNECTIVITY_CHUNK_SIZE) -> List[List[Tuple]]:
+    return [edges[start:start + chunk_size] for start in range(0, len(edges), chunk_size)]
+
+
+def component_connectivity(graph: nx.Graph, components: List[List], workers: int = 1) -> List[int]:
+    """
+    Sum of the local node connectivity of the edges of each connected component.
+    A path between the ends of an edge never leaves its component, so the flows are computed on the (much smaller)
+    auxiliary network of the component. With several workers, the components are split into chunks of edges which
+    are scheduled on a process pool, largest component first.
+    Parameters
+    ----------
+    graph: nx.Graph
+          the network.
+    components: List[List]
+          node lists of the connected components, see connected_components.
+    workers: int
+          number of processes, the graph is sent once to each of them.
+    Returns
+    -------
+    List[int]
+    The sum of the local node connectivity of each component.
+    """
+    whole = EdgeConnectivity(graph)
+    totals = [0] * len(components)
+    tasks = []
+    for index, nodes in enumerate(components):
+        expensive = []
+        for u, v in graph.subgraph(nodes).edges():
+            # edges with a leaf need no flow computation, they are not worth sending to a worker.
+            if whole.trivial(u, v):
+                totals[index] += 1
+            else:
+                expensive.append((u, v))
+        if expensive:
+            tasks.append((index, expensive))
+    if workers <= 1:
+        for index, expensive in tasks:
+            totals[index] += EdgeConnectivity(graph.subgraph(components[index]).copy()).total(expensive)
+        return totals
+    # a few chunks per worker balance the load, the flows of some edges are much larger than of others.
+    number_of_expensive = sum(len(expensive) for index, expensive in tasks)
+    chunk_size = max(1, min(CONNECTIVITY_CHUNK_SIZE, -(-number_of_expensive // (4 * workers))))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(graph, components)) as executor:
+        for index, total in executor.map(_component_total, [(index, chunk) for index, expensive in tasks
+                                                            for chunk in chunks(expensive, chunk_size)]):
+            totals[index] += total
+    return totals
+
+
+def connectivity_sum(graph: nx.Graph, workers: int = 1) -> int:
+    """Sum of the local node connectivity of all edges of the graph."""
+    return sum(component_connectivity(graph, connected_components(graph), workers))
+
+
+def average_node_connectivity(graph: nx.Graph,
+                              mode: str = 'exact',
+                              workers: int = 1,
+                              sample_size: Optional[int] = None,
+                              time_budget: Optional[float] = None,
+                              confidence: float = 0.95,
+                              seed: Optional[int] = None) -> Connectivity:
+    """
+    Average node connectivity as reported by Statistics.summary_statistics: the local node connectivity summed over
+    the edges, divided by the number of node pairs.
+    Parameters
+    ----------
+    graph: nx.Graph
+          the network.
+    mode: str
+          'exact' computes every edge, 'sampled' a random sample of the edges which need a flow computation, 'none'
+          computes nothing and returns NaN.
+    workers: int
+          number of processes of the exact mode.
+    sample_size: Optional[int]
+          maximal number of sampled edges.
+    time_budget: Optional[float]
+          seconds after which the sampled mode stops.
+    confidence: float
+          level of the confidence interval of the sampled mode.
+    seed: Optional[int]
+          seed of the sample.
+    Returns
+    -------
+    Connectivity
+    The average, the bounds of its (normal approximation) confidence interval and how many edges were computed.
+    """
+    edges = list(graph.edges())
+    pairs = number_of_node_pairs(graph.number_of_nodes())
+    if mode == 'none':
+        return Connectivity(float('nan'), float('nan'), float('nan'), 0, len(edges))
+    if mode == 'exact':
+        average = float(connectivity_sum(graph, workers) / pairs) if pairs else 0.0
+        return Connectivity(average, average, average, len(edges), len(edges))
+    if mode != 'sampled':
+        raise ValueError(f"Unknown connectivity mode {mode}, use 'exact', 'sampled' or 'none'.")
+
+    counter = EdgeConnectivity(graph)
+    expensive = [(u, v) for u, v in edges if not counter.trivial(u, v)]
+    trivial = len(edges) - len(expensive)
+    order = np.random.default_rng(seed).permutation(len(expensive))
+    if sample_size is not None:
+        order = order[:sample_size]
+    started = time.perf_counter()
+    values = []
+    for position in order:
+        if time_budget is not None and values and time.perf_counter() - started > time_budget:
+            break
+        values.append(counter(*expensive[position]))
+    computed, population = len(values), len(expensive)
+
+    if not pairs:
+        return Connectivity(0.0, 0.0, 0.0, trivial + computed, len(edges))
+    if computed == population:
+        average = (trivial + sum(values)) / pairs
+        return Connectivity(average, average, average, len(edges), len(edges))
+    from scipy.stats import norm
+    mean = float(np.mean(values)) if values else 0.0
+    # standard error of the sample mean, with the finite population correction.
+    error = float(np.std(values, ddof=1)) / np.sqrt(computed) if computed > 1 else float('inf')
+    if population > 1:
+        error *= np.sqrt((population - computed) / (population - 1))
+    half_width = norm.ppf((1 + confidence) / 2) * error * population / pairs
+    average = (trivial + mean * population) / pairs
+    # every edge has a connectivity of at least 1.
+    lower = max(average - half_width, (trivial + sum(values) + population - computed) / pairs)
+    logger.info(f"Average node connectivity is estimated from {computed} of {population} edges.")
+    return Connectivity(average, lower, average + half_width, trivial + computed, len(edges))
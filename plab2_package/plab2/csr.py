@@ -0,0 +1,233 @@
+"""Compact array-backed graph used as an alternative backend to networkx."""
+
+import logging
+import networkx as nx
+import numpy as np
+import pandas as pd
+from typing import Iterable, Iterator, List, Optional
+
+logger = logging.getLogger('csr')
+
+
+class CSRGraph():
+    """
+    Undirected graph stored as NumPy CSR adjacency.
+    Nodes are numbered 0..n-1 in the order of their identifiers in the node list, labels keep the HGNC symbol
+    (or any other label of the import mapping), and interaction types are interned as small integer codes.
+    The public methods take and return labels like nx.Graph does, so the graph can replace it in the network classes.
+    """
+    def __init__(self,
+                 labels: np.ndarray,
+                 indptr: np.ndarray,
+                 indices: np.ndarray,
+                 edge_types: np.ndarray,
+                 interaction_types: np.ndarray,
+                 loops: Optional[np.ndarray] = None):
+        self.labels = labels
+        self.indptr = indptr
+        self.indices = indices
+        self.edge_types = edge_types
+        self.interaction_types = interaction_types
+        # self-loops are stored once in the adjacency, networkx counts them twice in the degree.
+        self.loops = loops if loops is not None else np.zeros(len(labels), dtype=bool)
+        self.index = pd.Index(labels)
+
+    @classmethod
+    def from_edge_list(cls, data: pd.DataFrame, mapping: dict) -> 'CSRGraph':
+        """
+        Build the graph from an edge list of integer identifiers.
+        Parameters
+        ----------
+        data: pd.DataFrame
+             Edge list with node_1, node_2 and metadata columns.
+        mapping: dict
+             Identifier as key and label as value, identifiers which are not in the mapping keep their value as label.
+        Returns
+        -------
+        CSRGraph
+        """
+        from .network import relabel
+        number_of_rows = len(data)
+        node_ids, inverse = np.unique(np.concatenate([data['node_1'].to_numpy(), data['node_2'].to_numpy()]),
+                                      return_inverse=True)
+        labels = relabel(pd.Series(node_ids), mapping)
+        codes, interaction_types = pd.factorize(data['metadata'])
+        return cls.from_arrays(labels, inverse[:number_of_rows], inverse[number_of_rows:], codes,
+                               np.asarray(interaction_types, dtype=object))
+
+    @classmethod
+    def from_arrays(cls, labels: np.ndarray, sources: np.ndarray, targets: np.ndarray,
+                    codes: np.ndarray, interaction_types: np.ndarray) -> 'CSRGraph':
+        """
+        Build the graph from node positions of the edges. Repeated edges keep the last interaction type, like nx.Graph.
+        Parameters
+        ----------
+        labels: np.ndarray
+               Label of every node position.
+        sources, targets: np.ndarray
+               Node positions of both ends of every edge.
+        codes: np.ndarray
+               Position of the interaction type of every edge in interaction_types.
+        interaction_types: np.ndarray
+               The distinct interaction types.
+        Returns
+        -------
+        CSRGraph
+        """
+        number_of_nodes = len(labels)
+        index_type = np.int32 if number_of_nodes < 2 ** 31 else np.int64
+        code_type = np.int8 if len(interaction_types) < 2 ** 7 else np.int32
+        low = np.minimum(sources, targets).astype(np.int64)
+        high = np.maximum(sources, targets).astype(np.int64)
+        # keep the last occurrence of every undirected edge.
+        keys = (low * number_of_nodes + high)[::-1]
+        _, first = np.unique(keys, return_index=True)
+        last = len(keys) - 1 - first
+        low, high, codes = low[last], high[last], np.asarray(codes)[last]
+
+        not_loop = low != high
+        rows = np.concatenate([low, high[not_loop]])
+        cols = np.concatenate([high, low[not_loop]])
+        types = np.concatenate([codes, codes[not_loop]])
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(number_of_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=number_of_nodes), out=indptr[1:])
+        loops = np.zeros(number_of_nodes, dtype=bool)
+        loops[low[~not_loop]] = True
+        return cls(labels, indptr, cols[order].astype(index_type), types[order].astype(code_type),
+                   interaction_types, loops)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, node) -> bool:
+        return node in self.index
+
+    def __iter__(self) -> Iterator:
+        return iter(self.labels)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the adjacency arrays."""
+        return self.indptr.nbytes + self.indices.nbytes + self.edge_types.nbytes + self.loops.nbytes
+
+    def position(self, node) -> int:
+        """Node position of a label, raises nx.NodeNotFound like networkx."""
+        try:
+            return self.index.get_loc(node)
+        except KeyError:
+            raise nx.NodeNotFound(f"Node {node} is not in the graph.")
+
+    def number_of_nodes(self) -> int:
+        return len(self.labels)
+
+    def number_of_edges(self) -> int:
+        return int((len(self.indices) + self.loops.sum()) // 2)
+
+    def nodes(self) -> List:
+        return list(self.labels)
+
+    def edges(self, data: bool = False) -> Iterator[tuple]:
+        """
+        Iterate over the edges as label pairs, with data the interaction type is given as 'metadata' like in nx.Graph.
+        """
+        rows = np.repeat(np.arange(len(self.labels)), np.diff(self.indptr))
+        upper = rows <= self.indices
+        sources, targets = self.labels[rows[upper]], self.labels[self.indices[upper]]
+        if not data:
+            return zip(sources, targets)
+        metadata = self.interaction_types[self.edge_types[upper]]
+        return ((source, target, {'metadata': meta}) for source, target, meta in zip(sources, targets, metadata))
+
+    def neighbor_positions(self, position: int) -> np.ndarray:
+        return self.indices[self.indptr[position]:self.indptr[position + 1]]
+
+    def neighbors(self, node) -> List:
+        return list(self.labels[self.neighbor_positions(self.position(node))])
+
+    def degree(self, node=None):
+        """
+        Degree of one node, or the degree array of all nodes (in node position order) if node is None.
+        """
+        degrees = np.diff(self.indptr) + self.loops
+        if node is None:
+            return degrees
+        return int(degrees[self.position(node)])
+
+    def _expand(self, frontier: np.ndarray) -> np.ndarray:
+        """Concatenated neighbor positions of all nodes of the frontier."""
+        starts, ends = self.indptr[frontier], self.indptr[frontier + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        return self.indices[offsets]
+
+    def bfs(self, source, target=None) -> np.ndarray:
+        """
+        Level-synchronous breadth first search.
+        Parameters
+        ----------
+        source:
+               Label of the start node.
+        target:
+               If given, the search stops after the level of the target.
+        Returns
+        -------
+        np.ndarray
+        Distance of every node position from the source, -1 for unreachable (or not searched) nodes.
+        """
+        distance = np.full(len(self.labels), -1, dtype=np.int32)
+        start = self.position(source)
+        stop = self.position(target) if target is not None else None
+        distance[start] = 0
+        frontier = np.array([start])
+        level = 0
+        while len(frontier) and (stop is None or distance[stop] < 0):
+            level += 1
+            reached = self._expand(frontier)
+            frontier = np.unique(reached[distance[reached] < 0])
+            distance[frontier] = level
+        return distance
+
+    def all_shortest_paths(self, source, target) -> Iterator[List]:
+        """
+        Generate all shortest paths between two nodes, walking back from the target along decreasing BFS distance.
+        Raises nx.NetworkXNoPath if the nodes are not connected.
+        """
+        distance = self.bfs(source, target)
+        end = self.position(target)
+        if distance[end] < 0:
+            raise nx.NetworkXNoPath(f"Target {target} cannot be reached from source {source}.")
+        stack = [[end]]
+        while stack:
+            path = stack.pop()
+            last = path[-1]
+            if distance[last] == 0:
+                yield list(self.labels[path[::-1]])
+                continue
+            neighbors = self.neighbor_positions(last)
+            for previous in neighbors[distance[neighbors] == distance[last] - 1]:
+                stack.append(path + [previous])
+
+    def subgraph(self, nodes: Iterable) -> 'CSRGraph':
+        """
+        Induced subgraph of the given labels, unknown labels are ignored.
+        """
+        positions = self.index.get_indexer(list(nodes))
+        keep = np.zeros(len(self.labels), dtype=bool)
+        keep[positions[positions >= 0]] = True
+        new_position = np.cumsum(keep) - 1
+
+        rows = np.repeat(np.arange(len(self.labels)), np.diff(self.indptr))
+        entries = keep[rows] & keep[self.indices]
+        rows, cols = new_position[rows[entries]], new_position[self.indices[entries]]
+        indptr = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(indptr) - 1), out=indptr[1:])
+        return CSRGraph(self.labels[keep], indptr, cols.astype(self.indices.dtype), self.edge_types[entries],
+                        self.interaction_types, self.loops[keep])
+
+    def to_networkx(self) -> nx.Graph:
+        """Convert to nx.Graph for the algorithms the array backend does not offer."""
+        graph = nx.Graph()
+        graph.add_nodes_from(self.labels)
+        graph.add_edges_from(self.edges(data=True))
+        return graph
@@ -0,0 +1,175 @@
+"""Concurrent download of HGNC and UniProt files with a pooled session, rate limiting and retries."""
+
+import time
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Iterable, Optional
+from .Utils import Profiler, HGNC_ROOT, UNIPROT_ROOT
+from .cache import BufferedCache, Cache, get_cache
+
+logger = logging.getLogger('fetch')
+
+# HGNC asks for at most 10 requests per second.
+FETCH_WORKERS = 8
+FETCH_RATE = 10.0
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 0.5
+# status codes which are worth another try.
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket():
+    """
+    Thread-safe token bucket: tokens are refilled at `rate` per second up to `capacity`, every request takes one.
+    A request which finds the bucket empty reserves its token and sleeps until it is refilled.
+    """
+    def __init__(self,
+                 rate: float,
+                 capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError("Rate of the token bucket must be positive.")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.last = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, waiting if needed.
+        Returns
+        -------
+        float
+        The time waited in seconds.
+        """
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+def pooled_session(pool_size: int = FETCH_WORKERS) -> requests.Session:
+    """A requests session keeping up to pool_size connections per host alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class Fetcher():
+    """
+    Download HGNC .json and UniProt .fasta texts into the cache on a thread pool sharing one pooled session.
+    The downloaded texts are stored in batches, one set_many per CACHE_CHUNK_SIZE texts.
+    All requests go through one token bucket, failed requests (connection errors, RETRY_STATUS) are retried
+    with exponential backoff, or after the Retry-After time the server asks for.
+    """
+    def __init__(self,
+                 max_workers: int = FETCH_WORKERS,
+                 rate: float = FETCH_RATE,
+                 retries: int = FETCH_RETRIES,
+                 backoff: float = FETCH_BACKOFF,
+                 hgnc_root: str = HGNC_ROOT,
+                 uniprot_root: str = UNIPROT_ROOT,
+                 session: Optional[requests.Session] = None,
+                 sleep: Callable[[float], None] = time.sleep,
+                 cache: Optional[Cache] = None):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.hgnc_root = hgnc_root
+        self.uniprot_root = uniprot_root
+        self.session = session or pooled_session(max_workers)
+        self.sleep = sleep
+        self.cache = cache if cache is not None else get_cache()
+        self.bucket = TokenBucket(rate, sleep=sleep)
+
+    def _retry_wait(self, response: Optional[requests.Response], attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+        if retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2 ** attempt
+
+    def call(self, request: Callable[[], requests.Response], name: str) -> bool:
+        """
+        Run one request with rate limiting and retries.
+        Parameters
+        ----------
+        request: Callable[[], requests.Response]
+                Function doing the request.
+        name: str
+                Name of the requested entity for logging.
+        Returns
+        -------
+        bool
+        True if the request was successful.
+        """
+        response = None
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                response = request()
+            except requests.RequestException as error:
+                logger.warning(f"Request for {name} failed: {error}")
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUS:
+                    return response.ok
+            if attempt < self.retries:
+                self.sleep(self._retry_wait(response, attempt))
+        logger.error(f"Request for {name} failed after {self.retries + 1} attempts.")
+        return False
+
+    def map(self, request: Callable[[str], requests.Response], names: Iterable[str]) -> Dict[str, bool]:
+        """Run the request for all names on the thread pool, returns if each of them was successful."""
+        from tqdm import tqdm
+        names = list(dict.fromkeys(names))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda name: self.call(lambda: request(name), name), names)
+            return dict(zip(names, tqdm(results, total=len(names))))
+
+    def fetch_hgnc(self, symbols: Iterable[str]) -> Dict[str, bool]:
+        """
+        Download the HGNC .json texts of all symbols which are not in the cache yet.
+        Parameters
+        ----------
+        symbols: Iterable[str]
+                HGNC symbols
+        Returns
+        -------
+        Dict[str, bool]
+        For every requested symbol, if the request was successful.
+        """
+        missing = self.cache.missing("hgnc", symbols)
+        with BufferedCache(self.cache) as cache:
+            return self.map(lambda symbol: Profiler(symbol, cache=cache).request(self.session, self.hgnc_root),
+                            missing)
+
+    def fetch_uniprot(self, accession_numbers: Iterable[str]) -> Dict[str, bool]:
+        """
+        Download the UniProt .fasta texts of all accession numbers which are not in the cache yet.
+        Parameters
+        ----------
+        accession_numbers: Iterable[str]
+                UniProt accession numbers
+        Returns
+        -------
+        Dict[str, bool]
+        For every requested accession number, if the request was successful.
+        """
+        missing = self.cache.missing("uniprot", accession_numbers)
+        with BufferedCache(self.cache) as cache:
+            return self.map(lambda acc_num: Profiler(acc_num, cache=cache).request_uniprot(
+                acc_num, self.session, self.uniprot_root), missing)
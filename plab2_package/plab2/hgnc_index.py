@@ -0,0 +1,195 @@
+"""Offline HGNC identifier lookups from a locally provided HGNC complete-set dump."""
+
+import os
+import csv
+import json
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+from .startup import HGNC_index_path
+
+logger = logging.getLogger('hgnc_index')
+
+# lookups by approved symbol win over previous symbols, which win over alias symbols.
+NAME_PRIORITY = (('symbol', 0), ('prev_symbol', 1), ('alias_symbol', 2))
+
+
+def _values(value) -> list:
+    """Multi-valued field of the dump: a list in the JSON dump, '|' separated (and maybe quoted) in the TSV dump."""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(elem) for elem in value if elem]
+    return [elem for elem in str(value).strip('"').split('|') if elem]
+
+
+def read_hgnc_dump(dump_path: str) -> Iterator[dict]:
+    """
+    Read the genes of an HGNC complete-set dump, either the .json or the tab separated .txt/.tsv file.
+    Parameters
+    ----------
+    dump_path: str
+              Path of the dump.
+    Returns
+    -------
+    Iterator[dict]
+    One dictionary per gene with the columns of the dump.
+    """
+    if str(dump_path).endswith('.json'):
+        with open(dump_path) as infile:
+            yield from json.load(infile)["response"]["docs"]
+    else:
+        with open(dump_path, newline='') as infile:
+            yield from csv.DictReader(infile, delimiter='\t')
+
+
+def ingest_hgnc(dump_path: str, index_path: str = HGNC_index_path) -> int:
+    """
+    Parse the HGNC dump once into an indexed SQLite lookup file, which replaces an existing one atomically.
+    Parameters
+    ----------
+    dump_path: str
+              Path of the HGNC complete-set dump (.json or .txt/.tsv).
+    index_path: str
+              Path of the index file.
+    Returns
+    -------
+    int
+    The number of genes in the index.
+    """
+    tmp_path = str(index_path) + ".tmp"
+    if os.path.isfile(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE genes (hgnc_id TEXT PRIMARY KEY, symbol TEXT, ensembl_gene_id TEXT, uniprot_ids TEXT)")
+    conn.execute("CREATE TABLE names (name TEXT PRIMARY KEY, hgnc_id TEXT, priority INTEGER, name_upper TEXT)")
+    number_of_genes = 0
+    names = {column: [] for column, priority in NAME_PRIORITY}
+    for doc in read_hgnc_dump(dump_path):
+        if not doc.get("hgnc_id") or not doc.get("symbol"):
+            continue
+        conn.execute("INSERT OR REPLACE INTO genes VALUES (?, ?, ?, ?)",
+                     (doc["hgnc_id"], doc["symbol"], doc.get("ensembl_gene_id") or None,
+                      "|".join(_values(doc.get("uniprot_ids"))) or None))
+        for column, priority in NAME_PRIORITY:
+            names[column].extend((name, doc["hgnc_id"], priority, name.upper()) for name in _values(doc.get(column)))
+        number_of_genes += 1
+    # the first insert of a name wins, so names are inserted in the order of their priority.
+    for column, priority in NAME_PRIORITY:
+        conn.executemany("INSERT OR IGNORE INTO names VALUES (?, ?, ?, ?)", names[column])
+    # the case-insensitive lookup of a single symbol.
+    conn.execute("CREATE INDEX names_upper ON names (name_upper, priority)")
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, index_path)
+    logger.info(f"HGNC index with {number_of_genes} genes is stored in {index_path}.")
+    return number_of_genes
+
+
+class HGNCResolver():
+    """
+    Resolve HGNC symbols (approved, previous or alias) to their identifiers without network access.
+    A lookup is a query on the indexed names of the file, until load reads the whole index into dictionaries for
+    the lookups of many symbols.
+    """
+    def __init__(self, index_path: str = HGNC_index_path):
+        self.index_path = index_path
+        self._names = None
+        self._genes = None
+        self._conn = None
+        self._upper = "name_upper"
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_path(cls, index_path: str = HGNC_index_path) -> Optional['HGNCResolver']:
+        """The resolver of the index file, or None if it was not ingested."""
+        if index_path and os.path.isfile(index_path):
+            return cls(index_path)
+        return None
+
+    def load(self) -> None:
+        """Read the whole index into dictionaries, once, for the lookups of many symbols."""
+        if self._names is not None:
+            return
+        conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True)
+        self._genes = {row[0]: row[1:] for row in conn.execute("SELECT * FROM genes")}
+        self._names = {}
+        for name, hgnc_id in conn.execute("SELECT name, hgnc_id FROM names ORDER BY priority"):
+            self._names[name] = hgnc_id
+            # case-insensitive fallback, e.g. for alias symbols like p53.
+            self._names.setdefault(name.upper(), hgnc_id)
+        conn.close()
+        logger.info(f"HGNC index {self.index_path} is loaded with {len(self._genes)} genes.")
+
+    def _query(self, symbol: str) -> Optional[Tuple[str, tuple]]:
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False)
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(names)")}
+                # indexes ingested by older versions have no upper-case column, their fallback scans the names.
+                self._upper = "name_upper" if "name_upper" in columns else "upper(name)"
+            row = self._conn.execute("SELECT hgnc_id FROM names WHERE name = ?", (symbol,)).fetchone()
+            if row is None:
+                row = self._conn.execute(f"SELECT hgnc_id FROM names WHERE {self._upper} = ? "
+                                         f"ORDER BY priority LIMIT 1", (symbol.upper(),)).fetchone()
+            if row is None:
+                return None
+            gene = self._conn.execute("SELECT symbol, ensembl_gene_id, uniprot_ids FROM genes WHERE hgnc_id = ?",
+                                      row).fetchone()
+        return row[0], gene
+
+    def _lookup(self, symbol: str) -> Optional[Tuple[str, tuple]]:
+        if self._names is None:
+            return self._query(symbol)
+        hgnc_id = self._names.get(symbol) or self._names.get(symbol.upper())
+        if hgnc_id is None:
+            return None
+        return hgnc_id, self._genes[hgnc_id]
+
+    def __contains__(self, symbol: str) -> bool:
+        return self._lookup(symbol) is not None
+
+    def approved_symbol(self, symbol: str) -> Optional[str]:
+        """The approved symbol of a (previous or alias) symbol."""
+        found = self._lookup(symbol)
+        return found[1][0] if found else None
+
+    def resolve(self, symbol: str) -> Optional[Dict[str, object]]:
+        """
+        Identifiers of a symbol, in the same format as Profiler.extract.
+        Parameters
+        ----------
+        symbol: str
+               HGNC symbol
+        Returns
+        -------
+        Optional[Dict[str, object]]
+        HGNC ID, Ensembl Gene ID and the list of UniProt IDs, or None if the symbol is unknown.
+        """
+        found = self._lookup(symbol)
+        if found is None:
+            return None
+        hgnc_id, (approved_symbol, ensembl_gene_id, uniprot_ids) = found
+        return {"HGNC ID": hgnc_id,
+                "Ensembl Gene ID": ensembl_gene_id if ensembl_gene_id else [None],
+                "UniProt ID": uniprot_ids.split("|") if uniprot_ids else [None]}
+
+
+_resolvers: Dict[Tuple[str, int], HGNCResolver] = {}
+
+
+def cached_resolver(index_path: str = HGNC_index_path) -> Optional[HGNCResolver]:
+    """
+    The resolver of the index file shared by the calls of a long running process, e.g. the web app, or None if it was
+    not ingested. A new resolver is made when the file is ingested again.
+    """
+    try:
+        key = (str(index_path), os.stat(index_path).st_mtime_ns)
+    except OSError:
+        return None
+    resolver = _resolvers.get(key)
+    if resolver is None:
+        _resolvers.clear()
+        resolver = _resolvers.setdefault(key, HGNCResolver(index_path))
+    return resolver
@@ -0,0 +1,91 @@
+"""Interactive HTML pages of networks with pyvis, at precomputed positions and subsampled by degree."""
+
+import logging
+import numpy as np
+import networkx as nx
+from typing import Dict, Hashable, Iterable, Sequence, Union
+from .render import label_nodes
+
+logger = logging.getLogger('interactive')
+
+# at most this many nodes are shown: the highlighted nodes first, then the best connected.
+MAX_HTML_NODES = 2000
+# at most this many edges between the shown nodes, the ones of highlighted nodes first.
+MAX_HTML_EDGES = 20000
+# pixels per unit of the layout, for a network of 100 shown nodes.
+HTML_SCALE = 400
+
+
+def color_at(color: Union[str, Sequence[str]], position: int) -> str:
+    return color if isinstance(color, str) else color[position]
+
+
+def network_html(graph: nx.Graph,
+                 positions: Dict[Hashable, np.ndarray],
+                 node_color: Union[str, Sequence[str]] = 'red',
+                 edge_color: Union[str, Sequence[str]] = 'black',
+                 highlight: Iterable[Hashable] = (),
+                 max_nodes: int = MAX_HTML_NODES,
+                 max_edges: int = MAX_HTML_EDGES) -> str:
+    """
+    An HTML page with the network drawn by vis.js at the given positions, physics are off so the browser
+    does not lay it out again.
+    Parameters
+    ----------
+    graph: nx.Graph
+          the network.
+    positions: Dict[Hashable, np.ndarray]
+          position of every node, see layout.compute_layout.
+    node_color, edge_color: Union[str, Sequence[str]]
+          one color, or a color per node (in graph.nodes() order) and per edge (in graph.edges() order).
+    highlight: Iterable[Hashable]
+          nodes which are always shown and drawn larger, e.g. of a shortest path.
+    max_nodes: int
+          maximal number of shown nodes, the best connected ones are kept.
+    max_edges: int
+          maximal number of shown edges.
+    Returns
+    -------
+    str
+    The page, with the vis.js library inlined.
+    """
+    from pyvis.network import Network as PyvisNetwork
+    nodes = list(graph.nodes())
+    degrees = np.array([degree for _, degree in graph.degree(nodes)], dtype=np.int64)
+    highlight = set(highlight)
+    shown = label_nodes(nodes, degrees, highlight, max_nodes)
+    index = {node: position for position, node in enumerate(nodes)}
+
+    page = PyvisNetwork(height='900px', width='100%', cdn_resources='in_line')
+    page.toggle_physics(False)
+    page.options.edges.smooth.enabled = False
+    scale = HTML_SCALE * max(1.0, np.sqrt(len(shown) / 100))
+    for node in shown:
+        x, y = positions[node]
+        position, degree = index[node], int(degrees[index[node]])
+        page.add_node(str(node), label=str(node), title=f"{node} (degree {degree})",
+                      color=color_at(node_color, position), x=float(x) * scale, y=-float(y) * scale,
+                      size=(14 if node in highlight else 6) + 2 * np.log1p(degree), borderWidth=3 if node in highlight else 1)
+
+    shown_set = set(shown)
+    edges = [(position, u, v, data) for position, (u, v, data) in enumerate(graph.edges(data=True))
+             if u in shown_set and v in shown_set]
+    if len(edges) > max_edges:
+        edges.sort(key=lambda edge: (edge[1] not in highlight and edge[2] not in highlight,
+                                     -min(degrees[index[edge[1]]], degrees[index[edge[2]]])))
+        edges = edges[:max_edges]
+    for position, u, v, data in edges:
+        options = {'title': str(data['metadata'])} if 'metadata' in data else {}
+        page.add_edge(str(u), str(v), color=color_at(edge_color, position), **options)
+    logger.info(f"HTML page shows {len(shown)} of {len(nodes)} nodes and {len(edges)} edges.")
+    return page.generate_html()
+
+
+def write_network_html(graph: nx.Graph, positions: Dict[Hashable, np.ndarray], output, **style) -> None:
+    """Write the page of network_html to a file name or a text file object."""
+    page = network_html(graph, positions, **style)
+    if hasattr(output, 'write'):
+        output.write(page)
+    else:
+        with open(output, 'w', encoding='utf-8') as html:
+            html.write(page)
@@ -0,0 +1,167 @@
+"""Background jobs of the Flask app on a local worker pool, with progress, cancellation and cached results."""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger('jobs')
+
+# number of jobs running at once.
+JOB_WORKERS = 2
+# finished jobs kept for their results, the oldest are removed.
+FINISHED_JOBS = 256
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+
+
+class JobCancelled(Exception):
+    """Raised in a job which was cancelled, at its next progress report."""
+
+
+class Job():
+    """
+    A function running on the worker pool. The function gets the job as first argument and reports its progress
+    with job.report, which raises JobCancelled once the job is cancelled.
+    """
+    def __init__(self, name: str, key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = 'queued'
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.future = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def report(self, progress: float, message: Optional[str] = None) -> None:
+        """Set the progress (between 0 and 1) and what is done, raises JobCancelled if the job was cancelled."""
+        if self.cancelled:
+            raise JobCancelled(self.id)
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def to_dict(self) -> dict:
+        """The state of the job, without its result."""
+        elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        return {'id': self.id, 'name': self.name, 'status': self.status, 'progress': round(self.progress, 3),
+                'message': self.message, 'error': self.error, 'seconds': round(elapsed, 3)}
+
+
+class JobQueue():
+    """
+    Jobs run on a thread pool of the process, so they share the networks of the graph store. Jobs with a key are
+    only run once: submitting a key again returns its queued, running or done job, only failed and cancelled jobs
+    are run again.
+    """
+    def __init__(self, workers: int = JOB_WORKERS, max_finished: int = FINISHED_JOBS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='plab2-job')
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self.keys = {}
+        self.lock = threading.Lock()
+
+    def submit(self, name: str, function: Callable, *args, key: Optional[str] = None, **kwargs) -> Job:
+        """
+        Run function(job, *args, **kwargs) on the worker pool.
+        Parameters
+        ----------
+        name: str
+              kind of the job, e.g. 'stats'.
+        function: Callable
+              the work, its return value is the result of the job.
+        key: Optional[str]
+              identifies the result, e.g. the statistics of one network, which is then computed only once.
+        Returns
+        -------
+        Job
+        The new job, or the job of the key.
+        """
+        with self.lock:
+            known = self.jobs.get(self.keys.get(key)) if key is not None else None
+            if known is not None and known.status not in (FAILED, CANCELLED):
+                return known
+            job = Job(name, key)
+            self.jobs[job.id] = job
+            if key is not None:
+                self.keys[key] = job.id
+            self.clean()
+        job.future = self.executor.submit(self.run, job, function, args, kwargs)
+        return job
+
+    def run(self, job: Job, function: Callable, args: tuple, kwargs: dict) -> None:
+        if job.cancelled:
+            job.status, job.message = CANCELLED, 'cancelled'
+            return
+        job.status, job.started, job.message = RUNNING, time.time(), 'running'
+        try:
+            job.result = function(job, *args, **kwargs)
+            job.status, job.progress, job.message = DONE, 1.0, 'done'
+        except JobCancelled:
+            job.status, job.message = CANCELLED, 'cancelled'
+        except Exception as error:
+            logger.exception(f"Job {job.name} {job.id} failed.")
+            job.status, job.error, job.message = FAILED, f"{type(error).__name__}: {error}", 'failed'
+        finally:
+            job.finished = time.time()
+        logger.info(f"Job {job.name} {job.id} is {job.status} after {job.finished - job.started:.2f} s.")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job: a queued job does not start, a running job stops at its next progress report.
+        Returns False if the job is unknown or already finished.
+        """
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.status, job.message, job.finished = CANCELLED, 'cancelled', time.time()
+        return True
+
+    def clean(self) -> None:
+        """Remove the oldest finished jobs above max_finished."""
+        finished = [job for job in self.jobs.values() if not job.active]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job.id]
+            if job.key is not None and self.keys.get(job.key) == job.id:
+                del self.keys[job.key]
+
+    def shutdown(self, cancel: bool = True) -> None:
+        if cancel:
+            for job_id in list(self.jobs):
+                self.cancel(job_id)
+        self.executor.shutdown(wait=True)
+
+
+_job_queue = None
+
+
+def get_job_queue() -> JobQueue:
+    """The job queue shared by the process, with PLAB2_JOB_WORKERS or JOB_WORKERS workers."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(int(os.environ.get("PLAB2_JOB_WORKERS", JOB_WORKERS)))
+    return _job_queue
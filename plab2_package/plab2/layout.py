@@ -0,0 +1,191 @@
+"""Node positions of the rendered networks, cached on disk by graph fingerprint and layout parameters."""
+
+import os
+import glob
+import json
+import time
+import hashlib
+import logging
+import numpy as np
+import networkx as nx
+from typing import Dict, Hashable, Optional, Tuple
+from .startup import layouts_path
+
+logger = logging.getLogger('layout')
+
+# parameters of the spring layout of the rendered networks.
+LAYOUT_PARAMETERS = {'algorithm': 'spring', 'k': 0.06, 'iterations': 50, 'seed': 0}
+# 'auto' uses the spring layout up to this number of nodes and the multilevel layout above.
+AUTO_LAYOUT_NODES = 2000
+# maximal number of cached layouts, the least recently used are removed.
+LAYOUT_CACHE_ENTRIES = 64
+# a cached layout seeds a changed graph if it has this share of the nodes, its nodes then keep their position.
+INCREMENTAL_OVERLAP = 0.9
+# cached layouts of the same parameters which are compared with a changed graph.
+INCREMENTAL_CANDIDATES = 8
+
+
+def graph_fingerprint(graph) -> str:
+    """Hash of the node labels and edges, independent of the order they were added in."""
+    nodes = sorted(str(node) for node in graph.nodes())
+    edges = sorted('\t'.join(sorted((str(u), str(v)))) for u, v in graph.edges())
+    digest = hashlib.sha256('\n'.join(nodes).encode())
+    digest.update(b'\0')
+    digest.update('\n'.join(edges).encode())
+    return digest.hexdigest()[:32]
+
+
+def parameters_key(parameters: dict) -> str:
+    return hashlib.sha256(json.dumps(parameters, sort_keys=True).encode()).hexdigest()[:12]
+
+
+class LayoutCache():
+    """
+    One .npz file per layout with the node labels and their float32 positions, named
+    <parameters key>-<graph fingerprint>.npz so the layouts of the same parameters can be found for seeding.
+    """
+    def __init__(self, folder: str = layouts_path, max_entries: int = LAYOUT_CACHE_ENTRIES):
+        self.folder = folder
+        self.max_entries = max_entries
+
+    def path(self, fingerprint: str, parameters: dict) -> str:
+        return os.path.join(self.folder, f"{parameters_key(parameters)}-{fingerprint}.npz")
+
+    @staticmethod
+    def read(path: str) -> Tuple[np.ndarray, np.ndarray]:
+        with np.load(path, allow_pickle=False) as data:
+            return data['labels'], data['positions']
+
+    def get(self, fingerprint: str, parameters: dict) -> Optional[Dict[str, np.ndarray]]:
+        """Positions of the node labels, None if the layout is not cached."""
+        path = self.path(fingerprint, parameters)
+        if not os.path.exists(path):
+            return None
+        labels, positions = self.read(path)
+        # the modification time orders the layouts for the eviction.
+        os.utime(path)
+        return dict(zip(labels, positions))
+
+    def put(self, fingerprint: str, parameters: dict, positions: Dict[str, np.ndarray]) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        labels = np.array(list(positions), dtype=str)
+        coordinates = np.array(list(positions.values()), dtype=np.float32).reshape(-1, 2)
+        path = self.path(fingerprint, parameters)
+        # written to a temporary file first, so readers never see a partial layout.
+        temporary = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporary, labels=labels, positions=coordinates)
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self) -> None:
+        paths = sorted(glob.glob(os.path.join(self.folder, '*-*.npz')), key=os.path.getmtime)
+        for path in paths[:max(0, len(paths) - self.max_entries)]:
+            os.remove(path)
+
+    def nearest(self, parameters: dict, labels: set) -> Optional[Dict[str, np.ndarray]]:
+        """The recently used layout of the same parameters which has most of the labels, if it has enough of them."""
+        paths = sorted(glob.glob(os.path.join(self.folder, f"{parameters_key(parameters)}-*.npz")),
+                       key=os.path.getmtime, reverse=True)[:INCREMENTAL_CANDIDATES]
+        best, best_overlap = None, 0
+        for path in paths:
+            cached_labels, positions = self.read(path)
+            overlap = len(labels.intersection(cached_labels))
+            if overlap > best_overlap:
+                best, best_overlap = dict(zip(cached_labels, positions)), overlap
+        if best is None or best_overlap < INCREMENTAL_OVERLAP * len(labels):
+            return None
+        return best
+
+
+def seed_positions(graph: nx.Graph, cached: Dict[Hashable, np.ndarray], seed: int) -> Dict[Hashable, np.ndarray]:
+    """Cached positions of the known nodes, new nodes start at the mean of their placed neighbors."""
+    rng = np.random.default_rng(seed)
+    positions = dict(cached)
+    coordinates = np.array(list(cached.values()))
+    low, high = coordinates.min(axis=0), coordinates.max(axis=0)
+    for node in graph.nodes():
+        if node in positions:
+            continue
+        placed = [positions[neighbor] for neighbor in graph.neighbors(node) if neighbor in positions]
+        if placed:
+            positions[node] = np.mean(placed, axis=0) + rng.normal(scale=0.01, size=2)
+        else:
+            positions[node] = rng.uniform(low, high)
+    return positions
+
+
+def spring_layout(graph: nx.Graph, parameters: dict, cached: Optional[Dict[Hashable, np.ndarray]] = None) -> dict:
+    """nx.spring_layout, only moving the new nodes if the positions of the others are cached."""
+    if not cached:
+        return nx.spring_layout(graph, k=parameters['k'], iterations=parameters['iterations'],
+                                seed=parameters['seed'])
+    return nx.spring_layout(graph, k=parameters['k'], iterations=parameters['iterations'], seed=parameters['seed'],
+                            pos=seed_positions(graph, cached, parameters['seed']), fixed=list(cached))
+
+
+def multilevel_layout(graph: nx.Graph, parameters: dict, cached: Optional[Dict[Hashable, np.ndarray]] = None) -> dict:
+    """The multilevel layout of large networks, see multilevel.multilevel_layout."""
+    from .multilevel import multilevel_layout
+    return multilevel_layout(graph, parameters['iterations'], parameters['seed'], cached)
+
+
+LAYOUTS = {'spring': spring_layout, 'multilevel': multilevel_layout}
+
+
+def compute_layout(graph: nx.Graph, cache: Optional[LayoutCache] = None, **parameters) -> Dict[Hashable, np.ndarray]:
+    """
+    Node positions of a network, from the layout cache if the same graph was laid out with the same parameters.
+    If a cached layout of the same parameters has most of the nodes, its positions are kept and only the other
+    nodes are laid out.
+    Parameters
+    ----------
+    graph: nx.Graph
+          the network.
+    cache: Optional[LayoutCache]
+          the layout cache, get_layout_cache() if not given.
+    parameters:
+          overrides of LAYOUT_PARAMETERS, the algorithm is 'spring', 'multilevel' or 'auto'.
+    Returns
+    -------
+    Dict[Hashable, np.ndarray]
+    The position of every node, like nx.spring_layout.
+    """
+    parameters = {**LAYOUT_PARAMETERS, **parameters}
+    if parameters['algorithm'] == 'auto':
+        parameters['algorithm'] = 'spring' if graph.number_of_nodes() <= AUTO_LAYOUT_NODES else 'multilevel'
+    if parameters['algorithm'] not in LAYOUTS:
+        raise ValueError(f"Unknown layout {parameters['algorithm']}, choose from {', '.join(LAYOUTS)}.")
+    if graph.number_of_nodes() == 0:
+        return {}
+    cache = cache if cache is not None else get_layout_cache()
+    started = time.perf_counter()
+    fingerprint = graph_fingerprint(graph)
+    label = {str(node): node for node in graph.nodes()}
+    cached = cache.get(fingerprint, parameters)
+    if cached is not None:
+        logger.info(f"Layout {fingerprint} is read from the cache.")
+        return {label[name]: position for name, position in cached.items()}
+    nearest = cache.nearest(parameters, set(label))
+    seed = {label[name]: position for name, position in nearest.items() if name in label} if nearest else None
+    positions = LAYOUTS[parameters['algorithm']](graph, parameters, seed)
+    cache.put(fingerprint, parameters, {str(node): position for node, position in positions.items()})
+    logger.info(f"Layout {fingerprint} of {graph.number_of_nodes()} nodes is computed "
+                f"{'from a seed ' if seed else ''}in {time.perf_counter() - started:.2f} s.")
+    return positions
+
+
+_layout_cache = None
+
+
+def get_layout_cache() -> LayoutCache:
+    """The layout cache shared by the package, in PLAB2_LAYOUT_CACHE_PATH or the default folder."""
+    global _layout_cache
+    if _layout_cache is None:
+        _layout_cache = LayoutCache(os.environ.get("PLAB2_LAYOUT_CACHE_PATH", layouts_path))
+    return _layout_cache
+
+
+def set_layout_cache(cache: Optional[LayoutCache]) -> None:
+    """Replace the shared layout cache, None resets it to the settings."""
+    global _layout_cache
+    _layout_cache = cache
@@ -0,0 +1,231 @@
+"""Multilevel force-directed layout of large networks, vectorized with NumPy.
+
+The graph is coarsened by merging every node into the cluster of its highest ranked neighbor until it is small, the
+coarsest graph is laid out and the positions are carried back level by level and refined. Attraction is summed over
+the edges; the repulsion of all node pairs is approximated on a grid: the nodes are spread on the grid points, the
+force field is the convolution with the repulsive kernel (computed by FFT) and interpolated back at the nodes. Like
+Barnes-Hut, far nodes act through their aggregated mass, at O(n + G^2 log G) per iteration instead of O(n^2).
+"""
+
+import logging
+import numpy as np
+import scipy.sparse as sp
+from scipy import fft
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger('multilevel')
+
+# coarsening stops at this number of nodes, or if a level merges less than COARSENING_RATIO of them.
+COARSEST_NODES = 64
+COARSENING_RATIO = 0.9
+# iterations of the coarsest level, which is cheap and starts from random positions.
+COARSEST_ITERATIONS = 200
+# levels with more nodes get proportionally fewer iterations, at least MIN_ITERATIONS.
+FULL_ITERATION_NODES = 5000
+MIN_ITERATIONS = 10
+# grid points per side of the repulsion field.
+MIN_GRID, MAX_GRID = 16, 256
+# pull towards the center, keeps the separate components close to the largest.
+GRAVITY = 0.05
+
+
+def coarsen(matrix: sp.csr_matrix, rng: np.random.Generator) -> Tuple[sp.csr_matrix, np.ndarray]:
+    """
+    Merge every node into the cluster of the highest ranked node among itself and its neighbors.
+    Parameters
+    ----------
+    matrix: sp.csr_matrix
+           symmetric adjacency matrix without self-loops.
+    rng: np.random.Generator
+           source of the random ranks.
+    Returns
+    -------
+    Tuple[sp.csr_matrix, np.ndarray]
+    The adjacency matrix of the clusters and the cluster of every node.
+    """
+    number_of_nodes = matrix.shape[0]
+    rank = rng.permutation(number_of_nodes)
+    best = rank.copy()
+    nonempty = np.diff(matrix.indptr) > 0
+    if nonempty.any():
+        best[nonempty] = np.maximum(best[nonempty],
+                                    np.maximum.reduceat(rank[matrix.indices], matrix.indptr[:-1][nonempty]))
+    node_of_rank = np.argsort(rank)
+    _, cluster = np.unique(node_of_rank[best], return_inverse=True)
+    assignment = sp.csr_matrix((np.ones(number_of_nodes), (np.arange(number_of_nodes), cluster)),
+                               shape=(number_of_nodes, int(cluster.max()) + 1))
+    coarse = (assignment.T @ matrix @ assignment).tocsr()
+    coarse.setdiag(0)
+    coarse.eliminate_zeros()
+    coarse.data[:] = 1
+    return coarse, cluster
+
+
+def level_iterations(number_of_nodes: int, iterations: int) -> int:
+    """The large levels start from the positions of the coarser level and need fewer iterations."""
+    return max(MIN_ITERATIONS, int(iterations * min(1.0, FULL_ITERATION_NODES / number_of_nodes)))
+
+
+def grid_size(number_of_nodes: int) -> int:
+    """About one grid point per node, as a power of two."""
+    size = 2 ** int(np.ceil(np.log2(max(np.sqrt(number_of_nodes), 1))))
+    return int(np.clip(size, MIN_GRID, MAX_GRID))
+
+
+class Repulsion():
+    """The repulsive force field k^2 / d of unit masses on a grid of grid x grid cells, for k = 1."""
+    def __init__(self, grid: int):
+        self.grid = grid
+        self.points = grid + 1
+        self.length = fft.next_fast_len(2 * self.points)
+        offsets = np.arange(self.length)
+        # offsets of the circular convolution, the upper half are the negative ones.
+        offsets = np.where(offsets < self.length // 2, offsets, offsets - self.length).astype(np.float64)
+        di, dj = np.meshgrid(offsets, offsets, indexing='ij')
+        squared = di ** 2 + dj ** 2
+        squared[0, 0] = np.inf
+        self.kernels = (fft.rfft2(di / squared), fft.rfft2(dj / squared))
+
+    def __call__(self, positions: np.ndarray) -> np.ndarray:
+        low = positions.min(axis=0)
+        spacing = max(float((positions.max(axis=0) - low).max()) / self.grid, 1e-9)
+        scaled = (positions - low) / spacing
+        cell = np.minimum(scaled.astype(np.int64), self.grid - 1)
+        fraction = scaled - cell
+        points = self.points
+        corner = cell[:, 0] * points + cell[:, 1]
+        # cloud in cell: every node is spread on the 4 corners of its cell, the field is gathered the same way.
+        weights = [(1 - fraction[:, 0]) * (1 - fraction[:, 1]), fraction[:, 0] * (1 - fraction[:, 1]),
+                   (1 - fraction[:, 0]) * fraction[:, 1], fraction[:, 0] * fraction[:, 1]]
+        corners = [corner, corner + points, corner + 1, corner + points + 1]
+        mass = sum(np.bincount(index, weight, minlength=points * points) for index, weight in zip(corners, weights))
+        mass = fft.rfft2(mass.reshape(points, points), s=(self.length, self.length))
+        force = np.empty_like(positions)
+        for axis, kernel in enumerate(self.kernels):
+            field = fft.irfft2(mass * kernel, s=(self.length, self.length))[:points, :points].ravel() / spacing
+            force[:, axis] = sum(field[index] * weight for index, weight in zip(corners, weights))
+        return force
+
+
+def refine(matrix: sp.csr_matrix, positions: np.ndarray, iterations: int, temperature: float,
+           moving: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Fruchterman-Reingold iterations with k = 1: attraction d^2 along the edges, grid repulsion, a weak gravity and
+    a linearly cooling maximal step. If moving is given, only those nodes move.
+    """
+    coo = matrix.tocoo()
+    rows, cols = coo.row, coo.col
+    number_of_nodes = len(positions)
+    repulsion = Repulsion(grid_size(number_of_nodes))
+    positions = positions.copy()
+    for iteration in range(iterations):
+        force = repulsion(positions)
+        delta = positions[cols] - positions[rows]
+        distance = np.sqrt((delta ** 2).sum(axis=1))
+        for axis in range(2):
+            force[:, axis] += np.bincount(rows, delta[:, axis] * distance, minlength=number_of_nodes)
+        force -= GRAVITY * (positions - positions.mean(axis=0))
+        length = np.sqrt((force ** 2).sum(axis=1))
+        step = temperature * (1 - iteration / iterations)
+        move = force * (np.minimum(length, step) / np.maximum(length, 1e-12))[:, None]
+        if moving is None:
+            positions += move
+        else:
+            positions[moving] += move[moving]
+    return positions
+
+
+def multilevel_positions(matrix: sp.csr_matrix, iterations: int = 50, seed: Optional[int] = None,
+                         initial: Optional[np.ndarray] = None, fixed: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Positions of the nodes of an adjacency matrix, scaled to [-1, 1] like nx.spring_layout.
+    Parameters
+    ----------
+    matrix: sp.csr_matrix
+           symmetric adjacency matrix without self-loops.
+    iterations: int
+           refinement iterations of the levels up to FULL_ITERATION_NODES nodes, see level_iterations.
+    seed: Optional[int]
+           seed of the coarsening and the start positions.
+    initial: Optional[np.ndarray]
+           start positions, if given the graph is not coarsened but only refined.
+    fixed: Optional[np.ndarray]
+           boolean mask of the nodes which keep their initial position.
+    Returns
+    -------
+    np.ndarray
+    One row of x, y per node.
+    """
+    rng = np.random.default_rng(seed)
+    number_of_nodes = matrix.shape[0]
+    if number_of_nodes < 3:
+        return np.array([[-1.0, 0.0], [1.0, 0.0]])[:number_of_nodes]
+    if initial is not None:
+        # the start positions are scaled to the distance k = 1 between neighbors and back.
+        scale = np.sqrt(number_of_nodes)
+        moving = ~fixed if fixed is not None else None
+        return refine(matrix, initial * scale, level_iterations(number_of_nodes, iterations), 2.0, moving) / scale
+
+    levels: List[Tuple[sp.csr_matrix, np.ndarray]] = []
+    coarse = matrix
+    while coarse.shape[0] > COARSEST_NODES:
+        coarser, cluster = coarsen(coarse, rng)
+        if coarser.shape[0] > COARSENING_RATIO * coarse.shape[0]:
+            break
+        levels.append((coarse, cluster))
+        coarse = coarser
+    positions = rng.uniform(-1, 1, (coarse.shape[0], 2)) * np.sqrt(coarse.shape[0])
+    positions = refine(coarse, positions, COARSEST_ITERATIONS, np.sqrt(coarse.shape[0]))
+    for finer, cluster in reversed(levels):
+        # the area grows with the number of nodes, at the same distance k = 1 between neighbors.
+        scale = np.sqrt(finer.shape[0] / len(positions))
+        positions = positions[cluster] * scale + rng.normal(scale=0.5, size=(finer.shape[0], 2))
+        positions = refine(finer, positions, level_iterations(finer.shape[0], iterations), 2.0)
+    logger.info(f"Layout of {number_of_nodes} nodes is computed on {len(levels) + 1} levels.")
+    return rescale(positions)
+
+
+def rescale(positions: np.ndarray) -> np.ndarray:
+    positions = positions - positions.mean(axis=0)
+    extent = np.abs(positions).max()
+    return positions / extent if extent > 0 else positions
+
+
+def multilevel_layout(graph, iterations: int = 50, seed: Optional[int] = None,
+                      cached: Optional[Dict] = None) -> Dict:
+    """
+    Node positions of a networkx or CSR graph by the multilevel layout.
+    Parameters
+    ----------
+    graph: nx.Graph or CSRGraph
+          the network.
+    iterations: int
+          refinement iterations of the levels, see level_iterations.
+    seed: Optional[int]
+          seed of the layout.
+    cached: Optional[Dict]
+          positions of known nodes, which are kept; the other nodes start at the mean of their placed neighbors.
+    Returns
+    -------
+    Dict
+    The position of every node.
+    """
+    from .topology import adjacency
+    matrix, labels = adjacency(graph)
+    if not cached:
+        positions = multilevel_positions(matrix, iterations, seed)
+        return dict(zip(labels, positions))
+    rng = np.random.default_rng(seed)
+    fixed = np.array([label in cached for label in labels])
+    positions = np.zeros((len(labels), 2))
+    positions[fixed] = [cached[label] for label in labels[fixed]]
+    # new nodes start at the mean of their placed neighbors, or at random.
+    placed = sp.diags(fixed.astype(np.float64))
+    counts = matrix @ fixed.astype(np.float64)
+    sums = matrix @ placed @ positions
+    new = ~fixed
+    around = counts[new] > 0
+    start = rng.uniform(-1, 1, (int(new.sum()), 2))
+    start[around] = sums[new][around] / counts[new][around][:, None] + rng.normal(scale=0.01, size=(around.sum(), 2))
+    positions[new] = start
+    return dict(zip(labels, multilevel_positions(matrix, iterations, seed, positions, fixed)))
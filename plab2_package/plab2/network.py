@@ -1,16 +1,71 @@
 import os
 import csv
 import networkx as nx
-import matplotlib.pyplot as plt
 from collections import defaultdict
+import numpy as np
 import pandas
 import pandas as pd
 import logging
-from .startup import HGNC_data_path, UniProt_data_path
-from typing import Dict, Tuple, Iterable, Optional
+from itertools import chain, cycle
+from .csr import CSRGraph
+from typing import Dict, Tuple, Iterable, Iterator, List, Optional
 
 logger = logging.getLogger('network')
 
+# number of PPI rows held in memory at once when streaming the PPI file.
+PPI_CHUNK_SIZE = 10000
+# every HGNC symbol of an enriched network is expanded to these nodes, with consecutive identifiers.
+MOLECULES = ('DNA', 'RNA', 'Protein')
+
+
+def relabel(column: pd.Series, mapping: dict) -> np.ndarray:
+    """
+    Replace the identifiers of an edge list column with their labels through a vectorized index lookup.
+    Identifiers which are not in the mapping are kept.
+    Parameters
+    ----------
+    column: pd.Series
+           The node_1 or node_2 column of an edge list.
+    mapping: dict
+           Identifier as key and label as value.
+    Returns
+    -------
+    np.ndarray
+    The relabeled column.
+    """
+    values = column.to_numpy(dtype=object)
+    if not mapping:
+        return values
+    keys = pd.Index(list(mapping.keys()))
+    labels = np.asarray(list(mapping.values()), dtype=object)
+    positions = keys.get_indexer(column)
+    return np.where(positions >= 0, labels[positions], values)
+
+
+def graph_from_edge_list(data: pd.DataFrame, mapping: dict, backend: str = 'networkx') -> nx.Graph:
+    """
+    Build the nx.Graph of an edge list, relabeling only the node columns and keeping the metadata as edge attribute.
+    Parameters
+    ----------
+    data: pd.DataFrame
+         Edge list with node_1, node_2 and metadata columns.
+    mapping: dict
+         Identifier as key and label as value.
+    backend: str
+         'networkx' for nx.Graph, or 'csr' for the compact CSRGraph.
+    Returns
+    -------
+    nx.Graph
+    """
+    if backend == 'csr':
+        return CSRGraph.from_edge_list(data, mapping)
+    elif backend != 'networkx':
+        raise ValueError("Graph backend is wrong, must use 'networkx' or 'csr'.")
+    sources = relabel(data['node_1'], mapping)
+    targets = relabel(data['node_2'], mapping)
+    graph = nx.Graph()
+    graph.add_edges_from(zip(sources, targets, ({'metadata': metadata} for metadata in data['metadata'])))
+    return graph
 
 
 class Network():
@@ -19,16 +74,26 @@ class Network():
                  graph: nx.Graph,
                  ppi_file: Optional[str],
                  node_path: Optional[str],
-                 edge_path: Optional[str]):
+                 edge_path: Optional[str],
+                 low_memory: bool = False):
         self.nodes = nodes
         self.graph = graph
         self.ppi_file = ppi_file
         self.node_path = node_path
         self.edge_path = edge_path
+        # if true, the PPI file is streamed from disk whenever it is needed instead of being kept in self.rels.
+        self.low_memory = low_memory
+        # identifier, HGNC symbol and info of the enriched nodes, see set_enriched_nodes.
+        self.enrich_table = None
+        # graph, layout algorithm and node positions of the last layout, see layout.
+        self.positions = None
 
         # initialize the methods, user can put either PPIs file or Node/Edge list, and update the nodes dictionary.
         if self.ppi_file and not self.node_path and not self.edge_path:
-            self.generate_node_dict(self.read_ppis(self.ppi_file))
+            if self.low_memory:
+                self.generate_node_dict(self.iter_relations())
+            else:
+                self.generate_node_dict(self.read_ppis(self.ppi_file))
 
         elif not self.ppi_file and self.node_path and self.edge_path:
             self.original_dict =self.node_label(self.relations(self.node_path))
@@ -48,11 +113,60 @@ class Network():
         Iterable[Tuple[str]]
                 The relationship of nodes and type of interaction.
         """
-        f = open(ppi_file)
-        content = f.readlines()
-        self.rels = [tuple(x.strip().split(',')) for x in content[1:]]
+        self.rels = [rel for chunk in self.iter_ppis(ppi_file) for rel in chunk]
         return self.rels
 
+    def iter_ppis(self, ppi_file: str, chunk_size: int = PPI_CHUNK_SIZE) -> Iterator[List[Tuple[str]]]:
+        """ Stream the original PPI file in chunks, so that at most chunk_size rows are held in memory.
+        Parameters
+        ----------
+        ppi_file: str
+                 .csv PPI file
+        chunk_size: int
+                 The maximal number of relations in one chunk.
+        Returns
+        -------
+        Iterator[List[Tuple[str]]]
+                Chunks of relations (node, type of interaction, node).
+        """
+        with open(ppi_file, newline='') as infile:
+            reader = csv.reader(infile)
+            # skip the header.
+            next(reader, None)
+            chunk = []
+            for row in reader:
+                if not row:
+                    continue
+                chunk.append(tuple(row))
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def iter_relations(self) -> Iterator[Tuple[str]]:
+        """
+        Iterate over the relations of the PPI file, either from self.rels or, in low memory mode, from disk.
+        Returns
+        -------
+        Iterator[Tuple[str]]
+                The relationship of nodes and type of interaction.
+        """
+        if self.low_memory:
+            return chain.from_iterable(self.iter_ppis(self.ppi_file))
+        return iter(self.rels)
+
+    def iter_relation_chunks(self) -> Iterator[List[Tuple[str]]]:
+        """
+        Iterate over the relations of the PPI file in chunks, a single chunk unless in low memory mode.
+        Returns
+        -------
+        Iterator[List[Tuple[str]]]
+        """
+        if self.low_memory:
+            return self.iter_ppis(self.ppi_file)
+        return iter([self.rels])
+
     def generate_node_dict(self, relations: Iterable[Tuple[str]]) -> Dict[str, str]:
         """
            From the relation tuple to node dictionary, where key is the identifier and value is the HGNC symbol
@@ -102,7 +216,7 @@ class Network():
         self.nodes_new = {symbol: identifier for identifier, symbol in self.nodes.items()}
         with open(edge_path, 'wt') as outfile_2:
             tsv_writer_edge = csv.writer(outfile_2, delimiter = '\t')
-            for rel in self.rels:
+            for rel in self.iter_relations():
                 out_, in_ = self.nodes_new[rel[0]], self.nodes_new[rel[2]]
                 interaction = rel[1].replace(" ", "_")
                 tsv_writer_edge.writerow([out_, in_, interaction])
@@ -140,41 +254,208 @@ class Network():
             self.nodes[int(identifier)] = symbol
         return self.nodes
 
-    def import_graph(self, edge_path: str) -> nx.Graph:
+    def set_enriched_nodes(self,
+                           symbols: Iterable[str],
+                           dna_info: Optional[Iterable[str]] = None,
+                           rna_info: Optional[Iterable[str]] = None,
+                           protein_info: Optional[Iterable[str]] = None) -> dict:
+        """
+        Expand every HGNC symbol to its DNA, RNA and Protein node, the i-th symbol gets the identifiers 3i+1, 3i+2, 3i+3.
+        Parameters
+        ----------
+        symbols: Iterable[str]
+                HGNC symbols
+        dna_info, rna_info, protein_info: Optional[Iterable[str]]
+                The info of the node for every symbol, only the type of molecule if not given.
+        Returns
+        -------
+        dict
+        The node dictionary, identifier as key and {HGNC symbol: info} as value.
+        """
+        self.enrich_symbols = np.asarray(list(symbols), dtype=object)
+        number_of_symbols = len(self.enrich_symbols)
+        info = np.empty((number_of_symbols, len(MOLECULES)), dtype=object)
+        for column, (molecule, values) in enumerate(zip(MOLECULES, (dna_info, rna_info, protein_info))):
+            info[:, column] = molecule if values is None else list(values)
+        self.enrich_table = pd.DataFrame({'identifier': np.arange(1, len(MOLECULES) * number_of_symbols + 1),
+                                          'symbol': np.repeat(self.enrich_symbols, len(MOLECULES)),
+                                          'info': info.ravel()})
+        # position of the first occurrence of every symbol.
+        positions = pd.Series(np.arange(number_of_symbols), index=pd.Index(self.enrich_symbols))
+        self.symbol_position = positions[~positions.index.duplicated()]
+
+        self.nodes = defaultdict(dict)
+        for identifier, symbol, info_ in zip(self.enrich_table['identifier'].tolist(),
+                                             self.enrich_table['symbol'], self.enrich_table['info']):
+            self.nodes[identifier][symbol] = info_
+        return self.nodes
+
+    def enriched_identifiers(self, symbols: Iterable[str], molecule: str = 'Protein') -> np.ndarray:
+        """
+        Identifiers of the enriched nodes of one type of molecule, computed from the position of the symbols.
+        Parameters
+        ----------
+        symbols: Iterable[str]
+                HGNC symbols
+        molecule: str
+                DNA, RNA or Protein.
+        Returns
+        -------
+        np.ndarray
+        The identifiers, -1 for symbols which are not in the enriched network.
+        """
+        found = self.symbol_position.index.get_indexer(list(symbols))
+        positions = self.symbol_position.to_numpy()[found]
+        return np.where(found >= 0, len(MOLECULES) * positions + MOLECULES.index(molecule) + 1, -1)
+
+    def write_enriched_edges(self, edge_path: str, interactions: Iterable[tuple]) -> None:
+        """
+        Write the transcribed/translated edges of all symbols and the interactions between their proteins.
+        Parameters
+        ----------
+        edge_path: str
+                  The output file of edge_list.
+        interactions: Iterable[tuple]
+                  Chunks of (symbols of node 1, symbols of node 2, types of interaction).
+        Returns
+        -------
+        None
+        """
+        with open(edge_path, 'wt') as outfile_2:
+            tsv_writer_edge = csv.writer(outfile_2, delimiter='\t')
+            # DNA -> RNA and RNA -> Protein of every symbol, in the order of the node list.
+            dna = len(MOLECULES) * np.arange(len(self.enrich_symbols)) + 1
+            sources = np.column_stack([dna, dna + 1]).ravel()
+            tsv_writer_edge.writerows(zip(sources.tolist(), (sources + 1).tolist(), cycle(('transcribed', 'translated'))))
+
+            for out_symbols, in_symbols, types in interactions:
+                n_1, n_2 = self.enriched_identifiers(out_symbols), self.enriched_identifiers(in_symbols)
+                found = (n_1 > 0) & (n_2 > 0)
+                if not found.all():
+                    logger.warning(f"{(~found).sum()} interactions without protein node are skipped.")
+                types = np.asarray(types, dtype=object)
+                tsv_writer_edge.writerows(zip(n_1[found].tolist(), n_2[found].tolist(), types[found]))
+
+    def enriched_interactions(self) -> Iterator[tuple]:
+        """
+        Chunks of the PPI relations as (symbols of node 1, symbols of node 2, types of interaction) for write_enriched_edges.
+        Returns
+        -------
+        Iterator[tuple]
+        """
+        for chunk in self.iter_relation_chunks():
+            yield [rel[0] for rel in chunk], [rel[2] for rel in chunk], [rel[1] for rel in chunk]
+
+    def import_graph(self, edge_path: str, backend: str = 'networkx') -> nx.Graph:
         """
         To import nx.graph from edge file and use node dictionary to replace HGNC symbol with identifier.
         Parameters
         ----------
         edge_path: str
                   The .tsv edge file of PPIs.
+        backend: str
+                  'networkx' or 'csr' for the compact array-backed graph.
         Returns
         -------
         nx.Graph
         """
         self.Data = pd.read_csv(edge_path, sep='\t', names=['node_1', 'node_2', 'metadata'])
-        self.new_data = self.Data.replace(self.nodes)
+        self.graph = graph_from_edge_list(self.Data, self.nodes, backend)
+        return self.graph
 
-        self.graph = nx.from_pandas_edgelist(self.new_data, source='node_1', target='node_2', edge_attr='metadata')
+    def networkx_graph(self) -> nx.Graph:
+        """
+        The graph as nx.Graph, converting the CSR backend for the algorithms and plots which need networkx.
+        Returns
+        -------
+        nx.Graph
+        """
+        if isinstance(self.graph, CSRGraph):
+            return self.graph.to_networkx()
         return self.graph
 
-    def check_output(self, graph_output: str) -> None:
+    def layout(self, graph: nx.Graph, algorithm: str = 'auto') -> dict:
         """
-        To check if output extension is available.
+        Node positions of the graph for rendering, reused from the layout cache if the graph was rendered before.
+        The positions of the last laid out graph are also kept in memory, a network drawn again (e.g. held by the
+        graph store of the Flask app) is not looked up in the cache.
         Parameters
         ----------
-        graph_output: str
-                     The graph file path.
+        graph: nx.Graph
+              the network to draw.
+        algorithm: str
+              'spring', 'multilevel' for large networks, or 'auto' to choose by the number of nodes.
+        Returns
+        -------
+        dict
+        The position of every node.
+        """
+        from .layout import compute_layout
+        key = (algorithm, graph.number_of_nodes(), graph.number_of_edges())
+        if self.positions is None or self.positions[0] is not graph or self.positions[1] != key:
+            self.positions = (graph, key, compute_layout(graph, algorithm=algorithm))
+        return self.positions[2]
+
+    def draw(self, graph: nx.Graph, graph_output, layout: str = 'auto', print_edge_label: bool = False,
+             output_format: Optional[str] = None, **style) -> None:
+        """
+        Draw the graph with its cached layout and save it, see render.render_network, or as interactive page,
+        see interactive.network_html.
+        Parameters
+        ----------
+        graph: nx.Graph
+              the network to draw.
+        graph_output:
+              file name or file object of the image.
+        layout: str
+              'spring', 'multilevel' or 'auto', see layout.compute_layout.
+        print_edge_label: bool
+              If true, the interaction types are drawn on the edges between labeled nodes.
+        output_format: Optional[str]
+              'html' for the interactive page, otherwise the image format, from the file name if not given.
+        style:
+              colors, sizes and highlighted nodes of render.render_network.
         Returns
         -------
         None
         """
-        accept_extension = ['pdf', 'png', 'jpg', 'svg']
-        base_name = os.path.basename(graph_output)
-        output_extension = base_name.split(".")[1]
-        if output_extension not in accept_extension:
-            raise ValueError("Graph extension is wrong, must use 'pdf', 'svg','png', 'jpg'.")
+        graph.pos = self.layout(graph, layout)
+        if output_format == 'html' or (isinstance(graph_output, str) and graph_output.endswith('.html')):
+            from .interactive import write_network_html
+            # the interaction types are always shown when hovering over an edge.
+            write_network_html(graph, graph.pos, graph_output,
+                               **{key: style[key] for key in ('node_color', 'edge_color', 'highlight') if key in style})
+            return
+        from .render import render_network
+        edge_label = None
+        if print_edge_label:
+            edge_label = {(node1, node2): type['metadata'] for (node1, node2, type) in graph.edges(data=True)}
+        render_network(graph, graph.pos, graph_output, edge_labels=edge_label, output_format=output_format, **style)
 
-    def generate_graph_network(self, graph_output: str, print_edge_label: bool = False) -> None:
+    def check_output(self, graph_output, output_format: Optional[str] = None) -> str:
+        """
+        To check if output extension is available.
+        Parameters
+        ----------
+        graph_output:
+                     The graph file path, or a file object if the output_format is given.
+        output_format: Optional[str]
+                     The format of the output, from the extension of graph_output if not given.
+        Returns
+        -------
+        str
+        The output format.
+        """
+        accept_extension = ['pdf', 'png', 'jpg', 'svg', 'html']
+        if output_format is None:
+            base_name = os.path.basename(graph_output)
+            output_format = base_name.split(".")[1]
+        if output_format not in accept_extension:
+            raise ValueError("Graph extension is wrong, must use 'pdf', 'svg','png', 'jpg', 'html'.")
+        return output_format
+
+    def generate_graph_network(self, graph_output: str, print_edge_label: bool = False, layout: str = 'auto',
+                               output_format: Optional[str] = None) -> None:
         """
         Use nx.Graph to generate graph PPIs network.
         Parameters
@@ -183,23 +464,19 @@ class Network():
                      The correct output file of network.
         print_edge_label: bool
                         If true, will print the edge label (type of protein interaction).
+        layout: str
+                        'spring', 'multilevel' or 'auto', see layout.compute_layout.
+        output_format: Optional[str]
+                        'html' for an interactive page, otherwise the image format, from the extension if not given.
         Returns
         -------
         None
         """
-        self.check_output(graph_output)
+        output_format = self.check_output(graph_output, output_format)
         node_colors, edge_colors = 'red', 'black'
-        plt.figure(figsize=(18, 18))
-        self.graph.pos = nx.spring_layout(self.graph, k = 0.06)
-        nx.draw_networkx(self.graph, pos = self.graph.pos, with_labels=True,
-                         node_color = node_colors,
-                         edge_color = edge_colors, alpha = 0.3)
-
-        # To check if need to print edge label
-        if print_edge_label:
-           edge_label = {(node1, node2): type['metadata'] for (node1, node2, type) in self.graph.edges(data=True)}
-           nx.draw_networkx_edge_labels(self.graph, pos=self.graph.pos, edge_labels=edge_label)
-        plt.savefig(graph_output)
+        graph = self.networkx_graph()
+        self.draw(graph, graph_output, layout, print_edge_label, output_format, node_color=node_colors,
+                  edge_color=edge_colors)
 
 
 class Analyzer(Network):
@@ -208,12 +485,56 @@ class Analyzer(Network):
                  graph: nx.Graph,
                  ppi_file: Optional[str],
                  node_path: Optional[str],
-                 edge_path: Optional[str]):
-        super().__init__(nodes, graph, ppi_file, node_path, edge_path)
+                 edge_path: Optional[str],
+                 low_memory: bool = False):
+        super().__init__(nodes, graph, ppi_file, node_path, edge_path, low_memory)
         self.short_path = []
         self.enrich_identifier_info = defaultdict(dict)
+        # landmark distance oracle consulted before a path search, see use_oracle.
+        self.oracle = None
 
-    def shortest_path(self, source: str, target: str, print_option: bool = False) -> Optional[list]:
+    def use_oracle(self, edge_path: Optional[str] = None, landmarks: Optional[int] = None) -> 'DistanceOracle':
+        """
+        Load the distance oracle persisted next to the edge list of the imported graph, or build and persist it.
+        Parameters
+        ----------
+        edge_path: Optional[str]
+                  the edge list of the graph, self.edge_path if not given.
+        landmarks: Optional[int]
+                  number of landmarks of a new oracle.
+        Returns
+        -------
+        DistanceOracle
+        """
+        from .oracle import DistanceOracle, ORACLE_LANDMARKS
+        self.oracle = DistanceOracle.load_or_build(self.graph, edge_path or self.edge_path,
+                                                   landmarks or ORACLE_LANDMARKS)
+        return self.oracle
+
+    def iter_shortest_paths(self, source: str, target: str, max_paths: Optional[int] = None) -> Iterator[list]:
+        """
+        Generate shortest paths between two given nodes on demand, see paths.shortest_paths.
+        Parameters
+        ----------
+        source: str
+               One Node
+        target: str
+               The other node
+        max_paths: Optional[int]
+               stop after this many paths, all of them if not given.
+        Returns
+        -------
+        Iterator[list]
+        The shortest paths, computed when they are requested.
+        """
+        from .paths import shortest_paths
+        if self.oracle is not None and not self.oracle.connected(source, target):
+            # the search would visit the whole component of the source.
+            raise nx.NetworkXNoPath(f"Target {target} cannot be reached from source {source}.")
+        return shortest_paths(self.graph, source, target, max_paths)
+
+    def shortest_path(self, source: str, target: str, print_option: bool = False,
+                      max_paths: Optional[int] = None) -> Optional[list]:
         """
         Get shortest path between two given nodes.
         Parameters
@@ -224,12 +545,14 @@ class Analyzer(Network):
                The other node
         print_option: bool
                      if ture, will print the shortest path in terminal.
+        max_paths: Optional[int]
+                  keep at most this many paths, all of them if not given.
         Returns
         -------
         Optional[list]
         The possible shortest path between two nodes.
         """
-        self.paths = nx.all_shortest_paths(self.graph, source, target)
+        self.paths = self.iter_shortest_paths(source, target, max_paths)
         self.short_path = [path for path in self.paths]
 
         if print_option:
@@ -238,6 +561,34 @@ class Analyzer(Network):
                 print('START : ***' + path_string + "  ***STOP")
         return self.short_path
 
+    def distance(self, source: str, target: str) -> int:
+        """
+        Length of the shortest path between two nodes, from the oracle if its bounds are tight, otherwise searched.
+        Raises nx.NetworkXNoPath if the nodes are not connected.
+        Parameters
+        ----------
+        source: str
+               One Node
+        target: str
+               The other node
+        Returns
+        -------
+        int
+        The number of edges of a shortest path.
+        """
+        if self.oracle is not None:
+            estimate = self.oracle.query(source, target)
+            if not estimate.connected:
+                raise nx.NetworkXNoPath(f"Target {target} cannot be reached from source {source}.")
+            if estimate.exact:
+                return estimate.lower
+        if isinstance(self.graph, CSRGraph):
+            distance = int(self.graph.bfs(source, target)[self.graph.position(target)])
+            if distance < 0:
+                raise nx.NetworkXNoPath(f"Target {target} cannot be reached from source {source}.")
+            return distance
+        return nx.shortest_path_length(self.graph, source, target)
+
     def color_path(self, path_nodes: list) -> tuple:
         """
         Generate different color for the path.
@@ -255,12 +606,15 @@ class Analyzer(Network):
         for single_path in path_nodes:
             node_set.update(single_path)
             for i in range(len(single_path) - 1):
+                # the graph is undirected, its edges may be stored in either direction.
                 edge_set.add((single_path[i], single_path[i + 1]))
+                edge_set.add((single_path[i + 1], single_path[i]))
         node_color_design = ['blue' if nodes in node_set else 'red' for nodes in self.graph.nodes()]
         edge_color_design = ['purple' if edges in edge_set else 'black' for edges in self.graph.edges()]
         return node_color_design, edge_color_design
 
-    def generate_graph_network(self, graph_output: str, print_edge_label: bool = False) -> None:
+    def generate_graph_network(self, graph_output: str, print_edge_label: bool = False, layout: str = 'auto',
+                               output_format: Optional[str] = None) -> None:
         """
         Overwrite generate_graph_network function from the parent class,
         if there is short path, then color the path and nodes.
@@ -270,72 +624,72 @@ class Analyzer(Network):
                      The network output with shortest path.
         print_edge_label: bool
                      If ture, will print the edge label which illustrates the PPIs.
+        layout: str
+                     'spring', 'multilevel' or 'auto', see layout.compute_layout.
+        output_format: Optional[str]
+                     'html' for an interactive page, otherwise the image format, from the extension if not given.
         Returns
         -------
         None
         """
-        self.check_output(graph_output)  # check the extension of output file.
+        output_format = self.check_output(graph_output, output_format)  # check the extension of output file.
         # customize the color of edges for shortest paths.
         if self.short_path:
             node_colors, edge_colors = self.color_path(self.short_path)
         else:
             node_colors, edge_colors = 'red', 'black'
 
-        plt.figure(figsize = (18, 18))
-        self.graph.pos = nx.spring_layout(self.graph, k = 0.06)
-        nx.draw_networkx(self.graph, pos=self.graph.pos,
-                         with_labels=True,
-                         node_color = node_colors,
-                         edge_color = edge_colors)
-        if print_edge_label:
-            edge_label = {(node1, node2): type['metadata'] for (node1, node2, type) in self.graph.edges(data=True)}
-            nx.draw_networkx_edge_labels(self.graph, pos=self.graph.pos, edge_labels=edge_label)
-        plt.savefig(graph_output)
+        graph = self.networkx_graph()
+        # the nodes of the path are always labeled, also when only the best connected nodes of a large network are.
+        self.draw(graph, graph_output, layout, print_edge_label, output_format, node_color=node_colors,
+                  edge_color=edge_colors, alpha=1.0, highlight=chain.from_iterable(self.short_path or []))
 
-    def enrich_gather_identifier(self, node_path:str) -> dict:
+    def enrich_gather_identifier(self, node_path:str, fetcher: Optional['Fetcher'] = None,
+                                 resolver: Optional['HGNCResolver'] = None) -> dict:
         """
         This funciton is used to request HGNC symbol in the node_path file and extract info to a nested dictionary,
         where key is the HGNC symbol, and value is the dictionary of all HGNC id, emsembl id and uniprot id.
         -------
         parameter: node_path: str
                   original node_list path without metadata
+                  fetcher: Optional[Fetcher]
+                  concurrent downloader of the files which are not cached yet, with default settings if not given.
+                  resolver: Optional[HGNCResolver]
+                  if given, the HGNC info is taken from this offline index and nothing is downloaded,
+                  UniProt info is only added for the cached .fasta texts.
         -------
         return: dict
                nested dictionary. key is the HGNC symbol, and values is a dictionary with its meta data.
         """
-        from .Utils import Profiler
-        from tqdm import tqdm
-        f = open(node_path)
-        content = f.readlines()
-        rels = [tuple(x.strip().split('\t')) for x in content]
+        from .Utils import parse_hgnc, parse_uniprot
+        from .fetch import Fetcher
+        from .cache import get_cache
+        with open(node_path) as f:
+            rels = [tuple(x.strip().split('\t')) for x in f]
         symbol_list = [symbol for identifier, symbol in rels]
+        cache = fetcher.cache if fetcher is not None else get_cache()
 
-        # cache file : which is not present in HGNC and UniProt folder.
-        # hgnc file
-        for elem in tqdm(symbol_list):
-            import time
-            time.sleep(0.1)
-            hgnc_path_root = HGNC_data_path
-            hgnc_file_name = f"/{elem}.json"
-            hgnc_path = hgnc_path_root + hgnc_file_name
-            if not os.path.isfile(hgnc_path):
-                Profiler(elem).request()
-        # uniprot file
-        for elem in tqdm(symbol_list):
-            time.sleep(0.1)
-            if os.path.isfile(HGNC_data_path + f"/{elem}.json"):
-                self.enrich_identifier_info[f"hgnc_{elem}"] = Profiler(elem).extract()
-                for acc_num in Profiler(elem).extract()["UniProt ID"]:
-                    if acc_num is not None:
-                        uniprot_path_root = UniProt_data_path
-                        uniprot_file_name = f"/{acc_num}.fasta"
-                        uniprot_path = uniprot_path_root + uniprot_file_name
-                        if not os.path.isfile(uniprot_path):
-                            Profiler(elem).request_uniprot(acc_num)
-                        self.enrich_identifier_info[f"uniprot_{acc_num}"] = Profiler(elem).extract_uniprot(acc_num)
-                    else:
-                        self.enrich_identifier_info[f"uniprot_{acc_num}"] = {None}
-        return
+        if resolver is not None:
+            resolver.load()
+            hgnc_info = {elem: resolver.resolve(elem) for elem in symbol_list if elem in resolver}
+        else:
+            fetcher = fetcher or Fetcher(cache=cache)
+            # request the symbols which are not cached yet, then read and parse all of them once, in one batch.
+            fetcher.fetch_hgnc(symbol_list)
+            hgnc_info = cache.parsed_many("hgnc", symbol_list, parse_hgnc)
+            fetcher.fetch_uniprot(acc_num for info in hgnc_info.values() for acc_num in info["UniProt ID"]
+                                  if acc_num is not None)
+        uniprot_info = cache.parsed_many("uniprot", [acc_num for info in hgnc_info.values()
+                                                     for acc_num in info["UniProt ID"] if acc_num is not None],
+                                         parse_uniprot)
+        for elem, info in hgnc_info.items():
+            self.enrich_identifier_info[f"hgnc_{elem}"] = info
+            for acc_num in info["UniProt ID"]:
+                if acc_num in uniprot_info:
+                    self.enrich_identifier_info[f"uniprot_{acc_num}"] = uniprot_info[acc_num]
+                else:
+                    self.enrich_identifier_info[f"uniprot_{acc_num}"] = {None}
+        return self.enrich_identifier_info
 
     def enrich_generate_node_dict(self, query_from_sql: bool = False) -> dict:
         """
@@ -345,48 +699,37 @@ class Analyzer(Network):
         dict
         A dictionary of enriched info.
         """
-        self.nodes = defaultdict(dict)
         # A set contains unique node.
         nodes_ = set()
-        for rel in self.rels:
+        for rel in self.iter_relations():
             nodes_.add(rel[0])
             nodes_.add(rel[2])
         # A nested dictionary contains identifier as key, and in inner dict, the HGNC symbol as key.
-        identifier = 1
-        for symbol in nodes_:
-            if query_from_sql:
-                from .models import query_data
-                if query_data(symbol):
-                    gene_symbol = list(query_data(symbol).keys())[0]
-                    value_list = list(query_data(symbol).values())[0]
+        if query_from_sql:
+            from .models import query_many
+            found = query_many(nodes_)
+            symbols, dna_info, protein_info = [], [], []
+            for symbol in nodes_:
+                if symbol in found:
+                    gene_symbol = symbol
+                    value_list = found[symbol]
                     ensembl = value_list[1]
                     acc_num = value_list[2]
                     tax_num = value_list[3]
-                    self.nodes[identifier][symbol] = 'DNA'+" "+ f"HGNC:{gene_symbol} /"+ f"Ensembl:{ensembl}"
-                    identifier += 1
-                    self.nodes[identifier][symbol] = 'RNA'
-                    identifier += 1
-                    self.nodes[identifier][symbol] = 'Protein' + " " + f"{acc_num} /"+ f"Taxonomy:{tax_num}"
-                    identifier += 1
+                    symbols.append(symbol)
+                    dna_info.append('DNA'+" "+ f"HGNC:{gene_symbol} /"+ f"Ensembl:{ensembl}")
+                    protein_info.append('Protein' + " " + f"{acc_num} /"+ f"Taxonomy:{tax_num}")
+            return self.set_enriched_nodes(symbols, dna_info, None, protein_info)
 
-            else:
-            # if request gene and protein info from database:
-                if self.enrich_identifier_info:
-                    self.nodes[identifier][symbol] = 'DNA'+" "+ str(self.enrich_identifier_info[f"hgnc_{symbol}"]["HGNC ID"][0]) +"/"+ str(self.enrich_identifier_info[f"hgnc_{symbol}"]["Ensembl Gene ID"][0])
-                    identifier += 1
-                    self.nodes[identifier][symbol] = 'RNA'
-                    identifier += 1
-                    self.nodes[identifier][symbol] = 'Protein' + " " + str(self.enrich_identifier_info[f"hgnc_{symbol}"]["UniProt ID"][0])
-                    identifier += 1
-            # no gene and protein info:
-                else:
-                    self.nodes[identifier][symbol] = 'DNA'
-                    identifier += 1
-                    self.nodes[identifier][symbol] = 'RNA'
-                    identifier += 1
-                    self.nodes[identifier][symbol] = 'Protein'
-                    identifier += 1
+        # if request gene and protein info from database:
+        elif self.enrich_identifier_info:
+            info = [self.enrich_identifier_info[f"hgnc_{symbol}"] for symbol in nodes_]
+            dna_info = ['DNA'+" "+ str(elem["HGNC ID"][0]) +"/"+ str(elem["Ensembl Gene ID"][0]) for elem in info]
+            protein_info = ['Protein' + " " + str(elem["UniProt ID"][0]) for elem in info]
+            return self.set_enriched_nodes(nodes_, dna_info, None, protein_info)
 
+        # no gene and protein info:
+        return self.set_enriched_nodes(nodes_)
 
     def enrich_write_node_list(self, node_path: str) -> None:
         """
@@ -406,81 +749,59 @@ class Analyzer(Network):
                     tsv_writer_node.writerow([identifier, name, type])
 
     # from PPIs file:
-    def enrich_write_edge_list(self, relation: Iterable[Tuple[str]], edge_path: str, query_from_sql: bool = False) -> None:
+    def enrich_write_edge_list(self, relation: Optional[Iterable[Tuple[str]]], edge_path: str, query_from_sql: bool = False) -> None:
         """
         Write the relationship between two nodes to edge_list file.
 
         Parameters
         ----------
-        relation: Iterable[Tuple[str]]
-                 The relationship between two nodes
+        relation: Optional[Iterable[Tuple[str]]]
+                 Not used anymore, the identifiers follow from the enriched node dictionary. Can be None.
         edge_path: str
                  The output file of edge_list.
         Returns
         -------
         None
         """
-        with open(edge_path, 'wt') as outfile_2:
-            tsv_writer_edge = csv.writer(outfile_2, delimiter='\t')
-            for n in range(len(relation) - 1):
-                if relation[n][2][:3] == 'DNA':
-                    tsv_writer_edge.writerow([relation[n][0], relation[n + 1][0], 'transcribed'])
-                elif relation[n][2] == 'RNA':
-                    tsv_writer_edge.writerow([relation[n][0], relation[n + 1][0], 'translated'])
-
-            identifier = list(self.nodes.keys())
-            name_and_metadata = list(self.nodes.values())
-            for rel in self.rels:
-                if query_from_sql:
-                    from .models import query_data
-                    if query_data(rel[0]):
-                        value_list_1 = list(query_data(rel[0]).values())[0]
-                        acc_num_1 = value_list_1[2]
-                        tax_num_1 = value_list_1[3]
-                        n_1 = name_and_metadata.index({rel[0]: 'Protein' + " " + f"{acc_num_1} /"+ f"Taxonomy:{tax_num_1}"})
-
-                    if query_data(rel[2]):
-                        value_list_2 = list(query_data(rel[2]).values())[0]
-                        acc_num_2 = value_list_2[2]
-                        tax_num_2 = value_list_2[3]
-                        n_2 = name_and_metadata.index({rel[2]: 'Protein' + " " + f"{acc_num_2} /"+ f"Taxonomy:{tax_num_2}"})
-
-                    tsv_writer_edge.writerow([identifier[n_1], identifier[n_2], rel[1]])
-                else:
-                    n_1 = name_and_metadata.index({rel[0]: 'Protein'+ " " + str(self.enrich_identifier_info[f"hgnc_{rel[0]}"]["UniProt ID"][0])})
-                    n_2 = name_and_metadata.index({rel[2]: 'Protein'+ " " + str(self.enrich_identifier_info[f"hgnc_{rel[2]}"]["UniProt ID"][0])})
-                    tsv_writer_edge.writerow([identifier[n_1], identifier[n_2], rel[1]])
+        self.write_enriched_edges(edge_path, self.enriched_interactions())
 
     def enrich_generate_databaseinfo(self) -> tuple:
         hgnc_data = []
         uniprot_data = []
-        id_hgnc = 1
-        id_uniprot = 1
-        for key, value in self.enrich_identifier_info.items():
-            if key.startswith("hgnc"):
-                hgnc_data.append((id_hgnc, value["HGNC ID"], value["Ensembl Gene ID"], value["UniProt ID"], key.split("_")[1]))
-                id_hgnc += 1
-
-            elif key.split("_")[0] == "uniprot":
-                for i, y, z, uniprot, n in hgnc_data:
-                    if key.split("_")[1] in uniprot:
-                        uniprot_data.append((id_uniprot,
-                                             value["first accession number"],
-                                             value["NCBI taxonomy ID"],
-                                             value["Name of protein"],
-                                             value["full name of protein"],
-                                             i))
-                id_uniprot += 1
-        new_hgnc_data = [(i, y, z, n) for i, y, z, uniprot, n in hgnc_data]
-        return (new_hgnc_data, uniprot_data)
-
-    def enrich_import_graph(self, edge_path: str, identifier: bool = False) -> nx.Graph:
+        # hgnc table ids of each accession number.
+        hgnc_ids = defaultdict(list)
+        # the ids follow the sorted symbols and accession numbers, so every populate gives a row the same id.
+        hgnc_keys = sorted(key for key in self.enrich_identifier_info if key.startswith("hgnc"))
+        uniprot_keys = sorted(key for key in self.enrich_identifier_info if key.split("_")[0] == "uniprot")
+        for id_hgnc, key in enumerate(hgnc_keys, 1):
+            value = self.enrich_identifier_info[key]
+            hgnc_data.append((id_hgnc, value["HGNC ID"], value["Ensembl Gene ID"], key.split("_")[1]))
+            for acc_num in value["UniProt ID"]:
+                hgnc_ids[acc_num].append(id_hgnc)
+
+        for key in uniprot_keys:
+            value = self.enrich_identifier_info[key]
+            # accession numbers without cached .fasta have no protein info.
+            if isinstance(value, dict):
+                # an accession number shared by several genes has a row per gene.
+                for i in hgnc_ids[key.split("_")[1]]:
+                    uniprot_data.append((len(uniprot_data) + 1,
+                                         value["first accession number"],
+                                         value["NCBI taxonomy ID"],
+                                         value["Name of protein"],
+                                         value["full name of protein"],
+                                         i))
+        return (hgnc_data, uniprot_data)
+
+    def enrich_import_graph(self, edge_path: str, identifier: bool = False, backend: str = 'networkx') -> nx.Graph:
         """
         Import the graph: nodes with HGNC symbol and their type (DNA, RNA and Protein)
         Parameters
         ----------
         edge_path: str
                   The .tsv file of enriched edge_list.
+        backend: str
+                  'networkx' or 'csr' for the compact array-backed graph.
         Returns
         -------
         nx.Graph
@@ -488,9 +809,10 @@ class Analyzer(Network):
         Data = pd.read_csv(edge_path, sep='\t', names=['node_1', 'node_2', 'metadata'])
 
         # replace identifier with HGNC and type of molecule.
+        rels = self.new_rels if self.enrich_table is None else self.enrich_table.itertuples(index=False, name=None)
         mapping = {}
         if identifier:
-            for rel in self.new_rels:
+            for rel in rels:
                 if rel[2].split(" ")[0] == 'DNA':
                     mapping[int(rel[0])] = rel[2].split("/")[0]
                 elif rel[2]== 'RNA':
@@ -499,18 +821,18 @@ class Analyzer(Network):
                     mapping[int(rel[0])] = rel[2]
 
         elif not identifier:
-            for rel in self.new_rels:
+            for rel in rels:
                 if len(rel[2]) > 3:
                     mapping[int(rel[0])] = rel[1] + " " + rel[2].split(" ")[0]
                 else:
                     mapping[int(rel[0])] = rel[1] + " " + rel[2]
-        new_data = Data.replace(mapping)
         logger.info("Import graph.")
 
-        self.graph = nx.from_pandas_edgelist(new_data, source='node_1', target='node_2', edge_attr='metadata')
+        self.graph = graph_from_edge_list(Data, mapping, backend)
 
 
-    def enrich_network(self, graph_output: str, print_edge_label: bool = False, identifier: bool = False) -> None:
+    def enrich_network(self, graph_output: str, print_edge_label: bool = False, identifier: bool = False,
+                       layout: str = 'auto', output_format: Optional[str] = None) -> None:
         """
         Generate network of enriched info from imported enriched graph.
         Parameters
@@ -519,11 +841,15 @@ class Analyzer(Network):
                      The final output of a graph
         print_edge_label: bool
                      If true, will print the edge label of two nodes
+        layout: str
+                     'spring', 'multilevel' or 'auto', see layout.compute_layout.
+        output_format: Optional[str]
+                     'html' for an interactive page, otherwise the image format, from the extension if not given.
         Returns
         -------
         None
         """
-        self.check_output(graph_output)
+        output_format = self.check_output(graph_output, output_format)
         # specify colors for nodes
         color = {}
         if identifier:
@@ -549,31 +875,21 @@ class Analyzer(Network):
         edge_colors = 'black'
 
         # plot figure
-        plt.figure(figsize=(18, 18))
-        self.graph.pos = nx.spring_layout(self.graph, k=0.06)
-        nx.draw_networkx(self.graph, pos=self.graph.pos,
-                         node_size=150,
-                         font_size=8,
-                         with_labels=True,
-                         node_color=node_colors,
-                         edge_color=edge_colors,
-                         alpha=0.3)
-        if print_edge_label:
-            edge_label = {(node1, node2): type['metadata'] for (node1, node2, type) in self.graph.edges(data=True)}
-            nx.draw_networkx_edge_labels(self.graph, pos=self.graph.pos, edge_labels=edge_label)
-
-        plt.savefig(graph_output)
+        graph = self.networkx_graph()
+        self.draw(graph, graph_output, layout, print_edge_label, output_format, node_color=node_colors,
+                  edge_color=edge_colors, node_size=150, font_size=8)
 
     def add_data_to_database(self) -> None:
-        from .models import add_data_hgnc, add_data_uniprot
+        from .models import add_data_hgnc, add_data_uniprot, stored_hgnc_ids
         #a = Analyzer({}, None, ppi, None, None)
         relations = self.read_ppis(self.ppi_file)
         self.write_node_list("nodes_reduced.tsv")
         self.enrich_gather_identifier("nodes_reduced.tsv")
-        hgnc_data = self.enrich_generate_databaseinfo()[0]
-        uniprot_data = self.enrich_generate_databaseinfo()[1]
+        hgnc_data, uniprot_data = self.enrich_generate_databaseinfo()
+        # the uniprot rows refer to the hgnc rows by the ids they have in the database.
+        hgnc_ids = stored_hgnc_ids(hgnc_data)
         add_data_hgnc(hgnc_data)
-        add_data_uniprot(uniprot_data)
+        add_data_uniprot(uniprot_data, hgnc_ids=hgnc_ids)
         logger.info("Database for HGNC and Uniprot are generated, and DATA is stored.")
         os.remove("nodes_reduced.tsv")
 
@@ -584,8 +900,9 @@ class Statistics(Network):
                  graph: nx.Graph,
                  ppi_file: Optional[str],
                  node_path: Optional[str],
-                 edge_path: Optional[str]):
-        super().__init__(nodes, graph, ppi_file, node_path, edge_path)
+                 edge_path: Optional[str],
+                 low_memory: bool = False):
+        super().__init__(nodes, graph, ppi_file, node_path, edge_path, low_memory)
 
     def enrich_generate_node_dict(self) -> dict:
         """
@@ -595,22 +912,13 @@ class Statistics(Network):
         dict
         A dictionary of enriched info.
         """
-        from collections import defaultdict
-        self.nodes = defaultdict(dict)
         # A set contains unique node.
         nodes_ = set()
-        for rel in self.rels:
+        for rel in self.iter_relations():
             nodes_.add(rel[0])
             nodes_.add(rel[2])
         # A nested dictionary contains identifier as key, and in inner dict, the HGNC symbol as key.
-        identifier = 1
-        for symbol in nodes_:
-            self.nodes[identifier][symbol] = 'DNA'
-            identifier += 1
-            self.nodes[identifier][symbol] = 'RNA'
-            identifier += 1
-            self.nodes[identifier][symbol] = 'Protein'
-            identifier += 1
+        return self.set_enriched_nodes(nodes_)
 
     def enrich_write_node_list(self, node_path: str) -> None:
         """
@@ -643,47 +951,24 @@ class Statistics(Network):
         dict
         node dictionary with key as identifier and values as DNA/RNA/Protein info.
         """
-        from collections import defaultdict
-        self.nodes = defaultdict(dict)
-        identifier = 1
-        for index, symbol in relations:
-            self.nodes[identifier][symbol] = 'DNA'
-            identifier += 1
-            self.nodes[identifier][symbol] = 'RNA'
-            identifier += 1
-            self.nodes[identifier][symbol] = 'Protein'
-            identifier += 1
+        return self.set_enriched_nodes(symbol for index, symbol in relations)
 
 
 
-    def enrich_edge_from_ppi(self, relations: Iterable[Tuple[str]], edge_path: str) -> None:
+    def enrich_edge_from_ppi(self, relations: Optional[Iterable[Tuple[str]]], edge_path: str) -> None:
         """
         Generate edge_list file if there is PPIs input
         Parameters
         ----------
-        relations: Iterable[Tuple[str]]
-                  The relationship from enriched node list file.
+        relations: Optional[Iterable[Tuple[str]]]
+                  Not used anymore, the identifiers follow from the enriched node dictionary. Can be None.
         edge_path: str
                   The .tsv file path of enriched edge list
         Returns
         -------
         None
         """
-
-        with open(edge_path, 'wt') as outfile_2:
-            tsv_writer_edge = csv.writer(outfile_2, delimiter='\t')
-            for n in range(len(relations) - 1):
-                if relations[n][2] == 'DNA':
-                    tsv_writer_edge.writerow([relations[n][0], relations[n + 1][0], 'transcribed'])
-                elif relations[n][2] == 'RNA':
-                    tsv_writer_edge.writerow([relations[n][0], relations[n + 1][0], 'translated'])
-
-            identifier = list(self.nodes.keys())
-            name_and_metadata = list(self.nodes.values())
-            for rel in self.rels:
-                n_1 = name_and_metadata.index({rel[0]: 'Protein'})
-                n_2 = name_and_metadata.index({rel[2]: 'Protein'})
-                tsv_writer_edge.writerow([identifier[n_1], identifier[n_2], rel[1]])
+        self.write_enriched_edges(edge_path, self.enriched_interactions())
 
     def open_original_edge(self, edge_path: str) -> Iterable[Tuple[str]]:
         """
@@ -701,56 +986,46 @@ class Statistics(Network):
         self.edge_rels = [tuple(x.strip().split('\t')) for x in content]
         return self.edge_rels
 
-    def enrich_edge_from_old_edge(self, relations: Iterable[Tuple[str]], new_edge_output: str) -> None:
+    def enrich_edge_from_old_edge(self, relations: Optional[Iterable[Tuple[str]]], new_edge_output: str) -> None:
         """
         Enrich edge list from original input edge list and
         Parameters
         ----------
-        relations: Iterable[Tuple[str]]
-                The relationship from enriched node list file
+        relations: Optional[Iterable[Tuple[str]]]
+                Not used anymore, the identifiers follow from the enriched node dictionary. Can be None.
         new_edge_output: str
                 The edge_list of enriched info.
         Returns
         -------
         None
         """
-        with open(new_edge_output, 'wt') as outfile_2:
-            tsv_writer_edge = csv.writer(outfile_2, delimiter='\t')
-            for n in range(len(relations) - 1):
-                if relations[n][2] == 'DNA':
-                    tsv_writer_edge.writerow([relations[n][0], relations[n + 1][0], 'transcribed'])
-                elif relations[n][2] == 'RNA':
-                    tsv_writer_edge.writerow([relations[n][0], relations[n + 1][0], 'translated'])
-
-
-            identifier = list(self.nodes.keys())
-            name_and_metadata = list(self.nodes.values())
-            for elem in self.edge_rels:
-                n_1 = name_and_metadata.index({self.original_dict[elem[0]]:'Protein'})
-                n_2 = name_and_metadata.index({self.original_dict[elem[1]]:'Protein'})
-                tsv_writer_edge.writerow([identifier[n_1], identifier[n_2], elem[2]])
+        out_symbols = [self.original_dict[int(elem[0])] for elem in self.edge_rels]
+        in_symbols = [self.original_dict[int(elem[1])] for elem in self.edge_rels]
+        self.write_enriched_edges(new_edge_output, [(out_symbols, in_symbols, [elem[2] for elem in self.edge_rels])])
 
-
-    def enrich_import_graph(self, edge_path: str) -> nx.Graph:
+    def enrich_import_graph(self, edge_path: str, backend: str = 'networkx') -> nx.Graph:
         """
         Import the graph: nodes with HGNC symbol and their type (DNA, RNA and Protein)
         Parameters
         ----------
         edge_path: str
                 The .tsv file of enriched edge_list.
+        backend: str
+                'networkx' or 'csr' for the compact array-backed graph.
         Returns
         -------
         nx.Graph
         """
         Data = pd.read_csv(edge_path, sep='\t', names=['node_1', 'node_2', 'metadata'])
 
-        mapping = {int(rel[0]): rel[1] + " " + rel[2] for rel in self.new_rels}
-        new_data = Data.replace(mapping)
+        rels = self.new_rels if self.enrich_table is None else self.enrich_table.itertuples(index=False, name=None)
+        mapping = {int(rel[0]): rel[1] + " " + rel[2] for rel in rels}
 
-        self.graph = nx.from_pandas_edgelist(new_data, source='node_1', target='node_2', edge_attr='metadata')
+        self.graph = graph_from_edge_list(Data, mapping, backend)
         return self.graph
 
-    def enrich_network(self, graph_output: str, print_edge_label: bool = True) -> None:
+    def enrich_network(self, graph_output: str, print_edge_label: bool = True, layout: str = 'auto',
+                       output_format: Optional[str] = None) -> None:
         """
         Generate network of enriched info from imported enriched graph.
         Parameters
@@ -759,11 +1034,15 @@ class Statistics(Network):
                     The final output of a graph
         print_edge_label: bool
                     If true, will print the edge label of two nodes
+        layout: str
+                    'spring', 'multilevel' or 'auto', see layout.compute_layout.
+        output_format: Optional[str]
+                    'html' for an interactive page, otherwise the image format, from the extension if not given.
         Returns
         -------
         None
         """
-        self.check_output(graph_output)
+        output_format = self.check_output(graph_output, output_format)
         # specify colors for nodes
         color = {}
         for node_id in self.graph.nodes():
@@ -779,86 +1058,61 @@ class Statistics(Network):
         edge_colors = 'black'
 
         # plot figure
-        plt.figure(figsize=(18, 18))
-        self.graph.pos = nx.spring_layout(self.graph, k=0.06)
-        nx.draw_networkx(self.graph, pos=self.graph.pos,
-                         with_labels=True,
-                         node_color=node_colors,
-                         edge_color=edge_colors,
-                         alpha=0.3)
-        if print_edge_label:
-            edge_label = {(node1, node2): type['metadata'] for (node1, node2, type) in self.graph.edges(data=True)}
-            nx.draw_networkx_edge_labels(self.graph, pos=self.graph.pos, edge_labels=edge_label)
-
-        plt.savefig(graph_output)
+        graph = self.networkx_graph()
+        self.draw(graph, graph_output, layout, print_edge_label, output_format, node_color=node_colors,
+                  edge_color=edge_colors)
 
 
-    def summary_statistics(self, enrich: bool = False) -> pandas.DataFrame:
+    def summary_statistics(self, enrich: bool = False, connectivity: str = 'exact', workers: int = 1,
+                           sample_size: Optional[int] = None, time_budget: Optional[float] = None) -> pandas.DataFrame:
         """
         Summary the statistics of network.
         Parameters
         ----------
         enrich: bool
                 Control if it is enriched.
+        connectivity: str
+                'exact' or 'sampled' average node connectivity, or 'none' to leave it out (NaN), see
+                connectivity.average_node_connectivity.
+        workers: int
+                number of processes computing the node connectivity of the connected components.
+        sample_size: Optional[int]
+                maximal number of edges of the sampled node connectivity.
+        time_budget: Optional[float]
+                seconds after which the sampled node connectivity stops.
         Returns
         -------
         pandas.DataFrame
-        The final summary of info in pandas file.
-        """
-        import math
-        number_of_nodes = self.graph.number_of_nodes()
-        number_of_edges = self.graph.number_of_edges()
-        density = number_of_edges / (number_of_nodes - 1)
-        local_node_connectivity = [nx.node_connectivity(self.graph, source, target) for source, target in self.graph.edges()]
-        number_of_node_pair = math.factorial(number_of_nodes) / (math.factorial(number_of_nodes - 2) * 2)
-        average_node_connectivity = float(sum(local_node_connectivity) / number_of_node_pair)
-        if enrich:
-            node_dna = []
-            node_rna = []
-            node_protein = []
-
-            for node_id in self.graph.nodes():
-                if node_id.split(" ")[1] == 'DNA':
-                    node_dna.append(node_id)
-                elif node_id.split(" ")[1] == 'RNA':
-                    node_rna.append(node_id)
-                elif node_id.split(" ")[1] == 'Protein':
-                    node_protein.append(node_id)
-
-            number_of_transcribed = 0
-            number_of_translated = 0
-            for node_1, node_2 in self.graph.edges():
-                if node_1.split(" ")[1] == 'DNA' and node_2.split(" ")[1] == 'RNA':
-                    number_of_transcribed += 1
-                elif node_1.split(" ")[1] == 'RNA' and node_2.split(" ")[1] == 'Protein':
-                    number_of_translated += 1
-            number_of_ppis = number_of_edges - number_of_transcribed - number_of_translated
-
-            d = {'Nodes': [number_of_nodes],
-                 'Nodes-DNA': [len(node_dna)],
-                 'Nodes-RNA': [len(node_rna)],
-                 'Nodes-Protein': [len(node_protein)],
-                 'Edges': [number_of_edges],
-                 'Edges-transcribed': [number_of_transcribed],
-                 'Edges-translated': [number_of_translated],
-                 'Edges-PPI': [number_of_ppis],
-                 'Density of Network': [density],
-                 'Average node connectivity': [average_node_connectivity]}
-        else:
-            d = {'Nodes': [number_of_nodes],
-                 'Nodes-DNA': 0,
-                 'Nodes-RNA': 0,
-                 'Nodes-Protein': [number_of_nodes],
-                 'Edges': [number_of_edges],
-                 'Edges-transcribed': 0,
-                 'Edges-translated': 0,
-                 'Edges-PPI': [number_of_edges],
-                 'Density of Network': [density],
-                 'Average node connectivity': [average_node_connectivity]}
-
-        df = pd.DataFrame(data = d)
+        The final summary of info in pandas file. The node connectivity with its confidence bounds is kept in
+        self.connectivity.
+        """
+        from .stats_engine import StatisticsEngine
+        engine = StatisticsEngine(workers, connectivity, sample_size, time_budget)
+        # node connectivity is not offered by the CSR backend.
+        df = engine.summary(self.networkx_graph(), enrich)
+        self.connectivity = engine.connectivity
         return df
 
+    def topology_metrics(self, metrics: Optional[Iterable[str]] = None,
+                         time_budget: Optional[float] = None) -> dict:
+        """
+        Degree distribution, clustering, components, diameter, assortativity and k-core of the network, computed on
+        its sparse adjacency matrix.
+        Parameters
+        ----------
+        metrics: Optional[Iterable[str]]
+                names of the metrics, see topology.METRICS, all of them if not given.
+        time_budget: Optional[float]
+                seconds per metric, after which a metric stops and reports an estimate.
+        Returns
+        -------
+        dict
+        The topology.Metric of every metric name.
+        """
+        from .topology import topology_metrics
+        # both backends are read directly, the CSR graph is not converted to networkx.
+        return topology_metrics(self.graph, metrics, time_budget)
+
 
     def export_stats(self, data: pandas.DataFrame, stats_output: str) -> None:
         """
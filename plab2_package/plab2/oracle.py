@@ -0,0 +1,219 @@
+"""Landmark distance oracle: bounds of shortest path lengths and connectivity of node pairs without a search."""
+
+import os
+import time
+import logging
+import numpy as np
+import pandas as pd
+import networkx as nx
+from collections import deque
+from scipy.sparse import csgraph
+from typing import Dict, Iterable, NamedTuple, Optional
+from .topology import adjacency
+from .layout import graph_fingerprint
+
+logger = logging.getLogger('oracle')
+
+ORACLE_LANDMARKS = 16
+ORACLE_SUFFIX = '.oracle.npz'
+# number of query latencies kept for the percentiles.
+LATENCY_WINDOW = 100_000
+
+
+class Estimate(NamedTuple):
+    """Shortest path length of a node pair: if it is connected, and the lower and upper bound of its distance."""
+    connected: bool
+    lower: Optional[int]
+    upper: Optional[int]
+
+    @property
+    def exact(self) -> bool:
+        return self.connected and self.lower == self.upper
+
+
+def oracle_path(edge_path: str) -> str:
+    """Location of the oracle persisted next to an edge list."""
+    return edge_path + ORACLE_SUFFIX
+
+
+def file_stat(path: str) -> str:
+    """Size and modification time of a file, an unchanged file keeps its oracle without hashing the network."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ''
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class DistanceOracle():
+    """
+    BFS distances from a few landmarks of the largest component and the component of every node.
+    By the triangle inequality, |d(l, u) - d(l, v)| <= d(u, v) <= d(l, u) + d(l, v) for every landmark l, so a
+    query costs a few array lookups. Nodes of different components are never connected.
+    """
+    def __init__(self, labels: np.ndarray, components: np.ndarray, landmarks: np.ndarray, distances: np.ndarray,
+                 fingerprint: str = '', number_of_landmarks: int = 0, edge_stat: str = ''):
+        self.labels = labels
+        self.index = pd.Index(labels)
+        self.components = components
+        self.landmarks = landmarks
+        # one row of landmark distances per node, -1 outside of the largest component.
+        self.distances = distances
+        # graph_fingerprint of the network, the oracle of a changed network is rebuilt.
+        self.fingerprint = fingerprint
+        # the number of landmarks asked for, a small component has fewer.
+        self.number_of_landmarks = number_of_landmarks
+        # file_stat of the edge list the oracle was checked against.
+        self.edge_stat = edge_stat
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @classmethod
+    def build(cls, graph, number_of_landmarks: int = ORACLE_LANDMARKS) -> 'DistanceOracle':
+        """
+        Label the components and search from the landmarks: the best connected nodes, alternating with the node
+        farthest from the landmarks chosen so far, which tightens the lower bounds.
+        Parameters
+        ----------
+        graph: nx.Graph or CSRGraph
+              the network.
+        number_of_landmarks: int
+              number of breadth first searches.
+        Returns
+        -------
+        DistanceOracle
+        """
+        started = time.perf_counter()
+        matrix, labels = adjacency(graph)
+        number, components = csgraph.connected_components(matrix, directed=False)
+        if not len(labels):
+            return cls(labels, components, np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.int16))
+        largest = components == np.argmax(np.bincount(components))
+        degrees = np.where(largest, np.diff(matrix.indptr), -1)
+        by_degree = iter(np.argsort(-degrees, kind='stable'))
+        nearest = np.where(largest, np.inf, -np.inf)
+        landmarks, rows = [], []
+        for count in range(min(number_of_landmarks, int(largest.sum()))):
+            if count % 2 == 0:
+                landmark = next(position for position in by_degree if position not in landmarks)
+            else:
+                landmark = int(np.argmax(nearest))
+            distance = csgraph.shortest_path(matrix, unweighted=True, directed=False, indices=landmark)
+            nearest = np.minimum(nearest, distance)
+            landmarks.append(int(landmark))
+            rows.append(distance)
+        distances = np.vstack(rows).T
+        distances[np.isinf(distances)] = -1
+        dtype = np.int16 if distances.max() < np.iinfo(np.int16).max else np.int32
+        logger.info(f"Distance oracle of {len(landmarks)} landmarks and {number} components is built in "
+                    f"{time.perf_counter() - started:.2f} s.")
+        return cls(labels, components.astype(np.int32), np.array(landmarks), np.ascontiguousarray(distances, dtype),
+                   number_of_landmarks=number_of_landmarks)
+
+    def save(self, path: str) -> None:
+        np.savez(path, labels=self.labels.astype(str), components=self.components, landmarks=self.landmarks,
+                 distances=self.distances, fingerprint=self.fingerprint,
+                 number_of_landmarks=self.number_of_landmarks, edge_stat=self.edge_stat)
+
+    @classmethod
+    def load(cls, path: str) -> 'DistanceOracle':
+        with np.load(path, allow_pickle=False) as data:
+            # oracles of former versions have no fingerprint or number of landmarks and are rebuilt.
+            fingerprint = str(data['fingerprint']) if 'fingerprint' in data else ''
+            number_of_landmarks = int(data['number_of_landmarks']) if 'number_of_landmarks' in data else 0
+            edge_stat = str(data['edge_stat']) if 'edge_stat' in data else ''
+            return cls(data['labels'].astype(object), data['components'], data['landmarks'], data['distances'],
+                       fingerprint, number_of_landmarks, edge_stat)
+
+    @classmethod
+    def load_or_build(cls, graph, edge_path: Optional[str],
+                      number_of_landmarks: int = ORACLE_LANDMARKS) -> 'DistanceOracle':
+        """
+        Load the oracle persisted next to the edge list, or build and persist it if it is missing or was built from
+        another network or with another number of landmarks. An edge list of the same size and modification time
+        keeps its oracle, otherwise the network is compared by its graph_fingerprint, so an edge list written again
+        with the same edges, e.g. by every 'plab2 path', keeps its oracle too.
+        Parameters
+        ----------
+        graph: nx.Graph or CSRGraph
+              the network imported from edge_path.
+        edge_path: Optional[str]
+              the edge list, if None the oracle is only built.
+        number_of_landmarks: int
+              number of landmarks of the oracle.
+        Returns
+        -------
+        DistanceOracle
+        """
+        if edge_path is None:
+            return cls.build(graph, number_of_landmarks)
+        edge_stat = file_stat(edge_path)
+        oracle, fingerprint = None, None
+        if os.path.exists(oracle_path(edge_path)):
+            oracle = cls.load(oracle_path(edge_path))
+            if oracle.number_of_landmarks != number_of_landmarks:
+                oracle = None
+            elif edge_stat and oracle.edge_stat == edge_stat:
+                return oracle
+            else:
+                fingerprint = graph_fingerprint(graph)
+                if oracle.fingerprint != fingerprint:
+                    oracle = None
+            if oracle is None:
+                logger.info(f"Distance oracle of {edge_path} is outdated.")
+        if oracle is None:
+            oracle = cls.build(graph, number_of_landmarks)
+            oracle.fingerprint = fingerprint or graph_fingerprint(graph)
+        # the same network in a rewritten edge list, the next call compares the file only.
+        oracle.edge_stat = edge_stat
+        try:
+            oracle.save(oracle_path(edge_path))
+        except OSError as error:
+            logger.warning(f"Distance oracle cannot be saved: {error}")
+        return oracle
+
+    def position(self, node) -> int:
+        """Node position of a label, raises nx.NodeNotFound like networkx."""
+        try:
+            return self.index.get_loc(node)
+        except KeyError:
+            raise nx.NodeNotFound(f"Node {node} is not in the graph.")
+
+    def query(self, source, target) -> Estimate:
+        """
+        Connectivity and distance bounds of two nodes.
+        Parameters
+        ----------
+        source, target:
+              labels of the nodes.
+        Returns
+        -------
+        Estimate
+        The bounds are None if the nodes are not connected, the upper bound is None if they are outside of the
+        largest component.
+        """
+        started = time.perf_counter()
+        i, j = self.position(source), self.position(target)
+        if self.components[i] != self.components[j]:
+            estimate = Estimate(False, None, None)
+        elif i == j:
+            estimate = Estimate(True, 0, 0)
+        else:
+            first, second = self.distances[i].astype(np.int64), self.distances[j].astype(np.int64)
+            reached = (first >= 0) & (second >= 0)
+            if reached.any():
+                estimate = Estimate(True, max(1, int(np.abs(first - second)[reached].max())),
+                                    int((first + second)[reached].min()))
+            else:
+                estimate = Estimate(True, 1, None)
+        self.latencies.append(time.perf_counter() - started)
+        return estimate
+
+    def connected(self, source, target) -> bool:
+        return self.query(source, target).connected
+
+    def latency(self, percentiles: Iterable[float] = (50, 90, 99)) -> Dict[str, float]:
+        """Percentiles of the latency of the recent queries in microseconds."""
+        if not self.latencies:
+            return {}
+        values = np.percentile(np.array(self.latencies) * 1e6, list(percentiles))
+        return {f"p{percentile:g}": float(value) for percentile, value in zip(percentiles, values)}
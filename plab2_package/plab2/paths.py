@@ -0,0 +1,101 @@
+"""Lazy enumeration of the shortest paths between two nodes by a bidirectional breadth first search."""
+
+import networkx as nx
+from itertools import islice
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+from .csr import CSRGraph
+
+
+def _expand(frontier: List, distance: Dict, neighbors: Callable[[Hashable], Iterable]) -> List:
+    """Next level of a breadth first search, the distances of its nodes are added."""
+    level = distance[frontier[0]] + 1
+    reached = []
+    for node in frontier:
+        for neighbor in neighbors(node):
+            if neighbor not in distance:
+                distance[neighbor] = level
+                reached.append(neighbor)
+    return reached
+
+
+def _meet(source, target, neighbors: Callable[[Hashable], Iterable]) -> Tuple[Dict, Dict, List]:
+    """
+    Search from both ends, always expanding the smaller frontier, until the searches meet.
+    Returns the distances from the source and from the target, and the middle nodes: the nodes of the last
+    expanded level which the other search reached at its last level. Every shortest path passes exactly one of them.
+    """
+    forward, backward = {source: 0}, {target: 0}
+    forward_frontier, backward_frontier = [source], [target]
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier = _expand(forward_frontier, forward, neighbors)
+            level = backward[backward_frontier[0]]
+            middle = [node for node in forward_frontier if backward.get(node) == level]
+        else:
+            backward_frontier = _expand(backward_frontier, backward, neighbors)
+            level = forward[forward_frontier[0]]
+            middle = [node for node in backward_frontier if forward.get(node) == level]
+        if middle:
+            return forward, backward, middle
+    raise nx.NetworkXNoPath(f"Target {target} cannot be reached from source {source}.")
+
+
+def _walk_back(node, distance: Dict, neighbors: Callable[[Hashable], Iterable]) -> Iterator[List]:
+    """Paths from a node to the start of a search along decreasing distance, depth first."""
+    stack = [[node]]
+    while stack:
+        path = stack.pop()
+        last = path[-1]
+        if distance[last] == 0:
+            yield path
+            continue
+        previous = distance[last] - 1
+        stack.extend(path + [neighbor] for neighbor in neighbors(last) if distance.get(neighbor) == previous)
+
+
+def _paths(source, target, neighbors: Callable[[Hashable], Iterable]) -> Iterator[List]:
+    if source == target:
+        yield [source]
+        return
+    forward, backward, middle = _meet(source, target, neighbors)
+    for node in middle:
+        for head in _walk_back(node, forward, neighbors):
+            for tail in _walk_back(node, backward, neighbors):
+                yield head[::-1] + tail[1:]
+
+
+def shortest_paths(graph, source, target, max_paths: Optional[int] = None) -> Iterator[List]:
+    """
+    Generate the shortest paths between two nodes, lazily: the searches from both ends stop where they meet and the
+    paths are assembled one by one from the middle, so the first path costs about the size of the two search
+    frontiers and not the number of shortest paths.
+    Parameters
+    ----------
+    graph: nx.Graph or CSRGraph
+          the network.
+    source, target:
+          labels of the nodes.
+    max_paths: Optional[int]
+          stop after this many paths, all of them if not given.
+    Returns
+    -------
+    Iterator[List]
+    Node label lists from source to target. Like nx.all_shortest_paths, nx.NodeNotFound or nx.NetworkXNoPath is
+    raised when the first path is requested.
+    """
+    paths = _csr_paths(graph, source, target) if isinstance(graph, CSRGraph) else _nx_paths(graph, source, target)
+    return islice(paths, max_paths)
+
+
+def _nx_paths(graph: nx.Graph, source, target) -> Iterator[List]:
+    for node in (source, target):
+        if node not in graph:
+            raise nx.NodeNotFound(f"Node {node} is not in the graph.")
+    yield from _paths(source, target, graph.neighbors)
+
+
+def _csr_paths(graph: CSRGraph, source, target) -> Iterator[List]:
+    """The paths searched on node positions of the CSR graph and translated to labels."""
+    start, end = graph.position(source), graph.position(target)
+    for path in _paths(start, end, lambda position: graph.neighbor_positions(position).tolist()):
+        yield list(graph.labels[path])
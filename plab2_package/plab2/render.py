@@ -0,0 +1,186 @@
+"""Drawing of networks of any size: nodes and edges as single matplotlib collections, labels by level of detail."""
+
+import time
+import logging
+import numpy as np
+import networkx as nx
+from itertools import chain
+from typing import Dict, Hashable, Iterable, Optional, Sequence, Union
+
+logger = logging.getLogger('render')
+
+# at most this many node labels are drawn: the highlighted nodes first, then the best connected.
+MAX_LABELS = 200
+# edge labels are only drawn between labeled nodes, at most this many.
+MAX_EDGE_LABELS = 500
+# above this number of edges they are binned into a density image instead of drawn as lines.
+RASTER_EDGES = 200_000
+# pixels per side of the density image.
+RASTER_PIXELS = 2048
+# maximal number of points sampled along one edge of the density image.
+RASTER_SAMPLES = 16
+# node marker area in points^2 of the whole figure, shared by the nodes of large networks.
+NODE_AREA = 60_000
+EDGE_CHUNK_SIZE = 200_000
+
+
+def figure_size(number_of_nodes: int) -> float:
+    """Side of the square figure in inches, from 8 for small networks up to 18."""
+    return float(np.clip(0.6 * np.sqrt(number_of_nodes), 8, 18))
+
+
+def label_nodes(nodes: Sequence[Hashable], degrees: np.ndarray, highlight: Iterable[Hashable] = (),
+                max_labels: int = MAX_LABELS) -> list:
+    """
+    The nodes which get a label: all of them for small networks, otherwise the highlighted nodes and the best
+    connected ones, up to max_labels.
+    """
+    if len(nodes) <= max_labels:
+        return list(nodes)
+    chosen = list(dict.fromkeys(highlight))[:max_labels]
+    taken = set(chosen)
+    for position in np.argsort(-degrees, kind='stable'):
+        if len(chosen) >= max_labels:
+            break
+        if nodes[position] not in taken:
+            chosen.append(nodes[position])
+    return chosen
+
+
+def edge_density(segments: np.ndarray, low: np.ndarray, span: float, pixels: int = RASTER_PIXELS) -> np.ndarray:
+    """
+    Number of edges passing every pixel, by sampling points along each edge (more for longer edges).
+    Parameters
+    ----------
+    segments: np.ndarray
+             start and end of every edge, shape (edges, 2, 2).
+    low: np.ndarray
+             lower left corner of the drawing.
+    span: float
+             side of the drawing.
+    pixels: int
+             pixels per side of the image.
+    Returns
+    -------
+    np.ndarray
+    The image, rows from bottom to top.
+    """
+    image = np.zeros(pixels * pixels)
+    scale = (pixels - 1) / span
+    for start in range(0, len(segments), EDGE_CHUNK_SIZE):
+        chunk = ((segments[start:start + EDGE_CHUNK_SIZE] - low) * scale).astype(np.float32)
+        lengths = np.sqrt(((chunk[:, 1] - chunk[:, 0]) ** 2).sum(axis=1))
+        # about a sample per pixel the edge crosses, rounded up to a power of two so the edges of the same number of
+        # samples are sampled together. Long edges are sampled sparser.
+        samples = np.clip(2 ** np.ceil(np.log2(lengths + 1)), 2, RASTER_SAMPLES).astype(np.int64)
+        for number in np.unique(samples):
+            ends = chunk[samples == number]
+            t = np.linspace(0, 1, number, dtype=np.float32)[None, :, None]
+            points = np.rint(ends[:, None, 0] + t * (ends[:, None, 1] - ends[:, None, 0])).astype(np.int64)
+            # every sample weighs 1 / samples, so each edge adds 1 in total.
+            image += np.bincount((points[..., 1] * pixels + points[..., 0]).ravel(), minlength=pixels * pixels) / number
+    return image.reshape(pixels, pixels)
+
+
+def render_network(graph: nx.Graph,
+                   positions: Dict[Hashable, np.ndarray],
+                   output,
+                   node_color: Union[str, Sequence[str]] = 'red',
+                   edge_color: Union[str, Sequence[str]] = 'black',
+                   alpha: float = 0.3,
+                   node_size: float = 300,
+                   font_size: float = 12,
+                   highlight: Iterable[Hashable] = (),
+                   edge_labels: Optional[Dict[tuple, str]] = None,
+                   max_labels: int = MAX_LABELS,
+                   raster: Optional[bool] = None,
+                   output_format: Optional[str] = None) -> None:
+    """
+    Draw a network with one collection of nodes and one of edges, and save it.
+    Parameters
+    ----------
+    graph: nx.Graph
+          the network.
+    positions: Dict[Hashable, np.ndarray]
+          position of every node, see layout.compute_layout.
+    output:
+          file name or file object of the image.
+    node_color, edge_color: Union[str, Sequence[str]]
+          one color, or a color per node (in graph.nodes() order) and per edge (in graph.edges() order).
+    alpha: float
+          transparency of nodes and edges.
+    node_size: float
+          marker area of small networks, large networks share NODE_AREA among their nodes.
+    font_size: float
+          size of the labels.
+    highlight: Iterable[Hashable]
+          nodes which are always labeled, e.g. of a shortest path.
+    edge_labels: Optional[Dict[tuple, str]]
+          labels of the edges, only drawn between labeled nodes.
+    max_labels: int
+          maximal number of node labels.
+    raster: Optional[bool]
+          draw the edges as a density image, by default if there are more than RASTER_EDGES edges.
+    output_format: Optional[str]
+          image format, from the file name if not given.
+    Returns
+    -------
+    None
+    """
+    # a figure of its own canvas, the pyplot backend and figures of the process are left alone.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+
+    started = time.perf_counter()
+    nodes = list(graph.nodes())
+    index = {node: position for position, node in enumerate(nodes)}
+    coordinates = np.array([positions[node] for node in nodes], dtype=np.float64).reshape(-1, 2)
+    edges = np.fromiter(map(index.__getitem__, chain.from_iterable(graph.edges())), dtype=np.int64,
+                        count=2 * graph.number_of_edges()).reshape(-1, 2)
+    segments = coordinates[edges]
+    degrees = np.bincount(edges.ravel(), minlength=len(nodes))
+    raster = len(edges) > RASTER_EDGES if raster is None else raster
+
+    size = figure_size(len(nodes))
+    figure = Figure(figsize=(size, size))
+    FigureCanvasAgg(figure)
+    axes = figure.subplots()
+    # the axes fill the figure, the margin is part of the limits.
+    figure.subplots_adjust(0, 0, 1, 1)
+    axes.set_axis_off()
+    low = coordinates.min(axis=0) if len(nodes) else np.zeros(2)
+    span = max(float((coordinates.max(axis=0) - low).max()) if len(nodes) else 1.0, 1e-9)
+    margin = 0.05 * span
+    axes.set_xlim(low[0] - margin, low[0] + span + margin)
+    axes.set_ylim(low[1] - margin, low[1] + span + margin)
+    axes.set_aspect('equal')
+
+    if raster and len(edges):
+        image = edge_density(segments, low, span)
+        axes.imshow(np.log1p(image), origin='lower', cmap='Greys', interpolation='nearest',
+                    extent=(low[0], low[0] + span, low[1], low[1] + span), alpha=min(1.0, 3 * alpha))
+    elif len(edges):
+        axes.add_collection(LineCollection(segments, colors=edge_color, linewidths=1.0 if len(edges) < 10_000 else 0.3,
+                                           alpha=alpha, zorder=1))
+    marker = min(node_size, max(1.0, NODE_AREA / max(len(nodes), 1)))
+    axes.scatter(coordinates[:, 0], coordinates[:, 1], s=marker, c=node_color, alpha=alpha, linewidths=0, zorder=2)
+
+    labeled = label_nodes(nodes, degrees, highlight, max_labels)
+    for node in labeled:
+        x, y = coordinates[index[node]]
+        axes.text(x, y, str(node), fontsize=font_size, ha='center', va='center', zorder=3, clip_on=True)
+    if edge_labels:
+        labeled_set = set(labeled)
+        drawn = 0
+        for (u, v), text in edge_labels.items():
+            if drawn >= MAX_EDGE_LABELS:
+                break
+            if u in labeled_set and v in labeled_set:
+                (x, y) = (coordinates[index[u]] + coordinates[index[v]]) / 2
+                axes.text(x, y, str(text), fontsize=font_size * 0.8, ha='center', va='center', zorder=3,
+                          bbox=dict(boxstyle='round', ec='white', fc='white', alpha=0.6), clip_on=True)
+                drawn += 1
+    figure.savefig(output, format=output_format)
+    logger.info(f"Network of {len(nodes)} nodes and {len(edges)} edges is drawn {'as density image ' if raster else ''}"
+                f"with {len(labeled)} labels in {time.perf_counter() - started:.2f} s.")
@@ -1,9 +1,6 @@
 import os
 from pathlib import Path
 import logging
-from sqlalchemy import Column, Integer, String, create_engine
-from sqlalchemy.orm import declarative_base
-from sqlalchemy_utils.functions import database_exists
 
 
 # identify home directory
@@ -13,6 +10,9 @@ home_dir = Path.home()
 # join paths
 HGNC_data_path = os.path.join(str(home_dir), ".wangd0", "data", "HGNC")
 UniProt_data_path = os.path.join(str(home_dir), ".wangd0", "data", "UniProt")
+HGNC_index_path = os.path.join(str(home_dir), ".wangd0", "data", "hgnc_index.db")
+cache_path = os.path.join(str(home_dir), ".wangd0", "data", "cache.db")
+layouts_path = os.path.join(str(home_dir), ".wangd0", "data", "layouts")
 logs_path = os.path.join(str(home_dir), ".wangd0", "logs")
 
 
@@ -21,13 +21,9 @@ os.makedirs(logs_path, mode=0o777, exist_ok=True)
 os.makedirs(HGNC_data_path, mode=0o777, exist_ok=True)
 os.makedirs(UniProt_data_path, mode=0o777, exist_ok=True)
 
-# create SQLite database
+# default SQLite database, it is created by models.get_engine on first use.
 database_path = os.path.join(str(home_dir), ".wangd0", "plab2.db")
 CONN_STRING = "sqlite:///" + database_path
-if not database_exists(CONN_STRING):
-    engine = create_engine(CONN_STRING)
-    Base = declarative_base()
-    Base.metadata.create_all(bind=engine)
 
 
 
@@ -0,0 +1,130 @@
+"""Summary statistics of a network, computed per connected component and merged."""
+
+import logging
+import numpy as np
+import pandas as pd
+import networkx as nx
+from typing import Dict, List, Optional
+from .connectivity import Connectivity, average_node_connectivity, component_connectivity, connected_components, \
+    number_of_node_pairs
+
+logger = logging.getLogger('stats_engine')
+
+# columns of the summary which are counted per component and summed.
+COUNTS = ('Nodes', 'Nodes-DNA', 'Nodes-RNA', 'Nodes-Protein', 'Edges', 'Edges-transcribed', 'Edges-translated')
+
+
+class StatisticsEngine():
+    """
+    Decompose the graph into its connected components, count nodes and edges per component and schedule the node
+    connectivity of the components on a process pool, then merge the results into the summary of the whole graph.
+    """
+    def __init__(self,
+                 workers: int = 1,
+                 connectivity: str = 'exact',
+                 sample_size: Optional[int] = None,
+                 time_budget: Optional[float] = None):
+        self.workers = workers
+        self.connectivity_mode = connectivity
+        self.sample_size = sample_size
+        self.time_budget = time_budget
+        self.components = None
+        self.component_counts = None
+        self.connectivity = None
+
+    def count(self, graph: nx.Graph, components: List[List], enrich: bool) -> pd.DataFrame:
+        """
+        Nodes per molecule type, edges and transcribed/translated edges of each component.
+        Parameters
+        ----------
+        graph: nx.Graph
+              the network.
+        components: List[List]
+              node lists of the connected components.
+        enrich: bool
+              if the nodes are labeled '<symbol> <molecule>'.
+        Returns
+        -------
+        pandas.DataFrame
+        One row per component with the COUNTS columns.
+        """
+        label = {node: index for index, nodes in enumerate(components) for node in nodes}
+        counts = np.zeros((len(components), len(COUNTS)), dtype=np.int64)
+        molecule_column = {'DNA': 1, 'RNA': 2, 'Protein': 3}
+        for node, index in label.items():
+            counts[index, 0] += 1
+            if enrich:
+                column = molecule_column.get(node.split(" ")[1])
+                if column:
+                    counts[index, column] += 1
+        for node_1, node_2 in graph.edges():
+            index = label[node_1]
+            counts[index, 4] += 1
+            if enrich:
+                types = (node_1.split(" ")[1], node_2.split(" ")[1])
+                if types == ('DNA', 'RNA'):
+                    counts[index, 5] += 1
+                elif types == ('RNA', 'Protein'):
+                    counts[index, 6] += 1
+        if not enrich:
+            counts[:, 3] = counts[:, 0]
+        return pd.DataFrame(counts, columns=list(COUNTS))
+
+    def summary(self, graph: nx.Graph, enrich: bool = False) -> pd.DataFrame:
+        """
+        Summary of the network, the same table as Statistics.summary_statistics.
+        Parameters
+        ----------
+        graph: nx.Graph
+              the network.
+        enrich: bool
+              if the nodes are labeled '<symbol> <molecule>'.
+        Returns
+        -------
+        pandas.DataFrame
+        The summary of the whole network. The per component counts are kept in self.component_counts, together
+        with the connectivity sums of the exact mode.
+        """
+        self.components = connected_components(graph)
+        self.component_counts = self.count(graph, self.components, enrich)
+        number_of_nodes = graph.number_of_nodes()
+        pairs = number_of_node_pairs(number_of_nodes)
+        if self.connectivity_mode == 'exact':
+            totals = component_connectivity(graph, self.components, self.workers)
+            self.component_counts['Connectivity'] = totals
+            average = float(sum(totals) / pairs) if pairs else 0.0
+            self.connectivity = Connectivity(average, average, average, graph.number_of_edges(),
+                                             graph.number_of_edges())
+        else:
+            self.connectivity = average_node_connectivity(graph, self.connectivity_mode, self.workers,
+                                                          self.sample_size, self.time_budget)
+        logger.info(f"Statistics of {len(self.components)} components are computed.")
+        return self.merge(self.component_counts, enrich)
+
+    def merge(self, component_counts: pd.DataFrame, enrich: bool) -> pd.DataFrame:
+        totals: Dict[str, int] = {column: int(component_counts[column].sum()) for column in COUNTS}
+        number_of_nodes, number_of_edges = totals['Nodes'], totals['Edges']
+        density = number_of_edges / (number_of_nodes - 1) if number_of_nodes > 1 else 0.0
+        if enrich:
+            d = {'Nodes': [number_of_nodes],
+                 'Nodes-DNA': [totals['Nodes-DNA']],
+                 'Nodes-RNA': [totals['Nodes-RNA']],
+                 'Nodes-Protein': [totals['Nodes-Protein']],
+                 'Edges': [number_of_edges],
+                 'Edges-transcribed': [totals['Edges-transcribed']],
+                 'Edges-translated': [totals['Edges-translated']],
+                 'Edges-PPI': [number_of_edges - totals['Edges-transcribed'] - totals['Edges-translated']],
+                 'Density of Network': [density],
+                 'Average node connectivity': [self.connectivity.average]}
+        else:
+            d = {'Nodes': [number_of_nodes],
+                 'Nodes-DNA': 0,
+                 'Nodes-RNA': 0,
+                 'Nodes-Protein': [number_of_nodes],
+                 'Edges': [number_of_edges],
+                 'Edges-transcribed': 0,
+                 'Edges-translated': 0,
+                 'Edges-PPI': [number_of_edges],
+                 'Density of Network': [density],
+                 'Average node connectivity': [self.connectivity.average]}
+        return pd.DataFrame(data = d)
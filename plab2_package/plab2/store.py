@@ -0,0 +1,178 @@
+"""In-process store of imported networks, keyed by the content of their files, for the Flask app."""
+
+import os
+import copy
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from .csr import CSRGraph
+
+logger = logging.getLogger('store')
+
+# maximal number of stored networks, the least recently used are removed.
+GRAPH_STORE_ENTRIES = 8
+# maximal estimated memory of the stored networks in MB.
+GRAPH_STORE_MB = 1024
+# estimated bytes of a node and an edge of an nx.Graph with its node dictionary and relations.
+NODE_BYTES = 1000
+EDGE_BYTES = 800
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def estimate_bytes(network) -> int:
+    """Estimated memory of an imported network, from the number of nodes and edges of its graph."""
+    graph = network.graph
+    if graph is None:
+        return 0
+    if isinstance(graph, CSRGraph):
+        return sum(array.nbytes for array in vars(graph).values() if hasattr(array, 'nbytes')) + \
+            NODE_BYTES * graph.number_of_nodes()
+    return NODE_BYTES * graph.number_of_nodes() + EDGE_BYTES * graph.number_of_edges()
+
+
+class StoredGraph():
+    """
+    An imported network with the results computed from it, e.g. its statistics.
+    The results are computed without holding the lock, which only guards publishing them, so a long computation of a
+    background job does not block the requests of the same network.
+    """
+    def __init__(self, key: str, network, size: int):
+        self.key = key
+        self.network = network
+        self.size = size
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def cached(self, name: str, compute: Callable):
+        """The result of compute, computed on first use. Concurrent first uses may compute it twice, one is kept."""
+        with self.lock:
+            if name in self.results:
+                return self.results[name]
+        result = compute()
+        with self.lock:
+            return self.results.setdefault(name, result)
+
+    @property
+    def layout(self) -> dict:
+        """Node positions of the network, kept by the network after the first drawing."""
+        # Network.layout replaces the kept positions only once the new ones are computed.
+        return self.network.layout(self.network.networkx_graph())
+
+    def view(self):
+        """
+        A shallow copy of the network for one request: it shares the graph and its layout, but the changes of the
+        request, e.g. its shortest path, are not seen by the others.
+        """
+        return copy.copy(self.network)
+
+
+class GraphStore():
+    """
+    Least recently used networks, keyed by the SHA-256 of their files. The digests are kept by the size and
+    modification time of the files, so the files are only read again after they changed.
+    """
+    def __init__(self, max_entries: int = GRAPH_STORE_ENTRIES, max_bytes: int = GRAPH_STORE_MB << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        # one lock per network being imported, concurrent requests of the same files wait for one import.
+        self.loading: Dict[str, threading.Lock] = {}
+        self.lock = threading.Lock()
+
+    def fingerprint(self, paths: Sequence[str]) -> str:
+        """Hash of the content of the files in the given order."""
+        digest = hashlib.sha256()
+        for path in paths:
+            stat = os.stat(path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+            with self.lock:
+                known = self.digests.get(path)
+            if known is None or known[0] != signature:
+                known = (signature, file_digest(path))
+                with self.lock:
+                    self.digests[path] = known
+            digest.update(known[1].encode())
+        return digest.hexdigest()
+
+    def key(self, paths: Sequence[str], kind: str = '') -> str:
+        """Key of the network of the files, see get."""
+        return f"{kind}-{self.fingerprint(paths)}"
+
+    @property
+    def size(self) -> int:
+        return sum(entry.size for entry in self.entries.values())
+
+    def get(self, paths: Sequence[str], load: Callable, kind: str = '') -> StoredGraph:
+        """
+        The stored network of the files, imported by load() if it is not stored.
+        Parameters
+        ----------
+        paths: Sequence[str]
+              the imported files.
+        load: Callable
+              returns the network imported from the files.
+        kind: str
+              distinguishes networks imported differently from the same files.
+        Returns
+        -------
+        StoredGraph
+        """
+        key = self.key(paths, kind)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+            loading = self.loading.setdefault(key, threading.Lock())
+        with loading:
+            with self.lock:
+                entry = self.entries.get(key)
+            if entry is not None:
+                return entry
+            started = time.perf_counter()
+            try:
+                network = load()
+                entry = StoredGraph(key, network, estimate_bytes(network))
+                with self.lock:
+                    self.entries[key] = entry
+                    self.evict()
+            finally:
+                with self.lock:
+                    self.loading.pop(key, None)
+        logger.info(f"Network {key[:16]} of ~{entry.size >> 20} MB is imported in "
+                    f"{time.perf_counter() - started:.2f} s.")
+        return entry
+
+    def evict(self) -> None:
+        """Remove the least recently used networks until the limits are kept, the newest network is always kept."""
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.size > self.max_bytes):
+            key, entry = self.entries.popitem(last=False)
+            logger.info(f"Network {key[:16]} of ~{entry.size >> 20} MB is removed from the store.")
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.digests.clear()
+
+
+_graph_store = None
+
+
+def get_graph_store() -> GraphStore:
+    """The graph store shared by the process, limited to PLAB2_GRAPH_STORE_MB or GRAPH_STORE_MB."""
+    global _graph_store
+    if _graph_store is None:
+        _graph_store = GraphStore(max_bytes=int(os.environ.get("PLAB2_GRAPH_STORE_MB", GRAPH_STORE_MB)) << 20)
+    return _graph_store
@@ -0,0 +1,213 @@
+"""Topology metrics of large networks, vectorized over a scipy.sparse adjacency matrix."""
+
+import time
+import logging
+import numpy as np
+import pandas as pd
+import networkx as nx
+import scipy.sparse as sp
+from scipy.sparse import csgraph
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+from .csr import CSRGraph
+
+logger = logging.getLogger('topology')
+
+METRICS = ('degree', 'clustering', 'components', 'diameter', 'assortativity', 'kcore')
+# number of nodes whose triangles are counted at once.
+CLUSTERING_BATCH_SIZE = 4096
+# breadth first searches of the diameter estimate.
+DIAMETER_SWEEPS = 8
+
+
+class Metric(NamedTuple):
+    """A metric: its value, details such as a distribution, if it is exact, and the seconds it took."""
+    value: object
+    details: object
+    exact: bool
+    seconds: float
+
+
+def adjacency(graph) -> Tuple[sp.csr_matrix, np.ndarray]:
+    """
+    Symmetric 0/1 adjacency matrix of a networkx or CSR graph, without self-loops.
+    Parameters
+    ----------
+    graph: nx.Graph or CSRGraph
+          the network.
+    Returns
+    -------
+    Tuple[sp.csr_matrix, np.ndarray]
+    The adjacency matrix and the node label of every row.
+    """
+    if isinstance(graph, CSRGraph):
+        labels = graph.labels
+        matrix = sp.csr_matrix((np.ones(len(graph.indices), dtype=np.int32), graph.indices, graph.indptr),
+                               shape=(len(labels), len(labels)))
+    else:
+        # fromiter keeps tuple labels (e.g. of grid graphs) as single objects.
+        labels = np.fromiter(graph.nodes(), dtype=object, count=graph.number_of_nodes())
+        matrix = sp.csr_matrix(nx.to_scipy_sparse_array(graph, nodelist=list(labels), weight=None, dtype=np.int32))
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    matrix.data[:] = 1
+    return matrix, labels
+
+
+class Budget():
+    """Time budget of one metric."""
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def exceeded(self) -> bool:
+        return self.seconds is not None and self.elapsed > self.seconds
+
+
+def degree_distribution(matrix: sp.csr_matrix, budget: Budget) -> Metric:
+    """Mean degree, with the number of nodes of every degree."""
+    degrees = np.diff(matrix.indptr)
+    counts = np.bincount(degrees)
+    details = pd.DataFrame({'degree': np.flatnonzero(counts), 'nodes': counts[counts > 0]})
+    return Metric(float(degrees.mean()) if len(degrees) else 0.0, details, True, budget.elapsed)
+
+
+def clustering(matrix: sp.csr_matrix, budget: Budget, seed: Optional[int] = None) -> Metric:
+    """
+    Average clustering coefficient (nodes of degree < 2 count as 0, like nx.average_clustering), with the transitivity.
+    Triangles are counted for batches of nodes in random order, if the budget runs out the average of the counted
+    nodes is an estimate.
+    """
+    number_of_nodes = matrix.shape[0]
+    degrees = np.diff(matrix.indptr).astype(np.float64)
+    order = np.random.default_rng(seed).permutation(number_of_nodes)
+    triangles = np.zeros(number_of_nodes)
+    counted = 0
+    for start in range(0, number_of_nodes, CLUSTERING_BATCH_SIZE):
+        if counted and budget.exceeded:
+            break
+        rows = order[start:start + CLUSTERING_BATCH_SIZE]
+        block = matrix[rows]
+        # twice the triangles of a node: its neighbors' adjacency restricted to its neighbors.
+        triangles[rows] = np.asarray((block @ matrix).multiply(block).sum(axis=1)).ravel() / 2
+        counted += len(rows)
+    nodes = order[:counted]
+    pairs = degrees[nodes] * (degrees[nodes] - 1)
+    local = np.divide(2 * triangles[nodes], pairs, out=np.zeros(counted), where=pairs > 0)
+    average = float(local.mean()) if counted else 0.0
+    triads = float((degrees[nodes] * (degrees[nodes] - 1)).sum())
+    transitivity = float(triangles[nodes].sum() * 2 / triads) if triads else 0.0
+    return Metric(average, {'transitivity': transitivity, 'counted nodes': counted},
+                  counted == number_of_nodes, budget.elapsed)
+
+
+def components(matrix: sp.csr_matrix, budget: Budget) -> Metric:
+    """Number of connected components, with their sizes, largest first."""
+    number, labels = csgraph.connected_components(matrix, directed=False)
+    sizes = np.sort(np.bincount(labels))[::-1]
+    return Metric(int(number), sizes, True, budget.elapsed)
+
+
+def diameter(matrix: sp.csr_matrix, budget: Budget, sweeps: int = DIAMETER_SWEEPS) -> Metric:
+    """
+    Lower bound of the diameter of the largest component by repeated double sweeps: a breadth first search from the
+    farthest node found so far. It is exact for trees and usually for networks with a few long paths.
+    The details are the eccentricities found by each sweep.
+    """
+    if matrix.shape[0] == 0:
+        return Metric(0, [], True, budget.elapsed)
+    number, labels = csgraph.connected_components(matrix, directed=False)
+    largest = np.flatnonzero(labels == np.argmax(np.bincount(labels)))
+    sub = matrix[largest][:, largest]
+    node = int(np.argmax(np.diff(sub.indptr)))
+    found = []
+    for _ in range(sweeps):
+        if found and budget.exceeded:
+            break
+        distances = csgraph.shortest_path(sub, unweighted=True, directed=False, indices=node)
+        node = int(np.argmax(distances))
+        found.append(int(distances[node]))
+    return Metric(max(found), found, False, budget.elapsed)
+
+
+def assortativity(matrix: sp.csr_matrix, budget: Budget) -> Metric:
+    """Degree assortativity: the Pearson correlation of the degrees at both ends of the edges."""
+    degrees = np.diff(matrix.indptr).astype(np.float64)
+    coo = matrix.tocoo()
+    x, y = degrees[coo.row], degrees[coo.col]
+    value = float(np.corrcoef(x, y)[0, 1]) if len(x) > 1 and x.std() > 0 else float('nan')
+    return Metric(value, None, True, budget.elapsed)
+
+
+def kcore(matrix: sp.csr_matrix, budget: Budget) -> Metric:
+    """
+    Core number of every node by vectorized peeling: for k = 1, 2, ... the nodes with fewer than k remaining
+    neighbors are removed together until none is left. The value is the largest core number (the degeneracy).
+    If the budget runs out, the remaining nodes keep the current k as a lower bound.
+    """
+    number_of_nodes = matrix.shape[0]
+    core = np.zeros(number_of_nodes, dtype=np.int64)
+    alive = np.ones(number_of_nodes, dtype=bool)
+    degrees = np.diff(matrix.indptr).astype(np.int64)
+    k = 0
+    exact = True
+    while alive.any():
+        k = max(k + 1, int(degrees[alive].min()))
+        while True:
+            removed = alive & (degrees < k)
+            if not removed.any():
+                break
+            core[removed] = k - 1
+            alive &= ~removed
+            degrees -= matrix @ removed.astype(np.int64)
+        if budget.exceeded and alive.any():
+            core[alive] = k
+            exact = False
+            break
+    return Metric(int(core.max()) if number_of_nodes else 0, core, exact, budget.elapsed)
+
+
+FUNCTIONS: Dict[str, Callable[[sp.csr_matrix, Budget], Metric]] = {
+    'degree': degree_distribution, 'clustering': clustering, 'components': components,
+    'diameter': diameter, 'assortativity': assortativity, 'kcore': kcore}
+
+
+def topology_metrics(graph, metrics: Optional[Iterable[str]] = None,
+                     time_budget: Optional[float] = None) -> Dict[str, Metric]:
+    """
+    Compute topology metrics of a network.
+    Parameters
+    ----------
+    graph: nx.Graph or CSRGraph
+          the network.
+    metrics: Optional[Iterable[str]]
+          names of the metrics, see METRICS, all of them if not given.
+    time_budget: Optional[float]
+          seconds per metric, after which a metric stops and reports an estimate.
+    Returns
+    -------
+    Dict[str, Metric]
+    The result of every metric.
+    """
+    metrics = list(metrics) if metrics is not None else list(METRICS)
+    unknown = [metric for metric in metrics if metric not in FUNCTIONS]
+    if unknown:
+        raise ValueError(f"Unknown metrics {unknown}, choose from {', '.join(METRICS)}.")
+    matrix, labels = adjacency(graph)
+    results = {}
+    for metric in metrics:
+        results[metric] = FUNCTIONS[metric](matrix, Budget(time_budget))
+        logger.info(f"{metric} is computed in {results[metric].seconds:.3f} s.")
+    return results
+
+
+def metrics_table(results: Dict[str, Metric]) -> pd.DataFrame:
+    """One row per metric with its value, if it is exact and the seconds it took."""
+    return pd.DataFrame({'Metric': list(results),
+                         'Value': [result.value for result in results.values()],
+                         'Exact': [result.exact for result in results.values()],
+                         'Seconds': [round(result.seconds, 3) for result in results.values()]})
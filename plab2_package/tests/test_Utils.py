@@ -1,8 +1,6 @@
 """Tests for the Utils."""
 
-import os
 from plab2.Utils import Profiler
-from plab2.startup import HGNC_data_path, UniProt_data_path
 HGNC_symbol = "RPL10"
 accession_number = "O00483"
 p = Profiler(HGNC_symbol)
@@ -12,20 +10,12 @@ class TestUtils:
     def test_request(self):
         """Tests function for downloading data from HGNC."""
         p.request()
-        path_root = HGNC_data_path
-        file_name = f"/{HGNC_symbol}.json"
-        path = path_root + file_name
-        assert os.path.isfile(path)
-        assert os.stat(path).st_size != 0
+        assert p.cache.get("hgnc", HGNC_symbol)
 
     def test_request_uniprot(self):
         """Tests function for downloading data from UniProt."""
         p.request_uniprot(accession_number)
-        path_root_ = UniProt_data_path
-        file_name_ = f"/{accession_number}.fasta"
-        path_ = path_root_ + file_name_
-        assert os.path.isfile(path_)
-        assert os.stat(path_).st_size != 0
+        assert p.cache.get("uniprot", accession_number)
 
     def test_extract(self):
         """Test for extract HGNC info from cache file."""
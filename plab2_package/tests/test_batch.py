@@ -0,0 +1,62 @@
+"""Tests for the batch path queries."""
+import json
+import os
+import networkx as nx
+import pytest
+from plab2.batch import answer_pairs, read_pairs, write_results
+from plab2.oracle import DistanceOracle
+
+graph = nx.relabel_nodes(nx.les_miserables_graph(), str)
+graph.add_edge('A', 'B')
+pairs = [('Valjean', 'Napoleon'), ('Valjean', 'A'), ('Valjean', 'unknown'), ('Cosette', 'Javert')] * 30
+
+
+class TestBatch:
+    """Tests the answers in one and in several processes, and the output files."""
+    def test_read_pairs(self, tmp_path):
+        """Tests tab and comma separated pairs with a header and comments."""
+        path = tmp_path / "pairs.tsv"
+        path.write_text("source\ttarget\n# comment\nValjean\tNapoleon\n\nCosette, Javert\n")
+        assert list(read_pairs(str(path))) == [('Valjean', 'Napoleon'), ('Cosette', 'Javert')]
+
+    def test_answer_pairs(self):
+        """Tests the results keep the order of the pairs, with and without a process pool and an oracle."""
+        expected = list(answer_pairs(graph, pairs))
+        assert expected[0].distance == nx.shortest_path_length(graph, 'Valjean', 'Napoleon')
+        assert [result.error for result in expected[:4]] == [None, 'no path', 'node not found', None]
+        oracle = DistanceOracle.build(graph, 4)
+        assert list(answer_pairs(graph, pairs, workers=2, oracle=oracle, chunk_size=7)) == expected
+        assert len(next(answer_pairs(graph, pairs[3:], max_paths=None)).paths) == \
+            len(list(nx.all_shortest_paths(graph, 'Cosette', 'Javert')))
+
+    def test_failed_pair(self, tmp_path, monkeypatch):
+        """Tests a pair failing unexpectedly is reported in its row, and max_paths below 1 is refused."""
+        from plab2 import batch
+
+        def render(graph, paths, output):
+            if paths[0][-1] == 'Javert':
+                raise OSError('disk full')
+        monkeypatch.setattr(batch, 'render_paths', render)
+        results = list(answer_pairs(graph, pairs[:4], render_dir=str(tmp_path)))
+        assert [result.error for result in results] == [None, 'no path', 'node not found', 'OSError: disk full']
+        assert results[3].paths == [] and results[0].distance == 2
+        with pytest.raises(ValueError):
+            next(answer_pairs(graph, pairs, max_paths=0))
+
+    @pytest.mark.parametrize('name', ['paths.tsv', 'paths.jsonl'])
+    def test_write_results(self, tmp_path, name):
+        """Tests the TSV and JSONL outputs, and the rendered images."""
+        output = str(tmp_path / name)
+        count = write_results(answer_pairs(graph, pairs[:4], render_dir=str(tmp_path / "images")), output)
+        assert count == 4
+        with open(output) as f:
+            lines = f.read().splitlines()
+        if name.endswith('.jsonl'):
+            records = [json.loads(line) for line in lines]
+            assert records[1] == {'source': 'Valjean', 'target': 'A', 'distance': None, 'paths': [],
+                                  'error': 'no path', 'image': None}
+            assert os.path.isfile(records[0]['image'])
+        else:
+            assert lines[0].split('\t') == ['source', 'target', 'distance', 'path', 'error', 'image']
+            assert lines[1].startswith('Valjean\tNapoleon\t2\tValjean -> Myriel -> Napoleon\t')
+            assert len(lines) == 5
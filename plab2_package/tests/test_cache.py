@@ -0,0 +1,188 @@
+"""Tests for the cache backends."""
+import pytest
+from plab2.cache import BufferedCache, Cache, DirectoryCache, SQLiteCache, migrate_cache, migrate_legacy
+
+FASTA = ">sp|P04637|P53_HUMAN Cellular tumor antigen p53 OS=Homo sapiens OX=9606 GN=TP53 PE=1 SV=4\nMEEPQ\n"
+
+
+class TestSQLiteCache:
+    """Tests the single file cache."""
+    def test_get_set(self, tmp_path):
+        """Tests batched reads and writes."""
+        cache = SQLiteCache(tmp_path.joinpath("cache.db"))
+        cache.set_many("hgnc", {"TP53": "a", "MDM2": "b"})
+        cache.set("uniprot", "P04637", FASTA)
+        assert cache.get_many("hgnc", ["TP53", "MDM2", "CDK1"]) == {"TP53": "a", "MDM2": "b"}
+        assert cache.missing("hgnc", ["CDK1", "TP53", "CDK1"]) == ["CDK1"]
+        assert cache.get("uniprot", "P04637") == FASTA
+        assert not cache.contains("uniprot", "TP53")
+        assert cache.keys("hgnc") == ["MDM2", "TP53"]
+
+    def test_ttl(self, tmp_path):
+        """Tests entries expire after the ttl."""
+        now = [0.0]
+        cache = SQLiteCache(tmp_path.joinpath("cache.db"), ttl=10, clock=lambda: now[0])
+        cache.set("hgnc", "TP53", "a")
+        now[0] = 5.0
+        cache.set("hgnc", "MDM2", "b")
+        now[0] = 12.0
+        assert cache.get_many("hgnc", ["TP53", "MDM2"]) == {"MDM2": "b"}
+        assert cache.keys("hgnc") == ["MDM2"]
+        now[0] = 20.0
+        assert cache.expire() == 1
+
+    def test_eviction(self, tmp_path):
+        """Tests the least recently used entries are evicted beyond the maximal size."""
+        now = [0.0]
+        cache = SQLiteCache(tmp_path.joinpath("cache.db"), max_size=30, clock=lambda: now[0])
+        for i, symbol in enumerate(["A", "B", "C"]):
+            now[0] = i
+            cache.set("hgnc", symbol, "x" * 10)
+        now[0] = 3
+        assert cache.get("hgnc", "A")
+        now[0] = 4
+        cache.set("hgnc", "D", "x" * 10)
+        assert cache.keys("hgnc") == ["A", "C", "D"]
+        assert cache.size == 30
+
+
+class TestInterface:
+    """Tests the interface of the backends."""
+    def test_incomplete_backend(self):
+        """Tests a backend without all abstract methods fails on instantiation."""
+        class ReadOnlyCache(Cache):
+            def get_many(self, namespace, keys):
+                return {}
+
+        with pytest.raises(TypeError):
+            ReadOnlyCache()
+
+
+class TestBufferedCache:
+    """Tests the collected values are stored in batches."""
+    def test_batches(self, tmp_path):
+        """Tests a full batch is stored at once, the rest when the block is left, and reads see both."""
+        target = SQLiteCache(tmp_path.joinpath("cache.db"))
+        with BufferedCache(target, chunk_size=2) as cache:
+            cache.set("hgnc", "TP53", "a")
+            assert target.get("hgnc", "TP53") is None
+            assert cache.get("hgnc", "TP53") == "a"
+            cache.set("hgnc", "MDM2", "b")
+            assert target.get_many("hgnc", ["TP53", "MDM2"]) == {"TP53": "a", "MDM2": "b"}
+            cache.set("hgnc", "CDK1", "c")
+            assert cache.missing("hgnc", ["TP53", "CDK1", "ATM"]) == ["ATM"]
+        assert target.get("hgnc", "CDK1") == "c"
+
+
+class TestMigration:
+    """Tests the migration from the directory layout."""
+    def test_migrate(self, tmp_path):
+        """Tests all files are copied, and removed if asked to."""
+        hgnc, uniprot = tmp_path.joinpath("HGNC"), tmp_path.joinpath("UniProt")
+        hgnc.mkdir()
+        uniprot.mkdir()
+        source = DirectoryCache({"hgnc": (hgnc, ".json"), "uniprot": (uniprot, ".fasta")})
+        source.set_many("hgnc", {"TP53": "a", "MDM2": "b"})
+        source.set("uniprot", "P04637", FASTA)
+        target = SQLiteCache(tmp_path.joinpath("cache.db"))
+        assert migrate_cache(source, target, remove=True) == 3
+        assert target.get_many("hgnc", ["TP53", "MDM2"]) == {"TP53": "a", "MDM2": "b"}
+        assert target.get("uniprot", "P04637") == FASTA
+        assert source.keys("hgnc") == source.keys("uniprot") == []
+
+    def test_migrate_legacy(self, tmp_path):
+        """Tests the files of the directory layout are copied into a new cache file only, and kept."""
+        hgnc = tmp_path.joinpath("HGNC")
+        hgnc.mkdir()
+        source = DirectoryCache({"hgnc": (hgnc, ".json"), "uniprot": (tmp_path.joinpath("UniProt"), ".fasta")})
+        source.set_many("hgnc", {"TP53": "a", "MDM2": "b"})
+        target = SQLiteCache(tmp_path.joinpath("cache.db"))
+        assert migrate_legacy(target, source) == 2
+        assert target.get_many("hgnc", ["TP53", "MDM2"]) == {"TP53": "a", "MDM2": "b"}
+        assert source.keys("hgnc") == ["MDM2", "TP53"]
+        source.set("hgnc", "CDK1", "c")
+        assert migrate_legacy(target, source) == 0
+        assert target.get("hgnc", "CDK1") is None
+
+
+class TestParsed:
+    """Tests the parsed records are kept in memory until the cache entry changes."""
+    def check(self, cache):
+        parsed = []
+
+        def parse(text):
+            parsed.append(text)
+            return {"text": text}
+
+        cache.set_many("hgnc", {"TP53": "a", "MDM2": "b"})
+        assert cache.parsed_many("hgnc", ["TP53", "MDM2", "CDK1"], parse) == {"TP53": {"text": "a"},
+                                                                              "MDM2": {"text": "b"}}
+        assert cache.parsed("hgnc", "TP53", parse) == {"text": "a"}
+        assert sorted(parsed) == ["a", "b"]
+        cache.set("hgnc", "TP53", "c")
+        assert cache.parsed("hgnc", "TP53", parse) == {"text": "c"}
+        assert sorted(parsed) == ["a", "b", "c"]
+
+    def test_sqlite(self, tmp_path):
+        """Tests the records of the single file cache."""
+        self.check(SQLiteCache(tmp_path.joinpath("cache.db")))
+
+    def test_sqlite_versions(self, tmp_path):
+        """Tests a record is kept while other entries change, expires with its entry and is parsed again after
+        another connection wrote to the file."""
+        parsed = []
+
+        def parse(text):
+            parsed.append(text)
+            return {"text": text}
+
+        now = [0.0]
+        cache = SQLiteCache(tmp_path.joinpath("cache.db"), ttl=10, clock=lambda: now[0])
+        cache.set("hgnc", "TP53", "a")
+        now[0] = 5.0
+        cache.set("hgnc", "MDM2", "b")
+        assert cache.parsed_many("hgnc", ["TP53", "MDM2"], parse) == {"TP53": {"text": "a"}, "MDM2": {"text": "b"}}
+        cache.set("hgnc", "CDK1", "c")
+        cache.delete("hgnc", "CDK1")
+        assert cache.parsed_many("hgnc", ["TP53", "MDM2"], parse) == {"TP53": {"text": "a"}, "MDM2": {"text": "b"}}
+        assert sorted(parsed) == ["a", "b"]
+        now[0] = 11.0
+        assert cache.parsed_many("hgnc", ["TP53", "MDM2"], parse) == {"MDM2": {"text": "b"}}
+        other = SQLiteCache(tmp_path.joinpath("cache.db"), clock=lambda: 5.0)
+        other.set("hgnc", "MDM2", "d")
+        assert cache.parsed("hgnc", "MDM2", parse) == {"text": "d"}
+        assert sorted(parsed) == ["a", "b", "d"]
+
+    def test_memo(self):
+        """Tests the records of a key are discarded for every parse function, also after others were evicted."""
+        from plab2.cache import RecordMemo
+        memo = RecordMemo(maxsize=3)
+        memo.put(("hgnc", "TP53", len), 1, "a")
+        memo.put(("hgnc", "TP53", str), 1, "b")
+        memo.put(("uniprot", "TP53", len), 1, "c")
+        memo.put(("hgnc", "MDM2", len), 1, "d")
+        assert memo.get(("hgnc", "TP53", len)) is None
+        memo.discard("hgnc", ["TP53", "CDK1"])
+        assert list(memo.records) == [("uniprot", "TP53", len), ("hgnc", "MDM2", len)]
+        assert memo.index == {"hgnc": {"MDM2": {("hgnc", "MDM2", len)}},
+                              "uniprot": {"TP53": {("uniprot", "TP53", len)}}}
+
+    def test_directory(self, tmp_path):
+        """Tests the records of the directory cache, which are invalidated by the modification time."""
+        tmp_path.joinpath("HGNC").mkdir()
+        self.check(DirectoryCache({"hgnc": (tmp_path.joinpath("HGNC"), ".json")}))
+
+    def test_extract(self, tmp_path):
+        """Tests Profiler.extract and extract_uniprot parse the text once and return copies."""
+        from plab2.Utils import Profiler
+        cache = SQLiteCache(tmp_path.joinpath("cache.db"))
+        cache.set("uniprot", "P04637", FASTA)
+        p = Profiler("TP53", cache=cache)
+        info = p.extract_uniprot("P04637")
+        assert info["Name of protein"] == "P53_HUMAN"
+        info["Name of protein"] = None
+        assert p.extract_uniprot("P04637")["Name of protein"] == "P53_HUMAN"
+        assert len(cache.memo.records) == 1
+        cache.set("hgnc", "TP53", '{"response": {"docs": [{"hgnc_id": "HGNC:11998", "uniprot_ids": ["P04637"]}]}}')
+        p.extract()["UniProt ID"].append("Q00000")
+        assert p.extract()["UniProt ID"] == ["P04637"]
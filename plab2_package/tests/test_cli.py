@@ -33,3 +33,18 @@ class TestCli:
 
 
 
+
+    def test_compile_low_memory(self, tmp_path, monkeypatch):
+        """Tests --low_memory streams the PPI file also when the network is enriched."""
+        from plab2 import models, network
+
+        def read_ppis(self, ppi_file):
+            raise AssertionError("the PPI file is loaded.")
+        monkeypatch.setattr(network.Network, "read_ppis", read_ppis)
+        monkeypatch.setattr(models, "query_many", lambda symbols: {symbol: [1, "ENSG1", "P1", "9606"]
+                                                                   for symbol in symbols})
+        nodes, edges = tmp_path.joinpath("nodes.tsv"), tmp_path.joinpath("edges.tsv")
+        result = CliRunner().invoke(compile, [str(PPI_FILE), str(nodes), str(edges), "--enrich", "--query_from_sql",
+                                              "--low_memory"])
+        assert result.exit_code == 0
+        assert nodes.is_file() and edges.is_file()
@@ -0,0 +1,51 @@
+"""Tests for the average node connectivity."""
+import math
+import networkx as nx
+import pytest
+from plab2.connectivity import average_node_connectivity, number_of_node_pairs
+
+
+def reference(graph: nx.Graph) -> float:
+    """The former computation in summary_statistics, one max flow per edge."""
+    pairs = graph.number_of_nodes() * (graph.number_of_nodes() - 1) / 2
+    return float(sum(nx.node_connectivity(graph, u, v) for u, v in graph.edges()) / pairs)
+
+
+graph = nx.karate_club_graph()
+# leaves and a self loop, like in PPI networks.
+graph.add_edges_from([(0, "leaf_1"), (33, "leaf_2"), ("leaf_2", "leaf_3"), (5, 5)])
+
+
+class TestConnectivity:
+    """Tests the exact and sampled modes against networkx."""
+    def test_number_of_node_pairs(self):
+        """Tests the closed form of the pair count stays an exact integer for large graphs."""
+        assert number_of_node_pairs(621) == 192510
+        assert number_of_node_pairs(10 ** 7) == 49999995000000
+        assert number_of_node_pairs(1) == 0
+
+    def test_exact(self):
+        """Tests the exact mode, in one and in several processes."""
+        expected = reference(graph)
+        result = average_node_connectivity(graph)
+        assert result.exact
+        assert result.average == pytest.approx(expected)
+        assert average_node_connectivity(graph, workers=2).average == pytest.approx(expected)
+
+    def test_sampled(self):
+        """Tests the sampled mode brackets the exact value, and is exact if all edges fit in the sample."""
+        expected = reference(graph)
+        result = average_node_connectivity(graph, mode='sampled', sample_size=40, confidence=0.999, seed=1)
+        assert not result.exact
+        assert result.lower <= expected <= result.upper
+        assert average_node_connectivity(graph, mode='sampled', seed=1).average == pytest.approx(expected)
+        with pytest.raises(ValueError):
+            average_node_connectivity(graph, mode='guess')
+
+    def test_single_edge_sample(self):
+        """Tests an empty sample of a single edge which needs a flow computation, and the mode without connectivity."""
+        path = nx.path_graph(4)
+        result = average_node_connectivity(path, mode='sampled', sample_size=0)
+        assert result.computed_edges == 2 and result.upper == float('inf')
+        none = average_node_connectivity(path, mode='none')
+        assert math.isnan(none.average) and none.computed_edges == 0
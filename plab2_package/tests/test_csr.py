@@ -0,0 +1,63 @@
+"""Tests for the array-backed graph."""
+import networkx as nx
+import pandas as pd
+import pytest
+from plab2 import network
+from plab2.csr import CSRGraph
+from .constants import ppi
+
+n_ppi = network.Analyzer({}, None, ppi, None, None)
+symbol_to_id = {symbol: identifier for identifier, symbol in n_ppi.nodes.items()}
+data = pd.DataFrame([(symbol_to_id[out_], symbol_to_id[in_], interaction.replace(" ", "_"))
+                     for out_, interaction, in_ in n_ppi.rels], columns=['node_1', 'node_2', 'metadata'])
+nx_graph = network.graph_from_edge_list(data, n_ppi.nodes)
+csr_graph = network.graph_from_edge_list(data, n_ppi.nodes, backend='csr')
+
+
+class TestCSRGraph:
+    """Tests the CSR graph against nx.Graph built from the same edge list."""
+    def test_size(self):
+        """Tests the number of nodes and edges."""
+        assert isinstance(csr_graph, CSRGraph)
+        assert csr_graph.number_of_nodes() == nx_graph.number_of_nodes()
+        assert csr_graph.number_of_edges() == nx_graph.number_of_edges()
+        assert set(csr_graph.nodes()) == set(nx_graph.nodes())
+        assert {frozenset(edge) for edge in csr_graph.edges()} == {frozenset(edge) for edge in nx_graph.edges()}
+
+    def test_neighbors_degree(self):
+        """Tests the neighbor and degree primitives."""
+        for node in nx_graph.nodes():
+            assert set(csr_graph.neighbors(node)) == set(nx_graph.neighbors(node))
+            assert csr_graph.degree(node) == nx_graph.degree(node)
+        with pytest.raises(nx.NodeNotFound):
+            csr_graph.neighbors("NOT_A_GENE")
+
+    def test_bfs(self):
+        """Tests the breadth first search distances."""
+        distance = csr_graph.bfs("CREBBP")
+        expected = nx.single_source_shortest_path_length(nx_graph, "CREBBP")
+        assert {csr_graph.labels[i]: d for i, d in enumerate(distance) if d >= 0} == expected
+
+    def test_all_shortest_paths(self):
+        """Tests the shortest paths are the same as in networkx."""
+        paths = sorted(csr_graph.all_shortest_paths("CREBBP", "TRA2B"))
+        assert paths == sorted(nx.all_shortest_paths(nx_graph, "CREBBP", "TRA2B"))
+
+    def test_subgraph(self):
+        """Tests the induced subgraph."""
+        nodes = list(nx_graph.nodes())[:100]
+        sub = csr_graph.subgraph(nodes)
+        expected = nx_graph.subgraph(nodes)
+        assert sub.number_of_nodes() == expected.number_of_nodes()
+        assert sub.number_of_edges() == expected.number_of_edges()
+
+    def test_analyzer_backend(self, tmp_path):
+        """Tests the analyzer finds the shortest path with the CSR backend."""
+        nodes_path, edges_path = tmp_path.joinpath("node_list.tsv"), tmp_path.joinpath("edge_list.tsv")
+        n_ppi.write_node_list(nodes_path)
+        n_ppi.write_edge_list(edges_path)
+        n_ppi.import_graph(edges_path, backend='csr')
+        result_path = n_ppi.shortest_path("CREBBP", "TRA2B")
+        assert ['CREBBP', 'CREB1', 'EP300', 'REL', 'BTRC', 'TP63', 'SUMO1',
+                'MTOR', 'GNB1', 'PIK3R1', 'BRCA1', 'BARD1', 'PGAM5', 'PRKN',
+                'PSMD1', 'BLM', 'RPA1', 'PAN2', 'SRSF3', 'S100A9', 'TRA2B'] in result_path
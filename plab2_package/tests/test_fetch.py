@@ -0,0 +1,116 @@
+"""Tests for the concurrent fetcher, against a local stand-in for the HGNC and UniProt services."""
+
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from plab2.cache import SQLiteCache
+from plab2.fetch import Fetcher, TokenBucket
+
+SYMBOLS = ["PLAB2TESTA", "PLAB2TESTB", "PLAB2TESTC"]
+ACCESSION = "Q0PLAB2"
+# the stand-in answers 503 to the first two requests of this symbol.
+FLAKY = "PLAB2TESTC"
+FASTA = f">sp|{ACCESSION}|TEST_HUMAN Test protein OS=Homo sapiens OX=9606 GN=PLAB2TESTA PE=1 SV=1\nMKV\n"
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Serves /hgnc/<symbol> like the HGNC fetch service and /uniprot/<accession>.fasta like UniProt."""
+    requests = Counter()
+
+    def do_GET(self):
+        self.requests[self.path] += 1
+        name = self.path.rsplit("/", 1)[1]
+        if name == FLAKY and self.requests[self.path] <= 2:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.path.startswith("/hgnc/"):
+            docs = [{"hgnc_id": f"HGNC:{name}", "ensembl_gene_id": f"ENSG{name}", "uniprot_ids": [ACCESSION]}]
+            body = json.dumps({"response": {"numFound": 1, "docs": docs}})
+        else:
+            body = FASTA
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def root():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def cache(tmp_path_factory):
+    cache = SQLiteCache(tmp_path_factory.mktemp("cache").joinpath("cache.db"))
+    yield cache
+    cache.close()
+
+
+class TestTokenBucket:
+    """Tests the rate limiting with a fake clock."""
+    def test_acquire(self):
+        """Tests the bucket lets a burst of `capacity` requests through, then waits 1/rate per request."""
+        now = [0.0]
+        slept = []
+        bucket = TokenBucket(rate=2.0, capacity=2, clock=lambda: now[0], sleep=slept.append)
+        waits = [bucket.acquire() for _ in range(4)]
+        assert waits == [0.0, 0.0, 0.5, 1.0]
+        assert slept == [0.5, 1.0]
+
+
+class TestFetcher:
+    """Tests concurrent downloads from the stand-in server."""
+    def test_fetch(self, root, cache):
+        """Tests all files are downloaded, and the flaky symbol is retried with backoff."""
+        slept = []
+        fetcher = Fetcher(max_workers=3, rate=1000, retries=3, backoff=0.25, hgnc_root=f"{root}/hgnc/",
+                          uniprot_root=f"{root}/uniprot/", sleep=slept.append, cache=cache)
+        assert fetcher.fetch_hgnc(SYMBOLS) == {symbol: True for symbol in SYMBOLS}
+        assert StandIn.requests[f"/hgnc/{FLAKY}"] == 3
+        assert sorted(wait for wait in slept if wait >= 0.25) == [0.25, 0.5]
+        assert cache.missing("hgnc", SYMBOLS) == []
+        assert fetcher.fetch_uniprot([ACCESSION, ACCESSION]) == {ACCESSION: True}
+        assert cache.get("uniprot", ACCESSION) == FASTA
+
+        # cached files are not requested again.
+        assert fetcher.fetch_hgnc(SYMBOLS) == {}
+
+    def test_give_up(self, root, cache):
+        """Tests the fetcher gives up after the retries."""
+        fetcher = Fetcher(retries=1, hgnc_root=f"{root}/hgnc/", sleep=lambda wait: None, cache=cache)
+        StandIn.requests.clear()
+        cache.delete("hgnc", FLAKY)
+        assert fetcher.fetch_hgnc([FLAKY]) == {FLAKY: False}
+        assert StandIn.requests[f"/hgnc/{FLAKY}"] == 2
+
+    def test_batched_writes(self, root, tmp_path):
+        """Tests the downloaded texts are stored with one set_many."""
+        cache = SQLiteCache(tmp_path.joinpath("cache.db"))
+        writes = []
+        set_many = cache.set_many
+        cache.set_many = lambda namespace, items: writes.append(sorted(items)) or set_many(namespace, items)
+        fetcher = Fetcher(hgnc_root=f"{root}/hgnc/", sleep=lambda wait: None, cache=cache)
+        assert fetcher.fetch_hgnc(SYMBOLS) == {symbol: True for symbol in SYMBOLS}
+        assert writes == [sorted(SYMBOLS)]
+        assert cache.missing("hgnc", SYMBOLS) == []
+
+    def test_gather_identifier(self, root, cache, tmp_path):
+        """Tests the analyzer gathers the identifiers through the fetcher."""
+        from plab2.network import Analyzer
+        node_path = tmp_path.joinpath("nodes_reduced.tsv")
+        node_path.write_text("".join(f"{i}\t{symbol}\n" for i, symbol in enumerate(SYMBOLS, 1)))
+        fetcher = Fetcher(hgnc_root=f"{root}/hgnc/", uniprot_root=f"{root}/uniprot/", sleep=lambda wait: None,
+                          cache=cache)
+        a = Analyzer({}, None, None, None, None)
+        info = a.enrich_gather_identifier(node_path, fetcher)
+        assert info["hgnc_PLAB2TESTA"]["Ensembl Gene ID"] == "ENSGPLAB2TESTA"
+        assert info[f"uniprot_{ACCESSION}"]["NCBI taxonomy ID"] == "9606"
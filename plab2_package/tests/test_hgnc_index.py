@@ -0,0 +1,84 @@
+"""Tests for the offline HGNC index."""
+import json
+from plab2.hgnc_index import HGNCResolver, cached_resolver, ingest_hgnc
+
+TSV = ("hgnc_id\tsymbol\tname\talias_symbol\tprev_symbol\tensembl_gene_id\tuniprot_ids\n"
+       "HGNC:11998\tTP53\ttumor protein p53\tp53|LFS1\t\tENSG00000141510\tP04637\n"
+       "HGNC:6973\tMDM2\tMDM2 proto-oncogene\tHDM2\tMGC5370\tENSG00000135679\tQ00987\n"
+       "HGNC:1\tLFS1\tnot a real gene\t\t\t\t\n")
+DOCS = [{"hgnc_id": "HGNC:11998", "symbol": "TP53", "alias_symbol": ["p53", "LFS1"],
+         "ensembl_gene_id": "ENSG00000141510", "uniprot_ids": ["P04637"]},
+        {"hgnc_id": "HGNC:6973", "symbol": "MDM2", "alias_symbol": ["HDM2"], "prev_symbol": ["MGC5370"],
+         "ensembl_gene_id": "ENSG00000135679", "uniprot_ids": ["Q00987"]},
+        {"hgnc_id": "HGNC:1", "symbol": "LFS1"}]
+
+
+class TestHGNCIndex:
+    """Tests ingesting both dump formats and resolving symbols from the index."""
+    def check(self, resolver):
+        assert resolver.resolve("TP53") == {"HGNC ID": "HGNC:11998", "Ensembl Gene ID": "ENSG00000141510",
+                                            "UniProt ID": ["P04637"]}
+        assert resolver.approved_symbol("MGC5370") == "MDM2"
+        assert resolver.approved_symbol("HDM2") == "MDM2"
+        assert resolver.approved_symbol("P53") == "TP53"
+        # an approved symbol wins over the alias of another gene.
+        assert resolver.resolve("LFS1") == {"HGNC ID": "HGNC:1", "Ensembl Gene ID": [None], "UniProt ID": [None]}
+        assert resolver.resolve("NOT_A_GENE") is None
+        assert "NOT_A_GENE" not in resolver
+        # the queries of single symbols and the loaded dictionaries give the same answers.
+        if resolver._names is None:
+            resolver.load()
+            self.check(resolver)
+
+    def test_tsv(self, tmp_path):
+        """Tests the tab separated dump."""
+        dump, index = tmp_path.joinpath("hgnc_complete_set.txt"), tmp_path.joinpath("hgnc_index.db")
+        dump.write_text(TSV)
+        assert ingest_hgnc(dump, index) == 3
+        self.check(HGNCResolver.from_path(index))
+
+    def test_json(self, tmp_path):
+        """Tests the json dump, and that a missing index gives no resolver."""
+        dump, index = tmp_path.joinpath("hgnc_complete_set.json"), tmp_path.joinpath("hgnc_index.db")
+        assert HGNCResolver.from_path(index) is None
+        dump.write_text(json.dumps({"response": {"numFound": 3, "docs": DOCS}}))
+        assert ingest_hgnc(dump, index) == 3
+        self.check(HGNCResolver.from_path(index))
+
+    def test_gather_identifier(self, tmp_path):
+        """Tests the analyzer gathers the identifiers from the index without downloads."""
+        from plab2.network import Analyzer
+        dump, index = tmp_path.joinpath("hgnc_complete_set.txt"), tmp_path.joinpath("hgnc_index.db")
+        dump.write_text(TSV)
+        ingest_hgnc(dump, index)
+        node_path = tmp_path.joinpath("nodes_reduced.tsv")
+        node_path.write_text("1\tMDM2\n")
+        a = Analyzer({}, None, None, None, None)
+        info = a.enrich_gather_identifier(node_path, resolver=HGNCResolver.from_path(index))
+        assert info["hgnc_MDM2"]["Ensembl Gene ID"] == "ENSG00000135679"
+
+    def test_older_index(self, tmp_path):
+        """Tests an index without the upper-case names still resolves symbols case-insensitively."""
+        import sqlite3
+        dump, index = tmp_path.joinpath("hgnc_complete_set.txt"), tmp_path.joinpath("hgnc_index.db")
+        dump.write_text(TSV)
+        ingest_hgnc(dump, index)
+        conn = sqlite3.connect(index)
+        conn.execute("DROP INDEX names_upper")
+        conn.execute("ALTER TABLE names DROP COLUMN name_upper")
+        conn.commit()
+        conn.close()
+        self.check(HGNCResolver.from_path(index))
+
+    def test_cached_resolver(self, tmp_path):
+        """Tests the shared resolver is kept until the index is ingested again."""
+        import os
+        dump, index = tmp_path.joinpath("hgnc_complete_set.txt"), tmp_path.joinpath("hgnc_index.db")
+        assert cached_resolver(index) is None
+        dump.write_text(TSV)
+        ingest_hgnc(dump, index)
+        resolver = cached_resolver(index)
+        assert cached_resolver(index) is resolver
+        os.utime(index, ns=(0, 0))
+        assert cached_resolver(index) is not resolver
+        self.check(cached_resolver(index))
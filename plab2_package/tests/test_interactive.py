@@ -0,0 +1,42 @@
+"""Tests for the interactive HTML pages."""
+import io
+import json
+import re
+import networkx as nx
+from plab2.interactive import network_html, write_network_html
+
+
+def page_data(page: str, name: str):
+    """The nodes, edges or options of a page."""
+    if name == 'options':
+        return json.loads(re.search(r'var options = (\{.*?\});\n', page, re.S).group(1))
+    return json.loads(re.search(rf'{name} = new vis\.DataSet\((\[.*?\])\);', page, re.S).group(1))
+
+
+class TestInteractive:
+    """Tests the subsampled pages."""
+    def test_network_html(self):
+        """Tests the page keeps the highlighted and best connected nodes at their positions, without physics."""
+        graph = nx.relabel_nodes(nx.barabasi_albert_graph(200, 2, seed=0), str)
+        positions = nx.random_layout(graph, seed=0)
+        colors = ['blue' if node == '199' else 'red' for node in graph.nodes()]
+        page = network_html(graph, positions, node_color=colors, highlight=['199'], max_nodes=20, max_edges=10)
+        nodes = {node['id']: node for node in page_data(page, 'nodes')}
+        degree = dict(graph.degree())
+        assert len(nodes) == 20 and nodes['199']['color'] == 'blue'
+        assert min(degree[node] for node in nodes if node != '199') >= sorted(degree.values())[-19]
+        first, second = sorted(degree, key=degree.get)[-2:]
+        assert abs(nodes[first]['x'] / nodes[second]['x'] - positions[first][0] / positions[second][0]) < 1e-6
+        edges = page_data(page, 'edges')
+        assert len(edges) == 10 and all(edge['from'] in nodes and edge['to'] in nodes for edge in edges)
+        assert not page_data(page, 'options')['physics']['enabled']
+
+    def test_write_network_html(self, tmp_path):
+        """Tests the page is written to files and file objects."""
+        graph = nx.relabel_nodes(nx.path_graph(3), str)
+        positions = nx.random_layout(graph, seed=0)
+        write_network_html(graph, positions, str(tmp_path / 'graph.html'))
+        page = io.StringIO()
+        write_network_html(graph, positions, page)
+        assert len(page_data(page.getvalue(), 'nodes')) == 3
+        assert (tmp_path / 'graph.html').read_text().startswith('<html>')
@@ -0,0 +1,66 @@
+"""Tests for the background job queue."""
+import threading
+import time
+from plab2.jobs import CANCELLED, DONE, FAILED, JobQueue
+
+
+def wait(job, timeout: float = 10.0):
+    """Wait until the job is finished."""
+    started = time.perf_counter()
+    while job.active and time.perf_counter() - started < timeout:
+        time.sleep(0.01)
+    return job
+
+
+def steps(job, release: threading.Event, number: int = 100):
+    """A job of many steps, waiting for release after the first one."""
+    for step in range(number):
+        job.report(step / number, f"step {step}")
+        release.wait()
+    return number
+
+
+class TestJobQueue:
+    """Tests results, progress, cancellation and the cached jobs of a key."""
+    def test_submit(self):
+        """Tests a job returns its result, and a key is run once until its job failed."""
+        queue = JobQueue(workers=2)
+        release = threading.Event()
+        job = queue.submit('steps', steps, release, key='a')
+        assert queue.submit('steps', steps, release, key='a') is job
+        while job.message != 'step 0':
+            time.sleep(0.01)
+        assert job.to_dict()['status'] == 'running'
+        release.set()
+        assert wait(job).status == DONE and job.result == 100 and job.progress == 1
+        assert queue.submit('steps', steps, release, key='a') is job
+
+        failed = wait(queue.submit('fail', lambda job: 1 / 0, key='b'))
+        assert failed.status == FAILED and failed.error.startswith('ZeroDivisionError')
+        assert queue.submit('fail', lambda job: 2, key='b') is not failed
+        queue.shutdown()
+
+    def test_cancel(self):
+        """Tests a running job stops at its next report and a queued job does not start."""
+        queue = JobQueue(workers=1)
+        release = threading.Event()
+        running = queue.submit('steps', steps, release)
+        queued = queue.submit('steps', steps, release)
+        while running.status != 'running':
+            time.sleep(0.01)
+        assert queue.cancel(queued.id) and queue.cancel(running.id)
+        release.set()
+        assert wait(running).status == CANCELLED and running.result is None
+        assert wait(queued).status == CANCELLED and queued.started is None
+        assert not queue.cancel(running.id) and not queue.cancel('unknown')
+        queue.shutdown()
+
+    def test_clean(self):
+        """Tests only the newest finished jobs are kept."""
+        queue = JobQueue(workers=1, max_finished=2)
+        jobs = [wait(queue.submit('number', lambda job, number: number, number, key=str(number)))
+                for number in range(4)]
+        queue.submit('number', lambda job: 4)
+        assert queue.get(jobs[0].id) is None and queue.get(jobs[3].id) is jobs[3]
+        assert '0' not in queue.keys
+        queue.shutdown()
@@ -0,0 +1,49 @@
+"""Tests for the layout cache."""
+import os
+import networkx as nx
+import numpy as np
+import pytest
+from plab2 import layout
+from plab2.layout import LayoutCache, compute_layout, graph_fingerprint
+
+graph = nx.relabel_nodes(nx.les_miserables_graph(), str)
+
+
+class TestLayout:
+    """Tests the layouts are reused, keyed by the graph and the parameters, and seeded when few nodes change."""
+    def test_fingerprint(self):
+        """Tests the fingerprint ignores the order of nodes and edges, but not the edges."""
+        reordered = nx.Graph()
+        reordered.add_edges_from((v, u) for u, v in reversed(list(graph.edges())))
+        assert graph_fingerprint(reordered) == graph_fingerprint(graph)
+        reordered.remove_edge('Valjean', 'Javert')
+        assert graph_fingerprint(reordered) != graph_fingerprint(graph)
+
+    def test_cache(self, tmp_path, monkeypatch):
+        """Tests a second layout of the same graph and parameters is read from the cache."""
+        cache = LayoutCache(str(tmp_path))
+        first = compute_layout(graph, cache)
+        assert len(os.listdir(tmp_path)) == 1
+
+        def fail(*args, **kwargs):
+            raise AssertionError("layout is computed again")
+        monkeypatch.setitem(layout.LAYOUTS, 'spring', fail)
+        second = compute_layout(graph, cache)
+        assert set(second) == set(graph.nodes())
+        for node in graph.nodes():
+            np.testing.assert_allclose(second[node], first[node], rtol=1e-6)
+        with pytest.raises(AssertionError):
+            compute_layout(graph, cache, k=0.1)
+
+    def test_incremental(self, tmp_path):
+        """Tests the nodes of a cached layout keep their position when a node is added, and the eviction."""
+        cache = LayoutCache(str(tmp_path), max_entries=2)
+        first = compute_layout(graph, cache)
+        changed = graph.copy()
+        changed.add_edge('Valjean', 'Newcomer')
+        second = compute_layout(changed, cache)
+        for node in graph.nodes():
+            np.testing.assert_allclose(second[node], first[node], rtol=1e-6)
+        assert 'Newcomer' in second
+        compute_layout(nx.path_graph(5), cache)
+        assert len(os.listdir(tmp_path)) == 2
@@ -13,11 +13,25 @@ session = Session(bind=engine)
 
 class Testmodel:
     def test_create_database(self):
-        """Tests whether a new database file is generated in the project directory."""
+        """Tests whether a new database file is generated in the project directory on first use of the engine."""
+        models.get_engine()
         assert os.path.isfile(database_path)
 
+    def test_configure(self):
+        """Tests the engine is created lazily from the setting, and the session shares it."""
+        models.configure("sqlite://")
+        try:
+            assert models._engine is None
+            assert str(models.get_session().get_bind().url) == "sqlite://"
+            assert models.get_session() is models.get_session()
+            assert models.query_many(["CDK1"]) == {}
+        finally:
+            models.configure(None)
+        assert models._engine is None
+
     def test_correct_schema_hgnc(self):
         """Tests the correct schema is generated."""
+        models.get_engine()
         conn = sqlite3.connect(database_path)
         c = conn.cursor()
         # get the count of tables with the name
@@ -29,6 +43,7 @@ class Testmodel:
 
     def test_correct_schema_uniprot(self):
         """Tests the correct schema is generated."""
+        models.get_engine()
         conn = sqlite3.connect(database_path)
         c = conn.cursor()
         # get the count of tables with the name
@@ -54,3 +69,127 @@ class Testmodel:
         """Tests the function query data."""
         result = models.query_data("CDK1")
         assert result == {'CDK1': [66, 'ENSG00000170312', 'P06493', '9606']}
+
+    def test_query_many(self):
+        """Tests the batched query returns the same as query_data, in one query per chunk."""
+        from sqlalchemy import event
+        engine_ = create_engine("sqlite://")
+        models.Base.metadata.create_all(bind=engine_)
+        session_ = Session(bind=engine_)
+        session_.add_all([models.Hgnc(id=66, HGNC_ID="HGNC:1722", Ensembl_Gene_ID="ENSG00000170312", Gene_symbol="CDK1"),
+                          models.Hgnc(id=67, HGNC_ID="HGNC:1", Ensembl_Gene_ID="ENSG1", Gene_symbol="NOPROT"),
+                          models.Uniprot(id=1, accession_number="P06493", NCBI_taxonomy_ID="9606", HGNC_table_ID=66)])
+        session_.commit()
+        statements = []
+        event.listen(engine_, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        result = models.query_many(["CDK1", "NOPROT", "MISSING", "CDK1"], session_)
+        assert result == {'CDK1': [66, 'ENSG00000170312', 'P06493', '9606'], 'NOPROT': [67, 'ENSG1', None, None]}
+        assert len(statements) == 1
+
+    def test_bulk_upsert(self):
+        """Tests adding data twice updates the rows instead of failing on the duplicate keys."""
+        engine_ = create_engine("sqlite://")
+        models.Base.metadata.create_all(bind=engine_)
+        session_ = Session(bind=engine_)
+        hgnc_data = [(i, f"HGNC:{i}", f"ENSG{i}", f"GENE{i}") for i in range(1, 12)]
+        uniprot_data = [(1, "P06493", "9606", "CDK1_HUMAN", "Cyclin-dependent kinase 1", 1)]
+        assert models.add_data_hgnc(hgnc_data, session_) == 11
+        assert models.add_data_uniprot(uniprot_data, session_) == 1
+        hgnc_data[0] = (1, "HGNC:1722", "ENSG00000170312", "GENE1")
+        assert models.add_data_hgnc(hgnc_data, session_) == 11
+        assert models.add_data_uniprot(uniprot_data, session_) == 1
+        assert session_.query(models.Hgnc).count() == 11
+        assert session_.query(models.Uniprot).count() == 1
+        assert models.query_many(["GENE1"], session_) == {'GENE1': [1, 'ENSG00000170312', 'P06493', '9606']}
+
+    def test_repopulate_other_ids(self):
+        """Tests repopulating with other ids of the same symbols updates the stored rows, keeping their ids."""
+        engine_ = create_engine("sqlite://")
+        models.Base.metadata.create_all(bind=engine_)
+        session_ = Session(bind=engine_)
+        models.add_data_hgnc([(1, "HGNC:1", "ENSG1", "X"), (2, "HGNC:2", "ENSG2", "Y")], session_)
+        hgnc_data = [(1, "HGNC:2", "ENSG2.1", "Y"), (2, "HGNC:1", "ENSG1", "X"), (3, "HGNC:3", "ENSG3", "Z")]
+        hgnc_ids = models.stored_hgnc_ids(hgnc_data, session_)
+        assert hgnc_ids == {1: 2, 2: 1, 3: 3}
+        assert models.add_data_hgnc(hgnc_data, session_) == 3
+        models.add_data_uniprot([(1, "P1", "9606", "Y_HUMAN", "Protein Y", 1)], session_, hgnc_ids)
+        assert models.query_many(["X", "Y", "Z"], session_) == {"X": [1, "ENSG1", None, None],
+                                                                "Y": [2, "ENSG2.1", "P1", "9606"],
+                                                                "Z": [3, "ENSG3", None, None]}
+        # a new symbol whose id is taken by another stored symbol gets the next free id.
+        models.add_data_hgnc([(1, "HGNC:4", "ENSG4", "W")], session_)
+        assert models.query_many(["W"], session_) == {"W": [4, "ENSG4", None, None]}
+
+    def test_populate_order(self):
+        """Tests populating in another process, where the genes come in another order, writes the same rows."""
+        from plab2.network import Analyzer
+        info = {"hgnc_CDK1": {"HGNC ID": "HGNC:1722", "Ensembl Gene ID": "ENSG00000170312", "UniProt ID": ["P06493"]},
+                "uniprot_P06493": {"first accession number": "P06493", "NCBI taxonomy ID": "9606",
+                                   "Name of protein": "CDK1_HUMAN", "full name of protein": "Cyclin-dependent kinase 1"},
+                "hgnc_GENE1": {"HGNC ID": "HGNC:1", "Ensembl Gene ID": "ENSG1", "UniProt ID": ["Q1"]},
+                "uniprot_Q1": {None}}
+        engine_ = create_engine("sqlite://")
+        models.Base.metadata.create_all(bind=engine_)
+        session_ = Session(bind=engine_)
+        generated = []
+        for keys in (list(info), list(reversed(info))):
+            analyzer = Analyzer({}, None, None, None, None)
+            analyzer.enrich_identifier_info.update((key, info[key]) for key in keys)
+            hgnc_data, uniprot_data = analyzer.enrich_generate_databaseinfo()
+            models.add_data_hgnc(hgnc_data, session_)
+            models.add_data_uniprot(uniprot_data, session_)
+            generated.append((hgnc_data, uniprot_data))
+        assert generated[0] == generated[1]
+        assert session_.query(models.Hgnc).count() == 2 and session_.query(models.Uniprot).count() == 1
+        assert models.query_many(["CDK1", "GENE1"], session_) == {"CDK1": [1, "ENSG00000170312", "P06493", "9606"],
+                                                                  "GENE1": [2, "ENSG1", None, None]}
+
+    def test_populate_other_set(self):
+        """Tests populating another set of genes keeps the protein rows of the first set."""
+        from plab2.network import Analyzer
+        protein = {"NCBI taxonomy ID": "9606", "Name of protein": "P_HUMAN", "full name of protein": "Protein"}
+        first = {"hgnc_AAA": {"HGNC ID": "HGNC:1", "Ensembl Gene ID": "ENSG1", "UniProt ID": ["P1"]},
+                 "hgnc_BBB": {"HGNC ID": "HGNC:2", "Ensembl Gene ID": "ENSG2", "UniProt ID": ["P2"]},
+                 "hgnc_CCC": {"HGNC ID": "HGNC:3", "Ensembl Gene ID": "ENSG3", "UniProt ID": ["P2"]},
+                 "uniprot_P1": dict(protein, **{"first accession number": "P1"}),
+                 "uniprot_P2": dict(protein, **{"first accession number": "P2"})}
+        second = {"hgnc_DDD": {"HGNC ID": "HGNC:4", "Ensembl Gene ID": "ENSG4", "UniProt ID": ["P0"]},
+                  "uniprot_P0": dict(protein, **{"first accession number": "P0"})}
+        engine_ = create_engine("sqlite://")
+        models.Base.metadata.create_all(bind=engine_)
+        session_ = Session(bind=engine_)
+        for info in (first, second):
+            analyzer = Analyzer({}, None, None, None, None)
+            analyzer.enrich_identifier_info.update(info)
+            hgnc_data, uniprot_data = analyzer.enrich_generate_databaseinfo()
+            hgnc_ids = models.stored_hgnc_ids(hgnc_data, session_)
+            models.add_data_hgnc(hgnc_data, session_)
+            models.add_data_uniprot(uniprot_data, session_, hgnc_ids)
+            if info is first:
+                stored = models.query_many(["AAA", "BBB", "CCC"], session_)
+        # the accession number shared by BBB and CCC is kept for both genes.
+        assert stored == {"AAA": [1, "ENSG1", "P1", "9606"], "BBB": [2, "ENSG2", "P2", "9606"],
+                          "CCC": [3, "ENSG3", "P2", "9606"]}
+        assert models.query_many(["AAA", "BBB", "CCC"], session_) == stored
+        assert models.query_many(["DDD"], session_) == {"DDD": [4, "ENSG4", "P0", "9606"]}
+        assert session_.query(models.Uniprot).count() == 4
+
+    def test_migrate_database(self, tmp_path):
+        """Tests the indexes are added to a database made with the former schema."""
+        from sqlalchemy import inspect, text
+        engine_ = create_engine(f"sqlite:///{tmp_path.joinpath('old.db')}")
+        with engine_.begin() as connection:
+            connection.execute(text("CREATE TABLE hgnc (id INTEGER PRIMARY KEY, HGNC_ID VARCHAR(255), "
+                                    "Ensembl_Gene_ID VARCHAR(255), Gene_symbol VARCHAR(255))"))
+            connection.execute(text("CREATE TABLE uniprot (id INTEGER PRIMARY KEY, accession_number VARCHAR(255), "
+                                    "NCBI_taxonomy_ID VARCHAR(255), Name_of_protein VARCHAR(255), "
+                                    "full_name_protein VARCHAR(255), HGNC_table_ID INTEGER REFERENCES hgnc (id))"))
+            connection.execute(text("INSERT INTO hgnc VALUES (1, 'HGNC:1722', 'ENSG00000170312', 'CDK1'), "
+                                    "(2, 'HGNC:1722', 'ENSG00000170312', 'CDK1'), (3, 'HGNC:1', 'ENSG1', 'GENE1')"))
+        assert sorted(models.migrate_database(engine_)) == ["ix_hgnc_Gene_symbol", "ix_uniprot_HGNC_table_ID",
+                                                          "ix_uniprot_accession_hgnc"]
+        assert models.migrate_database(engine_) == []
+        indexes = {index["name"]: index for index in inspect(engine_).get_indexes("hgnc")}
+        assert indexes["ix_hgnc_Gene_symbol"]["unique"]
+        assert models.query_many(["CDK1", "GENE1"], Session(bind=engine_)) == {"CDK1": [1, "ENSG00000170312", None, None],
+                                                                             "GENE1": [3, "ENSG1", None, None]}
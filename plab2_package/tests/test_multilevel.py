@@ -0,0 +1,61 @@
+"""Tests for the multilevel layout."""
+import networkx as nx
+import numpy as np
+from plab2.layout import LayoutCache, compute_layout
+from plab2.multilevel import Repulsion, coarsen, multilevel_layout
+from plab2.topology import adjacency
+
+
+def distance_correlation(graph: nx.Graph, positions: dict) -> float:
+    """Correlation of the graph distance and the drawn distance of all node pairs."""
+    nodes = list(graph.nodes())
+    distances = dict(nx.all_pairs_shortest_path_length(graph))
+    pairs = [(u, v) for i, u in enumerate(nodes) for v in nodes[i + 1:]]
+    drawn = [np.linalg.norm(positions[u] - positions[v]) for u, v in pairs]
+    return float(np.corrcoef([distances[u][v] for u, v in pairs], drawn)[0, 1])
+
+
+class TestMultilevel:
+    """Tests the coarsening, the approximated repulsion and the layouts."""
+    def test_coarsen(self):
+        """Tests every cluster of a coarsened grid is connected to the clusters of its neighbors."""
+        matrix, labels = adjacency(nx.grid_2d_graph(30, 30))
+        coarse, cluster = coarsen(matrix, np.random.default_rng(0))
+        assert coarse.shape[0] == cluster.max() + 1 < 0.5 * matrix.shape[0]
+        rows, cols = matrix.nonzero()
+        merged = cluster[rows] != cluster[cols]
+        assert (np.asarray(coarse[cluster[rows[merged]], cluster[cols[merged]]]) == 1).all()
+
+    def test_repulsion(self):
+        """Tests the grid repulsion is close to the exact sum of k^2 / d over far node pairs."""
+        rng = np.random.default_rng(0)
+        positions = np.vstack([rng.normal(size=(300, 2)), rng.normal(size=(300, 2)) + [40, 0]])
+        delta = positions[:, None, :] - positions[None, :, :]
+        squared = (delta ** 2).sum(axis=2)
+        np.fill_diagonal(squared, np.inf)
+        exact = (delta / squared[:, :, None]).sum(axis=1)
+        approximate = Repulsion(128)(positions)
+        # the clusters push each other apart along x.
+        assert np.corrcoef(exact[:, 0], approximate[:, 0])[0, 1] > 0.95
+
+    def test_layout(self):
+        """Tests the layout of a grid keeps its distances, is reproducible and scaled like spring_layout."""
+        grid = nx.grid_2d_graph(15, 15)
+        positions = multilevel_layout(grid, seed=0)
+        assert distance_correlation(grid, positions) > 0.9
+        coordinates = np.array(list(positions.values()))
+        assert np.abs(coordinates).max() == 1
+        np.testing.assert_allclose(multilevel_layout(grid, seed=0)[(3, 4)], positions[(3, 4)])
+        assert len(multilevel_layout(nx.path_graph(2))) == 2
+
+    def test_incremental(self, tmp_path):
+        """Tests the cached nodes keep their position, and 'auto' uses the multilevel layout for large graphs."""
+        graph = nx.relabel_nodes(nx.grid_2d_graph(50, 50), lambda node: f"{node[0]}-{node[1]}")
+        cache = LayoutCache(str(tmp_path))
+        first = compute_layout(graph, cache, algorithm='auto')
+        assert len(list(tmp_path.glob('*.npz'))) == 1
+        changed = graph.copy()
+        changed.add_edge('0-0', 'new')
+        second = compute_layout(changed, cache, algorithm='multilevel')
+        np.testing.assert_allclose(second['49-49'], first['49-49'], rtol=1e-6)
+        assert len(list(tmp_path.glob('*.npz'))) == 2
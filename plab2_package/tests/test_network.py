@@ -1,4 +1,6 @@
 """Collection of tests for the network and analyzer."""
+import time
+import numpy as np
 import pandas as pd
 from plab2 import network
 import os
@@ -23,6 +25,26 @@ class TestNetwork:
         assert isinstance(relation, list)
         assert ("USP14", "physical association", "AR") in relation
 
+    def test_iter_ppis(self):
+        """Tests the iter_ppis method streams the same relations as read_ppis in bounded chunks."""
+        n_ppi = network.Network({}, None, ppi, None, None)
+        chunks = list(n_ppi.iter_ppis(ppi, chunk_size=100))
+        assert all(len(chunk) <= 100 for chunk in chunks)
+        assert [rel for chunk in chunks for rel in chunk] == n_ppi.read_ppis(ppi)
+
+    def test_low_memory(self, tmp_path):
+        """Tests the low memory mode writes the same network without keeping the relations."""
+        n_ppi = network.Network({}, None, ppi, None, None)
+        n_low = network.Network({}, None, ppi, None, None, low_memory=True)
+        assert not hasattr(n_low, 'rels')
+        assert set(n_low.nodes.values()) == set(n_ppi.nodes.values())
+
+        edge_path = tmp_path.joinpath('edge_list.tsv')
+        n_low.write_edge_list(edge_path)
+        written = {(n_low.nodes[int(out_)], n_low.nodes[int(in_)], interaction)
+                   for out_, in_, interaction in n_low.relations(edge_path)}
+        assert written == {(out_, in_, interaction.replace(" ", "_")) for out_, interaction, in_ in n_ppi.rels}
+
     def test_write_node_list_relations(self):
         """Tests the write_node_list and relations method."""
         n_ppi = network.Network({}, None, ppi, None, None)
@@ -65,6 +87,15 @@ class TestNetwork:
         result_of_edges_ = len(graph_edge_list_)
         assert number_of_edge_ == result_of_edges_
 
+    def test_relabel(self):
+        """Tests the vectorized relabeling keeps unknown identifiers and the metadata."""
+        data = pd.DataFrame({'node_1': [1, 2, 5], 'node_2': [2, 3, 1], 'metadata': ['a', 'b', 'c']})
+        mapping = {1: 'TP53', 2: 'MDM2', 3: 'CDK1'}
+        assert list(network.relabel(data['node_1'], mapping)) == ['TP53', 'MDM2', 5]
+        graph_ = network.graph_from_edge_list(data, mapping)
+        assert graph_['MDM2']['CDK1']['metadata'] == 'b'
+        assert list(data['node_1']) == [1, 2, 5]
+
     def test_generate_image(self):
         """Tests the function generate_graph_network. """
         if os.path.isfile(graph):
@@ -95,6 +126,23 @@ class TestAnalyzer:
         assert result_path is not None
         assert path in result_path
 
+    def test_generate_html(self, tmp_path):
+        """Tests the interactive page highlights the nodes and edges of the shortest path."""
+        a_ppi = network.Analyzer({}, None, ppi, None, None)
+        a_ppi.write_node_list(nodes)
+        a_ppi.write_edge_list(edges)
+        a_ppi.import_graph(edges)
+        path = a_ppi.shortest_path("CREBBP", "TRA2B", max_paths=1)[0]
+        node_colors, edge_colors = a_ppi.color_path([path])
+        assert node_colors.count('blue') == len(path) and edge_colors.count('purple') == len(path) - 1
+
+        output = tmp_path.joinpath("graph.html")
+        a_ppi.generate_graph_network(str(output))
+        page = output.read_text()
+        assert all(f'"id": "{node}"' in page for node in path)
+        with pytest.raises(ValueError):
+            a_ppi.check_output(str(output), 'gif')
+
 #     def test_import_graph(self):
 #         """Tests the function import graph."""
 #         pass
@@ -102,13 +150,14 @@ class TestAnalyzer:
 #
 class TestStatistics:
     """Tests for function if Statistics class."""
-    def test_enrich_graph(self):
+    def test_enrich_graph(self, tmp_path):
         """Tests enrich the graph with RNA/DNA nodes and the associated edges."""
         s_ppi = network.Statistics({}, None, ppi, None, None)
         s_ppi.enrich_generate_node_dict()
-        s_ppi.enrich_write_node_list(nodes_enrich)
-        s_ppi.enrich_edge_from_ppi(s_ppi.relations(nodes_enrich), edges_enrich)
-        graph_ = s_ppi.enrich_import_graph(edges_enrich)
+        node_path, edge_path = tmp_path.joinpath("node_list_enrich.tsv"), tmp_path.joinpath("edge_list_enrich.tsv")
+        s_ppi.enrich_write_node_list(node_path)
+        s_ppi.enrich_edge_from_ppi(s_ppi.relations(node_path), edge_path)
+        graph_ = s_ppi.enrich_import_graph(edge_path)
 
         node_dna = []
         node_rna = []
@@ -131,13 +180,60 @@ class TestStatistics:
                 number_of_translated += 1
         assert len(node_dna) == len(node_rna) == len(node_protein) == number_of_translated == number_of_transcribed
 
-    def test_summary_statistics(self):
+    def test_enrich_golden(self, tmp_path):
+        """Tests the enriched node and edge lists equal the files written before the array expansion."""
+        with open(nodes_enrich) as f:
+            symbols = [row.split('\t')[1] for row in f][::3]
+        s_ppi = network.Statistics({}, None, ppi, None, None)
+        s_ppi.set_enriched_nodes(symbols)
+        node_path, edge_path = tmp_path.joinpath("node_list_enrich.tsv"), tmp_path.joinpath("edge_list_enrich.tsv")
+        s_ppi.enrich_write_node_list(node_path)
+        s_ppi.enrich_edge_from_ppi(None, edge_path)
+        # the files are written with csv line endings, the stored ones with newlines.
+        for written, expected in ((node_path, nodes_enrich), (edge_path, edges_enrich)):
+            assert written.read_bytes().replace(b'\r\n', b'\n') == expected.read_bytes()
+
+    def test_enrich_time(self, tmp_path):
+        """Tests enriching 20k genes with 100k PPIs takes less than a second."""
+        rng = np.random.default_rng(0)
+        pairs = rng.integers(0, 20_000, (100_000, 2))
+        ppi_path = tmp_path.joinpath("ppis.csv")
+        ppi_path.write_text("out,interaction_type,in\n" +
+                            ''.join(f"GENE{u},physical association,GENE{v}\n" for u, v in pairs))
+        s_ppi = network.Statistics({}, None, ppi_path, None, None)
+        started = time.perf_counter()
+        s_ppi.enrich_generate_node_dict()
+        s_ppi.enrich_write_node_list(tmp_path.joinpath("node_list_enrich.tsv"))
+        s_ppi.enrich_edge_from_ppi(None, tmp_path.joinpath("edge_list_enrich.tsv"))
+        assert time.perf_counter() - started < 1
+        assert len(s_ppi.nodes) == 3 * len(np.unique(pairs))
+
+    def test_enrich_from_old_edge(self, tmp_path):
+        """Tests enriching a network from node/edge lists links the protein nodes of the original edges."""
+        node_path, edge_path = tmp_path.joinpath("node_list.tsv"), tmp_path.joinpath("edge_list.tsv")
+        enrich_node_path, enrich_edge_path = tmp_path.joinpath("node_enrich.tsv"), tmp_path.joinpath("edge_enrich.tsv")
+        n_ppi = network.Network({}, None, ppi, None, None)
+        n_ppi.write_node_list(node_path)
+        n_ppi.write_edge_list(edge_path)
+
+        s_edge = network.Statistics({}, None, None, node_path, edge_path)
+        s_edge.enrich_node_label(s_edge.relations(node_path))
+        assert s_edge.nodes[s_edge.enriched_identifiers(["USP14"])[0]] == {"USP14": 'Protein'}
+        s_edge.enrich_write_node_list(enrich_node_path)
+        s_edge.open_original_edge(edge_path)
+        s_edge.enrich_edge_from_old_edge(s_edge.relations(enrich_node_path), enrich_edge_path)
+        graph_ = s_edge.enrich_import_graph(enrich_edge_path)
+        assert graph_.has_edge("USP14 Protein", "AR Protein")
+        assert graph_.has_edge("USP14 DNA", "USP14 RNA")
+
+    def test_summary_statistics(self, tmp_path):
         """Tests function summary_statistics: if it can calculate summary statistics for a graph."""
         s_ppi = network.Statistics({}, None, ppi, None, None)
         s_ppi.enrich_generate_node_dict()
-        s_ppi.enrich_write_node_list(nodes_enrich)
-        s_ppi.enrich_edge_from_ppi(s_ppi.relations(nodes_enrich), edges_enrich)
-        s_ppi.enrich_import_graph(edges_enrich)
+        node_path, edge_path = tmp_path.joinpath("node_list_enrich.tsv"), tmp_path.joinpath("edge_list_enrich.tsv")
+        s_ppi.enrich_write_node_list(node_path)
+        s_ppi.enrich_edge_from_ppi(s_ppi.relations(node_path), edge_path)
+        s_ppi.enrich_import_graph(edge_path)
         d = s_ppi.summary_statistics(enrich=True)
         assert isinstance(d, pd.DataFrame)
 
@@ -148,13 +244,14 @@ class TestStatistics:
         translated = d.iloc[0, 6]
         assert nodes_dna == nodes_rna == nodes_protein == transcribed == translated == 621
 
-    def test_export_stats(self):
+    def test_export_stats(self, tmp_path):
         """Tests function export_stats."""
         s_ppi = network.Statistics({}, None, ppi, None, None)
         s_ppi.enrich_generate_node_dict()
-        s_ppi.enrich_write_node_list(nodes_enrich)
-        s_ppi.enrich_edge_from_ppi(s_ppi.relations(nodes_enrich), edges_enrich)
-        s_ppi.enrich_import_graph(edges_enrich)
+        node_path, edge_path = tmp_path.joinpath("node_list_enrich.tsv"), tmp_path.joinpath("edge_list_enrich.tsv")
+        s_ppi.enrich_write_node_list(node_path)
+        s_ppi.enrich_edge_from_ppi(s_ppi.relations(node_path), edge_path)
+        s_ppi.enrich_import_graph(edge_path)
         d = s_ppi.summary_statistics(enrich=True)
         s_ppi.export_stats(d, "stats.json")
         assert os.path.isfile("stats.json")
@@ -0,0 +1,73 @@
+"""Tests for the landmark distance oracle."""
+import os
+import networkx as nx
+import pytest
+from plab2.network import Analyzer
+from plab2.oracle import DistanceOracle, oracle_path
+
+graph = nx.relabel_nodes(nx.les_miserables_graph(), str)
+# a second component.
+graph.add_edges_from([('A', 'B'), ('B', 'C')])
+
+
+class TestDistanceOracle:
+    """Tests the bounds against networkx and the persistence next to the edge list."""
+    def test_bounds(self):
+        """Tests the bounds contain the distance of every pair, and pairs of different components."""
+        oracle = DistanceOracle.build(graph, number_of_landmarks=4)
+        distances = dict(nx.all_pairs_shortest_path_length(graph))
+        for source in graph.nodes():
+            for target in graph.nodes():
+                estimate = oracle.query(source, target)
+                assert estimate.connected == (target in distances[source])
+                if estimate.connected and estimate.upper is not None:
+                    assert estimate.lower <= distances[source][target] <= estimate.upper
+        assert oracle.query('A', 'C') == (True, 1, None)
+        assert set(oracle.latency()) == {'p50', 'p90', 'p99'}
+        with pytest.raises(nx.NodeNotFound):
+            oracle.query('A', 'unknown')
+
+    def test_load_or_build(self, tmp_path, monkeypatch):
+        """Tests the oracle is persisted, loaded after the edge list is written again and rebuilt after it changed."""
+        edge_path = str(tmp_path / "edge_list.tsv")
+        nx.write_edgelist(graph, edge_path, delimiter='\t', data=False)
+        built = DistanceOracle.load_or_build(graph, edge_path, 4)
+        assert os.path.isfile(oracle_path(edge_path))
+        # the same edges in another order, as written by every 'plab2 path'.
+        nx.write_edgelist(nx.Graph(reversed(list(graph.edges()))), edge_path, delimiter='\t', data=False)
+        with monkeypatch.context() as patch:
+            patch.setattr(DistanceOracle, 'build', None)
+            loaded = DistanceOracle.load_or_build(graph, edge_path, 4)
+        assert (loaded.distances == built.distances).all()
+        assert loaded.query('Valjean', 'A') == (False, None, None)
+        with open(edge_path, 'a') as f:
+            f.write("C\tValjean\n")
+        changed = graph.copy()
+        changed.add_edge('C', 'Valjean')
+        assert DistanceOracle.load_or_build(changed, edge_path, 4).connected('Valjean', 'A')
+
+    def test_load_or_build_checks(self, tmp_path, monkeypatch):
+        """Tests an unchanged edge list is not hashed and another number of landmarks rebuilds the oracle."""
+        import plab2.oracle
+        edge_path = str(tmp_path / "edge_list.tsv")
+        nx.write_edgelist(graph, edge_path, delimiter='\t', data=False)
+        DistanceOracle.load_or_build(graph, edge_path, 4)
+        with monkeypatch.context() as patch:
+            patch.setattr(DistanceOracle, 'build', None)
+            patch.setattr(plab2.oracle, 'graph_fingerprint', None)
+            assert DistanceOracle.load_or_build(graph, edge_path, 4).number_of_landmarks == 4
+        rebuilt = DistanceOracle.load_or_build(graph, edge_path, 2)
+        assert rebuilt.number_of_landmarks == 2 and len(rebuilt.landmarks) == 2
+        assert DistanceOracle.load(oracle_path(edge_path)).number_of_landmarks == 2
+
+    def test_analyzer(self):
+        """Tests the analyzer answers unreachable pairs and tight distances from the oracle."""
+        a = Analyzer({}, graph, None, None, None)
+        a.use_oracle()
+        with pytest.raises(nx.NetworkXNoPath):
+            a.shortest_path('Valjean', 'A')
+        with pytest.raises(nx.NetworkXNoPath):
+            a.distance('Valjean', 'A')
+        for target in ('Javert', 'Napoleon', 'Cosette'):
+            assert a.distance('Valjean', target) == nx.shortest_path_length(graph, 'Valjean', target)
+        assert a.shortest_path('A', 'C') == [['A', 'B', 'C']]
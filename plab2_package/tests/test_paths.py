@@ -0,0 +1,54 @@
+"""Tests for the lazy shortest path enumeration."""
+import time
+import networkx as nx
+import numpy as np
+import pytest
+from plab2.csr import CSRGraph
+from plab2.paths import shortest_paths
+
+
+def csr_graph(graph: nx.Graph) -> CSRGraph:
+    """The same network in the CSR backend."""
+    labels = np.array(list(graph.nodes()), dtype=object)
+    position = {node: index for index, node in enumerate(graph.nodes())}
+    sources = np.array([position[u] for u, v in graph.edges()])
+    targets = np.array([position[v] for u, v in graph.edges()])
+    return CSRGraph.from_arrays(labels, sources, targets, np.zeros(len(sources), dtype=np.int8),
+                                np.array(['ppi'], dtype=object))
+
+
+graph = nx.relabel_nodes(nx.les_miserables_graph(), str)
+graph.add_edges_from([('A', 'B'), ('Valjean', 'Valjean')])
+
+
+class TestShortestPaths:
+    """Tests the enumeration against nx.all_shortest_paths."""
+    def test_all_paths(self):
+        """Tests every shortest path is generated once, for both graph backends."""
+        csr = csr_graph(graph)
+        nodes = list(graph.nodes())[:30]
+        for source in nodes:
+            for target in nodes:
+                expected = sorted(nx.all_shortest_paths(graph, source, target))
+                assert sorted(shortest_paths(graph, source, target)) == expected
+                assert sorted(shortest_paths(csr, source, target)) == expected
+
+    def test_max_paths(self):
+        """Tests the first path of a grid with about 10^16 shortest paths comes back at once."""
+        grid = nx.grid_2d_graph(30, 30)
+        started = time.perf_counter()
+        paths = list(shortest_paths(grid, (0, 0), (29, 29), max_paths=3))
+        assert time.perf_counter() - started < 1
+        assert len(paths) == 3 and len(set(map(tuple, paths))) == 3
+        assert all(len(path) == 59 and nx.is_path(grid, path) for path in paths)
+
+    def test_no_path(self):
+        """Tests unknown and unreachable nodes raise like networkx when the first path is requested."""
+        paths = shortest_paths(graph, 'Valjean', 'A')
+        with pytest.raises(nx.NetworkXNoPath):
+            next(paths)
+        with pytest.raises(nx.NodeNotFound):
+            next(shortest_paths(graph, 'Valjean', 'unknown'))
+        with pytest.raises(nx.NodeNotFound):
+            next(shortest_paths(csr_graph(graph), 'unknown', 'A'))
+        assert list(shortest_paths(graph, 'A', 'A')) == [['A']]
@@ -0,0 +1,50 @@
+"""Tests for the collection renderer."""
+import io
+import networkx as nx
+import numpy as np
+from plab2.render import edge_density, label_nodes, render_network
+
+
+class TestRender:
+    """Tests the label level of detail, the edge density image and the saved images."""
+    def test_label_nodes(self):
+        """Tests small networks label every node, large ones the highlighted and then the best connected nodes."""
+        nodes = ['a', 'b', 'c', 'd']
+        degrees = np.array([1, 5, 3, 2])
+        assert label_nodes(nodes, degrees, max_labels=4) == nodes
+        assert label_nodes(nodes, degrees, highlight=['d', 'b'], max_labels=3) == ['d', 'b', 'c']
+        assert label_nodes(nodes, degrees, max_labels=2) == ['b', 'c']
+
+    def test_edge_density(self):
+        """Tests every edge adds 1 to the image, along its pixels."""
+        segments = np.array([[[0, 0], [1, 0]], [[0, 0], [0, 1]], [[0, 0], [1, 1]]], dtype=float)
+        image = edge_density(segments, np.zeros(2), 1.0, pixels=11)
+        assert np.isclose(image.sum(), 3)
+        # the first edge is the bottom row, the second the left column.
+        assert image[0, 1:].sum() > 0 and image[1:, 0].sum() > 0 and image[0, 5] > 0
+        assert image[5, 5] > 0 and image[10, 5] == 0
+
+    def test_render(self, tmp_path):
+        """Tests the network is saved as lines and as density image, to files and file objects."""
+        graph = nx.barabasi_albert_graph(300, 2, seed=0)
+        positions = nx.random_layout(graph, seed=0)
+        colors = ['blue' if node < 10 else 'red' for node in graph.nodes()]
+        render_network(graph, positions, str(tmp_path / 'lines.png'), node_color=colors, highlight=[299],
+                       edge_labels={edge: 'ppi' for edge in graph.edges()})
+        render_network(graph, positions, str(tmp_path / 'raster.svg'), raster=True)
+        image = io.BytesIO()
+        render_network(graph, positions, image, output_format='png')
+        assert (tmp_path / 'lines.png').stat().st_size > 0
+        assert (tmp_path / 'raster.svg').read_text().startswith('<?xml')
+        assert image.getvalue()[:4] == b'\x89PNG'
+        render_network(nx.empty_graph(1), {0: np.zeros(2)}, str(tmp_path / 'single.png'))
+
+    def test_pyplot_state(self, tmp_path):
+        """Tests rendering neither switches the pyplot backend nor leaves pyplot figures behind."""
+        import matplotlib
+        import matplotlib.pyplot as plt
+        backend, figures = matplotlib.get_backend(), plt.get_fignums()
+        render_network(nx.path_graph(3), nx.random_layout(nx.path_graph(3), seed=0), str(tmp_path / 'path.png'))
+        render_network(nx.path_graph(3), nx.random_layout(nx.path_graph(3), seed=0), str(tmp_path / 'path.pdf'))
+        assert matplotlib.get_backend() == backend and plt.get_fignums() == figures
+        assert (tmp_path / 'path.pdf').read_bytes()[:4] == b'%PDF'
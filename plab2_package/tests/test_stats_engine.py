@@ -0,0 +1,71 @@
+"""Tests for the component-parallel statistics engine."""
+import math
+import networkx as nx
+import pandas as pd
+from plab2.stats_engine import StatisticsEngine
+
+
+def enriched_graph() -> nx.Graph:
+    """Karate club proteins with their DNA and RNA nodes, and a few separate components."""
+    graph = nx.relabel_nodes(nx.karate_club_graph(), {i: f"G{i} Protein" for i in range(34)})
+    for i in range(34):
+        graph.add_edge(f"G{i} DNA", f"G{i} RNA")
+        graph.add_edge(f"G{i} RNA", f"G{i} Protein")
+    graph.add_edges_from([("A Protein", "B Protein"), ("B Protein", "C Protein"), ("C Protein", "A Protein"),
+                          ("D Protein", "E Protein")])
+    return graph
+
+
+def reference(graph: nx.Graph, enrich: bool) -> pd.DataFrame:
+    """The former Statistics.summary_statistics."""
+    number_of_nodes = graph.number_of_nodes()
+    number_of_edges = graph.number_of_edges()
+    density = number_of_edges / (number_of_nodes - 1)
+    local_node_connectivity = [nx.node_connectivity(graph, source, target) for source, target in graph.edges()]
+    number_of_node_pair = math.factorial(number_of_nodes) / (math.factorial(number_of_nodes - 2) * 2)
+    average_node_connectivity = float(sum(local_node_connectivity) / number_of_node_pair)
+    if enrich:
+        types = [node.split(" ")[1] for node in graph.nodes()]
+        edge_types = [(u.split(" ")[1], v.split(" ")[1]) for u, v in graph.edges()]
+        transcribed, translated = edge_types.count(('DNA', 'RNA')), edge_types.count(('RNA', 'Protein'))
+        d = {'Nodes': [number_of_nodes], 'Nodes-DNA': [types.count('DNA')], 'Nodes-RNA': [types.count('RNA')],
+             'Nodes-Protein': [types.count('Protein')], 'Edges': [number_of_edges],
+             'Edges-transcribed': [transcribed], 'Edges-translated': [translated],
+             'Edges-PPI': [number_of_edges - transcribed - translated], 'Density of Network': [density],
+             'Average node connectivity': [average_node_connectivity]}
+    else:
+        d = {'Nodes': [number_of_nodes], 'Nodes-DNA': 0, 'Nodes-RNA': 0, 'Nodes-Protein': [number_of_nodes],
+             'Edges': [number_of_edges], 'Edges-transcribed': 0, 'Edges-translated': 0,
+             'Edges-PPI': [number_of_edges], 'Density of Network': [density],
+             'Average node connectivity': [average_node_connectivity]}
+    return pd.DataFrame(data=d)
+
+
+class TestStatisticsEngine:
+    """Tests the merged statistics equal the statistics of the whole graph."""
+    def test_summary(self):
+        """Tests the summary of an enriched and a plain graph, in one and in several processes."""
+        graph = enriched_graph()
+        for enrich in (True, False):
+            expected = reference(graph, enrich)
+            pd.testing.assert_frame_equal(StatisticsEngine().summary(graph, enrich), expected)
+            pd.testing.assert_frame_equal(StatisticsEngine(workers=2).summary(graph, enrich), expected)
+
+    def test_components(self):
+        """Tests the per component counts."""
+        engine = StatisticsEngine()
+        engine.summary(enriched_graph(), enrich=True)
+        counts = engine.component_counts
+        assert list(counts['Nodes']) == [102, 3, 2]
+        assert list(counts['Edges-transcribed']) == [34, 0, 0]
+        assert list(counts['Connectivity'])[1:] == [6, 1]
+
+    def test_without_connectivity(self):
+        """Tests the summary without connectivity, of a single edge which needs a flow computation and a single node."""
+        summary = StatisticsEngine(connectivity='none').summary(nx.path_graph(4))
+        assert summary['Edges'][0] == 3 and math.isnan(summary['Average node connectivity'][0])
+        summary = StatisticsEngine(connectivity='sampled', sample_size=0).summary(nx.path_graph(4))
+        assert summary['Edges'][0] == 3
+        single = nx.Graph()
+        single.add_node(1)
+        assert StatisticsEngine(connectivity='none').summary(single)['Density of Network'][0] == 0.0
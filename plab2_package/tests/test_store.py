@@ -0,0 +1,94 @@
+"""Tests for the graph store of the Flask app."""
+import os
+import threading
+import networkx as nx
+from plab2.layout import LayoutCache, set_layout_cache
+from plab2.network import Network
+from plab2.store import EDGE_BYTES, NODE_BYTES, GraphStore
+
+
+def write_edges(path, edges) -> None:
+    path.write_text(''.join(f"{u}\t{v}\tppi\n" for u, v in edges))
+
+
+def load(path):
+    """The network of an edge list, counting the imports."""
+    load.count += 1
+    n = Network({}, None, None, None, None)
+    n.import_graph(str(path))
+    return n
+
+
+load.count = 0
+
+
+class TestGraphStore:
+    """Tests the store keys networks by content and removes the least recently used ones."""
+    def test_get(self, tmp_path):
+        """Tests a network is imported once per content, also if the file is replaced by the same content."""
+        store = GraphStore()
+        path = tmp_path / 'edges.tsv'
+        write_edges(path, [(1, 2), (2, 3)])
+        load.count = 0
+        first = store.get([str(path)], lambda: load(path))
+        assert store.get([str(path)], lambda: load(path)) is first and load.count == 1
+        assert first.size == 3 * NODE_BYTES + 2 * EDGE_BYTES
+        write_edges(path, [(1, 2), (2, 3)])
+        os.utime(path, ns=(0, 0))
+        assert store.get([str(path)], lambda: load(path)) is first and load.count == 1
+        write_edges(path, [(1, 2), (2, 4)])
+        changed = store.get([str(path)], lambda: load(path))
+        assert changed is not first and load.count == 2
+        assert first.cached('stats', lambda: 1) == 1 and first.cached('stats', lambda: 2) == 1
+
+    def test_evict(self, tmp_path):
+        """Tests the least recently used networks are removed above the number of entries or the memory cap."""
+        store = GraphStore(max_entries=2, max_bytes=10 * NODE_BYTES)
+        paths = []
+        for number in range(3):
+            paths.append(tmp_path / f"edges_{number}.tsv")
+            write_edges(paths[-1], [(number, 10 + number)])
+        entries = [store.get([str(path)], lambda path=path: load(path)) for path in paths[:2]]
+        store.get([str(paths[0])], lambda: load(paths[0]))
+        store.get([str(paths[2])], lambda: load(paths[2]))
+        assert list(store.entries.values())[0] is entries[0] and len(store.entries) == 2
+        store.max_bytes = 0
+        store.evict()
+        assert len(store.entries) == 1
+
+    def test_layout(self, tmp_path):
+        """Tests the layout of a stored network is computed once and kept in memory."""
+        set_layout_cache(LayoutCache(str(tmp_path / 'layouts')))
+        try:
+            path = tmp_path / 'edges.tsv'
+            write_edges(path, nx.path_graph(10).edges())
+            entry = GraphStore().get([str(path)], lambda: load(path))
+            positions = entry.layout
+            assert len(positions) == 10 and entry.layout is positions
+            entry.network.graph.add_edge(0, 5)
+            assert entry.layout is not positions
+        finally:
+            set_layout_cache(None)
+
+    def test_concurrent(self, tmp_path):
+        """Tests a result is computed without holding the lock of the entry, and views do not share their path."""
+        path = tmp_path / 'edges.tsv'
+        write_edges(path, [(1, 2), (2, 3)])
+        entry = GraphStore().get([str(path)], lambda: load(path))
+        started, release = threading.Event(), threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(10)
+            return 'stats'
+        worker = threading.Thread(target=entry.cached, args=('stats', compute))
+        worker.start()
+        started.wait(10)
+        assert entry.lock.acquire(timeout=1)
+        entry.lock.release()
+        release.set()
+        worker.join()
+        assert entry.cached('stats', lambda: 'other') == 'stats'
+        view = entry.view()
+        view.short_path = [[1, 2]]
+        assert view.graph is entry.network.graph and not hasattr(entry.network, 'short_path')
@@ -0,0 +1,61 @@
+"""Tests for the sparse topology metrics."""
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+from plab2.csr import CSRGraph
+from plab2.topology import METRICS, topology_metrics
+
+graph = nx.karate_club_graph()
+# a leaf path, a self loop and a second component.
+graph.add_edges_from([(0, 'leaf_1'), ('leaf_1', 'leaf_2'), (5, 5), ('A', 'B')])
+
+
+def csr_graph(graph: nx.Graph) -> CSRGraph:
+    """The same network in the CSR backend."""
+    labels = np.array([str(node) for node in graph.nodes()], dtype=object)
+    position = {node: index for index, node in enumerate(graph.nodes())}
+    sources = np.array([position[u] for u, v in graph.edges()])
+    targets = np.array([position[v] for u, v in graph.edges()])
+    return CSRGraph.from_arrays(labels, sources, targets, np.zeros(len(sources), dtype=np.int8),
+                                np.array(['ppi'], dtype=object))
+
+
+class TestTopology:
+    """Tests the metrics against networkx."""
+    def test_metrics(self):
+        """Tests every metric of a graph with a self loop, leaves and two components."""
+        simple = nx.Graph(graph)
+        simple.remove_edges_from(nx.selfloop_edges(simple))
+        results = topology_metrics(graph)
+        assert list(results) == list(METRICS)
+        degrees = [degree for node, degree in simple.degree()]
+        assert results['degree'].value == pytest.approx(np.mean(degrees))
+        assert list(results['degree'].details['nodes']) == [count for count in nx.degree_histogram(simple) if count]
+        assert results['clustering'].value == pytest.approx(nx.average_clustering(simple))
+        assert results['clustering'].details['transitivity'] == pytest.approx(nx.transitivity(simple))
+        assert results['clustering'].exact
+        assert results['components'].value == 2
+        assert list(results['components'].details) == [36, 2]
+        largest = simple.subgraph(max(nx.connected_components(simple), key=len))
+        assert results['diameter'].value == nx.diameter(largest)
+        assert results['assortativity'].value == pytest.approx(nx.degree_assortativity_coefficient(simple))
+        assert results['kcore'].value == max(nx.core_number(simple).values())
+        assert list(results['kcore'].details) == [nx.core_number(simple)[node] for node in simple.nodes()]
+
+    def test_csr(self):
+        """Tests the CSR backend gives the same metrics as networkx."""
+        expected = topology_metrics(graph, ['degree', 'clustering', 'kcore'])
+        results = topology_metrics(csr_graph(graph), ['degree', 'clustering', 'kcore'])
+        for metric in expected:
+            assert results[metric].value == pytest.approx(expected[metric].value)
+        pd.testing.assert_frame_equal(results['degree'].details, expected['degree'].details)
+
+    def test_budget(self, monkeypatch):
+        """Tests an exceeded budget approximates the clustering from the first batch, and unknown metrics fail."""
+        monkeypatch.setattr('plab2.topology.CLUSTERING_BATCH_SIZE', 10)
+        result = topology_metrics(graph, ['clustering'], time_budget=0)['clustering']
+        assert not result.exact
+        assert result.details['counted nodes'] == 10
+        with pytest.raises(ValueError):
+            topology_metrics(graph, ['girth'])